@@ -35,6 +35,8 @@ create table if not exists public.predictions (
 -- Basic indexes
 create index if not exists idx_observations_region_time on public.observations(region, observed_at desc);
 create index if not exists idx_predictions_region_time on public.predictions(region, created_at desc);
+-- Upsert key for nightly batch results (ml/src/batch_predict.py): one row per region per date
+create unique index if not exists uq_predictions_region_date on public.predictions(region, prediction_for_date);
 
 -- Enable RLS
 alter table public.observations enable row level security;
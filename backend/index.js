@@ -103,17 +103,42 @@ async function fetchGoogleUserInfo(accessToken) {
 
 // --------- ML Proxy Endpoints (FastAPI) ---------
 
+// Layanan ML memberi ETag dari versi data/model; teruskan header kondisional klien dan
+// header cache balasan agar browser bisa revalidasi (304) tanpa menjalankan ulang prediksi
+const ML_CONDITIONAL_HEADERS = ['if-none-match', 'if-modified-since'];
+const ML_CACHE_HEADERS = ['etag', 'last-modified', 'cache-control'];
+
+function mlConditionalHeaders(req) {
+  const headers = {};
+  for (const name of ML_CONDITIONAL_HEADERS) {
+    if (req.headers[name]) headers[name] = req.headers[name];
+  }
+  return headers;
+}
+
+function relayMlCacheHeaders(resp, res) {
+  for (const name of ML_CACHE_HEADERS) {
+    const value = resp.headers.get(name);
+    if (value) res.set(name, value);
+  }
+}
+
 // Ambil daftar region dari layanan ML FastAPI
 app.get('/api/ml/regions', async (req, res) => {
   try {
-    const resp = await fetch('http://127.0.0.1:8001/regions');
+    const resp = await fetch('http://127.0.0.1:8001/regions', { headers: mlConditionalHeaders(req) });
 
+    if (resp.status === 304) {
+      relayMlCacheHeaders(resp, res);
+      return res.status(304).end();
+    }
     if (!resp.ok) {
       const detail = await resp.json().catch(() => ({}));
       return res.status(resp.status).json({ error: 'ml_service_error', detail });
     }
 
     const data = await resp.json();
+    relayMlCacheHeaders(resp, res);
     return res.json(data);
   } catch (e) {
     console.error('Error fetching ML regions:', e);
@@ -154,16 +179,22 @@ app.post('/api/ml/predict', async (req, res) => {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        ...mlConditionalHeaders(req),
       },
       body: JSON.stringify(requestBody),
     });
 
+    if (resp.status === 304) {
+      relayMlCacheHeaders(resp, res);
+      return res.status(304).end();
+    }
     if (!resp.ok) {
       const detail = await resp.json().catch(() => ({}));
       return res.status(resp.status).json({ error: 'ml_service_error', detail });
     }
 
     const data = await resp.json();
+    relayMlCacheHeaders(resp, res);
     return res.json(data);
   } catch (e) {
     console.error('Error proxying ML predict:', e);
@@ -5,27 +5,128 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from fastapi import FastAPI, HTTPException
+import time
+import asyncio
+import logging
+import hashlib
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 import predict as pred_module
+import model_registry
+import prediction_store
+import region_index
+import online_update
+import climatology as clim
+import metrics
+import config
 import json
-import os
-import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson  # opsional: encoder JSON yang jauh lebih cepat untuk payload web_summary besar
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
 
 app = FastAPI(
     title="Harvest Failure Prediction API",
     description="API untuk prediksi gagal panen menggunakan model GRU",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponse
 )
 
+# Kompresi respons: Brotli bila brotli-asgi terpasang (gzip untuk klien tanpa br), selain itu gzip.
+# Route streaming tidak dikompresi: kompresor menahan chunk kecil sampai buffernya penuh
+_UNCOMPRESSED_ROUTES = [r"^/predict/batch/stream$"]
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=config.RESPONSE_COMPRESSION_MIN_BYTES,
+                       gzip_fallback=True, excluded_handlers=_UNCOMPRESSED_ROUTES)
+except ImportError:
+    import re
+    from fastapi.middleware.gzip import GZipMiddleware
+
+    class _GZipMiddleware(GZipMiddleware):
+        """GZipMiddleware dengan pengecualian route seperti excluded_handlers BrotliMiddleware."""
+        _excluded = [re.compile(pattern) for pattern in _UNCOMPRESSED_ROUTES]
+
+        async def __call__(self, scope, receive, send):
+            if scope["type"] == "http" and any(p.search(scope["path"]) for p in self._excluded):
+                await self.app(scope, receive, send)
+                return
+            await super().__call__(scope, receive, send)
+
+    app.add_middleware(_GZipMiddleware, minimum_size=config.RESPONSE_COMPRESSION_MIN_BYTES)
+
+# Inferensi (TF + pandas) bersifat blocking -> jalankan di executor agar event loop tetap responsif
+_executor = ThreadPoolExecutor(max_workers=config.INFERENCE_WORKERS, thread_name_prefix="inference")
+
+async def _run_inference(fn, *args, **kwargs):
+    """Menjalankan fn di executor inferensi sambil mencatat antrean dan pekerjaan berjalan."""
+    metrics.EXECUTOR_QUEUE_DEPTH.inc()
+
+    def job():
+        metrics.EXECUTOR_QUEUE_DEPTH.dec()
+        metrics.EXECUTOR_IN_FLIGHT.inc()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.EXECUTOR_IN_FLIGHT.dec()
+
+    def on_done(future):
+        # Dibatalkan sebelum sempat berjalan (misal, klien stream memutus koneksi): job() tidak
+        # pernah mengurangi antrean. Pembatalan hanya berhasil jika job belum mulai -> tepat sekali
+        if future.cancelled():
+            metrics.EXECUTOR_QUEUE_DEPTH.dec()
+
+    future = _executor.submit(job)
+    future.add_done_callback(on_done)
+    return await asyncio.wrap_future(future)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        # Pakai template route (bukan path mentah) agar label tidak meledak
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        metrics.REQUESTS.inc(endpoint=endpoint, method=request.method, status=status)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, method=request.method)
+
+@app.on_event("startup")
+async def enable_metrics_aggregation():
+    # Multi-worker (api/serve.py): /metrics menggabungkan state semua worker, bukan hanya yang menjawab
+    if config.METRICS_MULTIPROC_DIR:
+        metrics.enable_multiprocess(config.METRICS_MULTIPROC_DIR, config.METRICS_FLUSH_INTERVAL)
+
+@app.on_event("startup")
+async def warm_model_registry():
+    # Muat artefak di awal agar request pertama tidak menanggung biaya load model
+    try:
+        await _run_inference(model_registry.get_artifacts)
+    except Exception as e:
+        logger.warning("Model belum bisa dimuat saat startup: %s", e)
+
 class PredictionRequest(BaseModel):
     region: str
     start_date: Optional[str] = None
     use_csv: bool = True
     planting_month: Optional[int] = None  # Bulan penanaman (1-12) untuk prediksi 3 bulan ke depan
+    live: bool = False  # True = abaikan hasil batch malam dan jalankan inferensi live
 
 class PredictionResponse(BaseModel):
     region: str
@@ -38,35 +139,130 @@ class PredictionResponse(BaseModel):
     mitigation_recommendations: list = []
     weather_forecast: dict = {}
     web_summary: dict = {}  # Tambahkan web_summary untuk frontend
+    horizon_risks: list = []  # Model multi-horizon: risiko per horizon (tahun) dari satu forward pass
+    feature_contributions: list = []  # Kontribusi fitur model (integrated gradients), dari tabel ter-cache
+
+class ScenarioRequest(BaseModel):
+    region: str
+    start_date: Optional[str] = None
+    use_csv: bool = True
+    live: bool = False
+
+class ScenarioResponse(BaseModel):
+    region: str
+    probability: float
+    threshold: float
+    prediction: str
+    risk_level: str
+    confidence: str
+    reasons: list = []
+    mitigation_recommendations: list = []
+    scenarios: list = []  # 12 entri: periode tanam, total kejadian ekstrem, forecast 3 bulan
+    recommended_planting_months: list = []
+    horizon_risks: list = []  # Model multi-horizon: risiko per horizon (tahun) dari satu forward pass
+    feature_contributions: list = []  # Kontribusi fitur model (integrated gradients), dari tabel ter-cache
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check murah: hanya membaca state registry model, tanpa memuat ulang artefak."""
+    state = model_registry.state()
+    if state["model_loaded"]:
+        return {"status": "healthy", **state}
+    return {"status": "unhealthy", **state, "error": state["last_error"] or "Model belum dimuat"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Metrik format Prometheus: request, latensi, inferensi, load data, cache, antrean, versi.
+
+    Dengan beberapa worker, angka digabung dari semua worker (lihat metrics.enable_multiprocess).
+    """
+    metrics.DATASET_INFO.clear()
+    metrics.DATASET_INFO.set(1, dataset="kesimpulan", version=clim.data_version(config.KESIMPULAN_PATH))
+    metrics.DATASET_INFO.set(1, dataset="cuaca", version=clim.data_version(config.WEATHER_CSV_PATH))
+    # Mode multi-worker membaca file state semua worker -> di luar event loop
+    body = await asyncio.to_thread(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _strong_etag(*parts) -> str:
+    """ETag kuat dari versi data/model + parameter request (representasi sama -> byte sama)."""
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _last_modified(*paths) -> Optional[float]:
+    mtimes = [os.path.getmtime(p) for p in paths if os.path.exists(p)]
+    return max(mtimes) if mtimes else None
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[float]) -> bool:
+    """If-None-Match (perbandingan lemah, RFC 9110) didahulukan; If-Modified-Since hanya jika tanpa ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in [t[2:] if t.startswith("W/") else t for t in tags]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _cache_headers(etag: str, last_modified: Optional[float], max_age: int, scope: str = "public") -> dict:
+    headers = {"ETag": etag, "Cache-Control": f"{scope}, max-age={max_age}, must-revalidate"}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+def _canonical_region(name: str) -> str:
+    match = region_index.get_index().resolve(name)
+    return match[0] if match else name
+
+def _predict_validators(request: PredictionRequest, selected: frozenset) -> tuple:
+    """(ETag, Last-Modified) /predict jalur CSV. Blocking (indeks wilayah & jurnal pembaruan bisa
+    dibaca dari disk) -> dipanggil di thread, bukan di event loop."""
+    etag = _strong_etag(
+        "predict", model_registry.artifacts_version(), prediction_store.data_version(),
+        # Forecast & tahun tanam bergantung pada bulan berjalan
+        date.today().strftime("%Y-%m"),
+        request.region, request.start_date, request.planting_month, sorted(selected),
+        # Pembaruan online wilayah ini (POST /updates/*) mengubah representasinya saja
+        online_update.revision(_canonical_region(request.region))
+    )
+    last_modified = _last_modified(*model_registry.artifact_paths(),
+                                   config.KESIMPULAN_PATH, config.WEATHER_CSV_PATH,
+                                   config.ONLINE_UPDATE_JOURNAL)
+    return etag, last_modified
+
+def _requested_fields(fields: Optional[str], view: Optional[str]) -> frozenset:
     try:
-        # Coba load model untuk memastikan semuanya berfungsi
-        model, scaler, config = pred_module.load_model_and_artifacts()
-        return {
-            "status": "healthy",
-            "model_loaded": True
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e)
-        }
+        return pred_module.resolve_fields(fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict_harvest_failure(request: PredictionRequest):
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_unset=True)
+async def predict_harvest_failure(
+    request: PredictionRequest,
+    http_request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    view: Optional[str] = None
+):
     """
     Memprediksi kemungkinan gagal panen untuk suatu wilayah.
     
     Args:
         request: PredictionRequest dengan region, start_date (opsional), dan use_csv
+        fields: Field opsional dipisah koma (reasons, mitigation_recommendations, weather_forecast, web_summary,
+            horizon_risks, feature_contributions)
+        view: 'compact' (hanya probabilitas & tingkat risiko) atau 'full' (default)
     
     Returns:
-        PredictionResponse dengan hasil prediksi
+        PredictionResponse dengan hasil prediksi (field yang tidak diminta tidak dihitung).
+        Jalur CSV memberi ETag dari versi model + data + parameter; If-None-Match yang cocok
+        dijawab 304 tanpa menjalankan inferensi.
     """
     try:
+        selected = _requested_fields(fields, view)
+
         # Validasi planting_month jika diberikan
         if request.planting_month is not None:
             if not (1 <= request.planting_month <= 12):
@@ -75,11 +271,24 @@ async def predict_harvest_failure(request: PredictionRequest):
                     detail="planting_month harus antara 1-12"
                 )
         
-        result = pred_module.predict_harvest_failure(
+        # Data Supabase bisa berubah kapan saja tanpa versi -> hanya jalur CSV yang diberi ETag
+        cache_headers = None
+        if request.use_csv:
+            # Thread default, bukan executor inferensi: revalidasi 304 tidak antre di belakang inferensi
+            etag, last_modified = await asyncio.to_thread(_predict_validators, request, selected)
+            cache_headers = _cache_headers(etag, last_modified, config.PREDICT_CACHE_MAX_AGE)
+            if not request.live and _is_not_modified(http_request, etag, last_modified):
+                return Response(status_code=304, headers=cache_headers)
+        
+        # Hasil batch malam (batch_predict.py) bila masih valid, selain itu inferensi live
+        result = await _run_inference(
+            pred_module.get_prediction,
             region_name=request.region,
             start_date=request.start_date,
             use_csv=request.use_csv,
-            planting_month=request.planting_month
+            planting_month=request.planting_month,
+            allow_precomputed=not request.live,
+            fields=selected
         )
         
         # Jika ada error dalam result
@@ -87,11 +296,16 @@ async def predict_harvest_failure(request: PredictionRequest):
             raise HTTPException(status_code=404, detail=result['error'])
         
         # Pastikan web_summary ada di result
-        if 'web_summary' not in result:
+        if 'web_summary' in selected and 'web_summary' not in result:
             result['web_summary'] = {}
         
+        if cache_headers:
+            response.headers.update(cache_headers)
         return PredictionResponse(**result)
     
+    except HTTPException:
+        # 400/404 di atas jangan diubah menjadi 500 oleh handler umum di bawah
+        raise
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=503,
@@ -103,20 +317,68 @@ async def predict_harvest_failure(request: PredictionRequest):
             detail=f"Error saat melakukan prediksi: {str(e)}"
         )
 
+@app.get("/predict", response_model=PredictionResponse, response_model_exclude_unset=True)
+async def predict_harvest_failure_get(
+    http_request: Request,
+    response: Response,
+    region: str,
+    planting_month: Optional[int] = None,
+    use_csv: bool = True,
+    start_date: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None
+):
+    """Varian GET dari /predict (parameter di query) agar bisa di-cache browser/proxy."""
+    request = PredictionRequest(region=region, planting_month=planting_month, use_csv=use_csv, start_date=start_date)
+    return await predict_harvest_failure(request, http_request, response, fields=fields, view=view)
+
+@app.post("/predict/scenarios", response_model=ScenarioResponse)
+async def predict_scenarios(request: ScenarioRequest):
+    """
+    Risiko dan forecast untuk ke-12 bulan tanam suatu wilayah dalam satu request.
+    Data, output model, dan klimatologi dipakai bersama oleh semua bulan.
+    """
+    try:
+        result = await _run_inference(
+            pred_module.get_scenarios,
+            region_name=request.region,
+            start_date=request.start_date,
+            use_csv=request.use_csv,
+            allow_precomputed=not request.live
+        )
+        if 'error' in result:
+            raise HTTPException(status_code=404, detail=result['error'])
+        return ScenarioResponse(**result)
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model tidak ditemukan. Pastikan model sudah dilatih terlebih dahulu. Error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error saat membuat skenario bulan tanam: {str(e)}"
+        )
+
 @app.post("/predict/batch")
-async def predict_batch(regions: list[str], use_csv: bool = True):
+async def predict_batch(regions: list[str], use_csv: bool = True, fields: Optional[str] = None, view: Optional[str] = None):
     """
     Memprediksi untuk beberapa wilayah sekaligus.
     
     Args:
         regions: List nama kabupaten/kota
         use_csv: Jika True, gunakan data CSV lokal
+        fields, view: Pemilih field seperti pada /predict
     
     Returns:
         List hasil prediksi untuk setiap wilayah
     """
+    selected = _requested_fields(fields, view)
     try:
-        results = pred_module.predict_batch(regions, use_csv=use_csv)
+        results = await _run_inference(pred_module.predict_batch, regions, use_csv=use_csv, fields=selected)
         return {
             "results": results,
             "total": len(results)
@@ -127,31 +389,106 @@ async def predict_batch(regions: list[str], use_csv: bool = True):
             detail=f"Error saat melakukan batch prediction: {str(e)}"
         )
 
+async def _stream_predictions(regions: list, use_csv: bool, planting_month: Optional[int], max_in_flight: int,
+                              fields: frozenset = None):
+    """
+    Menghasilkan (indeks, hasil) per wilayah begitu selesai. Paling banyak max_in_flight wilayah
+    dikirim ke executor sekaligus; wilayah berikutnya baru dijadwalkan setelah ada yang selesai,
+    sehingga memori server terbatas berapa pun panjang daftar wilayah.
+    """
+    pending = {}
+    queue = iter(enumerate(regions))
+
+    def schedule():
+        for index, region in queue:
+            task = asyncio.ensure_future(_run_inference(
+                pred_module.predict_one, region, use_csv=use_csv, planting_month=planting_month, fields=fields
+            ))
+            pending[task] = index
+            if len(pending) >= max_in_flight:
+                return
+
+    try:
+        schedule()
+        while pending:
+            done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield pending.pop(task), task.result()
+            schedule()
+    finally:
+        # Klien memutus koneksi: wilayah yang belum mulai tidak dijalankan
+        for task in pending:
+            task.cancel()
+
+def _encode_stream_item(payload: dict, fmt: str, event: str = "result") -> str:
+    data = json.dumps(jsonable_encoder(payload), ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+@app.post("/predict/batch/stream")
+async def predict_batch_stream(
+    regions: list[str],
+    use_csv: bool = True,
+    planting_month: Optional[int] = None,
+    format: str = "ndjson",
+    max_in_flight: Optional[int] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None
+):
+    """
+    Varian streaming /predict/batch: hasil tiap wilayah dikirim segera setelah selesai
+    (urutan selesai, bukan urutan input; gunakan field 'index').
+    
+    Args:
+        regions: List nama kabupaten/kota
+        format: 'ndjson' (satu objek JSON per baris) atau 'sse' (Server-Sent Events)
+        max_in_flight: Batas wilayah yang diproses bersamaan (maks config.STREAM_MAX_IN_FLIGHT)
+        fields, view: Pemilih field seperti pada /predict
+    
+    Baris/event terakhir berisi {"done": true, "total": ..., "errors": ...}.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format harus 'ndjson' atau 'sse'")
+    if planting_month is not None and not (1 <= planting_month <= 12):
+        raise HTTPException(status_code=400, detail="planting_month harus antara 1-12")
+    limit = min(max_in_flight or config.STREAM_MAX_IN_FLIGHT, config.STREAM_MAX_IN_FLIGHT)
+    limit = max(1, limit)
+    selected = _requested_fields(fields, view)
+
+    async def body():
+        errors = 0
+        async for index, result in _stream_predictions(regions, use_csv, planting_month, limit, selected):
+            errors += 'error' in result
+            yield _encode_stream_item({"index": index, **result}, format)
+        yield _encode_stream_item({"done": True, "total": len(regions), "errors": errors}, format, event="done")
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    # X-Accel-Buffering: minta proxy (nginx) tidak menahan stream sampai selesai.
+    # Kompresi dilewati lewat _UNCOMPRESSED_ROUTES
+    return StreamingResponse(body(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/regions")
-async def get_available_regions():
+async def get_available_regions(request: Request):
     """
     Mendapatkan daftar wilayah dari data_kesimpulan_processed.csv.
+    ETag = versi file kesimpulan; If-None-Match / If-Modified-Since yang cocok dijawab 304.
     """
     try:
-        current_file = os.path.abspath(__file__)
-        base_dir = os.path.dirname(os.path.dirname(current_file))  # root ml/
-        csv_path = os.path.join(base_dir, "data", "data_kesimpulan_processed.csv")
+        csv_path = config.KESIMPULAN_PATH
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"File data tidak ditemukan: {csv_path}")
 
-        df = pd.read_csv(csv_path)
-        col = None
-        # Cari kolom kabupaten_kota
-        for c in df.columns:
-            if str(c).strip().lower() == "kabupaten_kota" or "kabupaten" in str(c).lower() or "kota" in str(c).lower():
-                col = c
-                break
-        if col is None:
-            raise ValueError("Kolom 'kabupaten_kota' tidak ditemukan pada CSV kesimpulan")
-
-        regions_series = df[col].astype(str).dropna()
-        regions = sorted(regions_series.unique().tolist(), key=lambda x: x.lower())
-        return {"regions": regions, "total": len(regions)}
+        version = clim.data_version(csv_path)
+        last_modified = _last_modified(csv_path)
+        headers = _cache_headers(_strong_etag("regions", version), last_modified, config.REGIONS_CACHE_MAX_AGE)
+        if _is_not_modified(request, headers["ETag"], last_modified):
+            return Response(status_code=304, headers=headers)
+
+        # Indeks wilayah di-cache per versi file: CSV hanya dibaca ulang jika file berubah
+        regions = region_index.get_index(csv_path).regions
+        return DefaultResponse({"regions": regions, "total": len(regions)}, headers=headers)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=f"File data tidak ditemukan: {str(e)}")
     except Exception as e:
@@ -159,6 +496,47 @@ async def get_available_regions():
         error_detail = f"Error saat mengambil daftar wilayah: {str(e)}\nTraceback: {traceback.format_exc()}"
         raise HTTPException(status_code=500, detail=error_detail)
 
+@app.get("/regions/search")
+async def search_regions(q: str, limit: int = 5):
+    """
+    Mencocokkan nama wilayah (exact / tanpa prefix Kab. / fuzzy n-gram) tanpa memuat data.
+    Untuk autocomplete dan validasi di frontend.
+    """
+    return region_index.get_index().lookup(q, limit=max(1, min(limit, 20)))
+
+class YearlyUpdateRequest(BaseModel):
+    region: str
+    year: int
+    features: dict  # kolom fitur data kesimpulan (nama kolom -> nilai)
+
+class WeatherUpdateRequest(BaseModel):
+    region: str
+    events: list  # [{"date": "YYYY-MM-DD", "kejadian": "Hujan Lebat, Angin Kencang"}, ...]
+
+async def _apply_update(fn, region: str, *args):
+    match = region_index.get_index().resolve(region)
+    if match is None:
+        raise HTTPException(status_code=404, detail=f"Wilayah tidak dikenal: {region}")
+    try:
+        return await _run_inference(fn, match[0], *args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Model tidak ditemukan: {str(e)}")
+
+@app.post("/updates/yearly")
+async def update_yearly(request: YearlyUpdateRequest):
+    """
+    Agregat tahunan baru untuk satu wilayah: jendela terbaru wilayah itu digeser satu tahun
+    (atau tahun terakhir dikoreksi) tanpa membangun ulang data. Hanya cache wilayah ini yang basi.
+    """
+    return await _apply_update(online_update.add_yearly_aggregate, request.region, request.year, request.features)
+
+@app.post("/updates/weather")
+async def update_weather(request: WeatherUpdateRequest):
+    """Kejadian cuaca ekstrem baru untuk satu wilayah -> klimatologi wilayah itu diperbarui di tempat."""
+    return await _apply_update(online_update.add_weather_events, request.region, request.events)
+
 # Serve static files
 static_dir = os.path.join(os.path.dirname(__file__), 'static')
 if os.path.exists(static_dir):
@@ -0,0 +1,60 @@
+"""
+Menjalankan API dengan beberapa worker uvicorn yang berbagi snapshot read-only.
+
+Langkah:
+  1. Snapshot (bobot model, jendela terbaru semua wilayah, klimatologi) dibangun di proses
+     terpisah yang memuat TensorFlow sekali lalu keluar (lihat src/serving_snapshot.py).
+  2. Worker dijalankan dengan ML_SERVING_SNAPSHOT=1: model dan data dibaca via np.load(mmap_mode='r')
+     sehingga halaman memori dibagi antarworker lewat page cache, dan worker tidak memuat
+     TensorFlow selama forward pass NumPy lolos verifikasi saat build.
+  3. Metrik hidup per proses; untuk --workers > 1 setiap worker menulis state metriknya ke satu
+     direktori (ML_METRICS_MULTIPROC_DIR) dan /metrics menggabungkan semuanya (lihat src/metrics.py).
+
+Usage (dari direktori ml/):
+    python api/serve.py --workers 4 --port 8001
+    python api/serve.py --workers 4 --skip-build   # pakai snapshot yang sudah ada
+"""
+import os
+import sys
+import glob
+import argparse
+import tempfile
+import subprocess
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(API_DIR), 'src')
+
+def main():
+    parser = argparse.ArgumentParser(description="API multi-worker dengan snapshot model/data bersama (mmap)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--snapshot-dir", default=None, help="Direktori snapshot (default: config.SERVING_SNAPSHOT_DIR)")
+    parser.add_argument("--skip-build", action="store_true", help="Jangan bangun ulang snapshot")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="Direktori state metrik antarworker (default: direktori sementara baru)")
+    parser.add_argument("--inference-workers", type=int, default=1,
+                        help="Thread inferensi per worker (paralelisme utama datang dari jumlah proses)")
+    args = parser.parse_args()
+
+    if args.snapshot_dir:
+        os.environ["ML_SERVING_SNAPSHOT_DIR"] = os.path.abspath(args.snapshot_dir)
+
+    if not args.skip_build:
+        # Proses terpisah: memori TensorFlow dilepas sebelum worker dijalankan
+        subprocess.run([sys.executable, os.path.join(SRC_DIR, "serving_snapshot.py"), "build"], check=True)
+
+    os.environ["ML_SERVING_SNAPSHOT"] = "1"
+    os.environ["ML_INFERENCE_WORKERS"] = str(args.inference_workers)
+    if args.workers > 1:
+        metrics_dir = args.metrics_dir or tempfile.mkdtemp(prefix="ml-metrics-")
+        # State dari run sebelumnya tidak ikut dijumlahkan (counter mulai dari nol seperti proses baru)
+        for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+            os.remove(path)
+        os.environ["ML_METRICS_MULTIPROC_DIR"] = os.path.abspath(metrics_dir)
+
+    import uvicorn
+    uvicorn.run("main:app", app_dir=API_DIR, host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
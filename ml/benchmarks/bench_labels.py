@@ -0,0 +1,117 @@
+"""
+Paritas & benchmark tahap label jalur pelatihan panen/cuaca (preprocess_features):
+pembersihan angka format lokal ("54 987,79") dan Z-score produktivitas per wilayah.
+
+Dibandingkan:
+  - apply_lambda : jalur lama, .apply(_clean_numeric_string) per sel + groupby.transform(lambda)
+  - vectorized   : clean_numeric_column (str.replace + to_numeric) + zscore_by_group
+                   (transform 'mean'/'std' bawaan groupby)
+
+Sebelum diukur, kedua jalur dicek menghasilkan angka, Z-score, dan label GagalPanen yang sama
+(termasuk sel rusak/kosong, nilai numerik di kolom string, dan wilayah dengan satu baris).
+
+Usage:
+    python ml/benchmarks/bench_labels.py
+    python ml/benchmarks/bench_labels.py --regions 50 500 5000 --rows 10 40 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "labels.json")
+
+sys.path.insert(0, SRC_DIR)
+import config
+import data_processing as dp
+
+def _local_format(values: np.ndarray) -> np.ndarray:
+    # 54987.79 -> "54 987,79" seperti file sample_data_panen.csv
+    return np.array([f"{v:,.2f}".replace(",", " ").replace(".", ",") for v in values], dtype=object)
+
+def make_harvest(n_regions: int, rows_per_region: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = n_regions * rows_per_region
+    productivity = _local_format(rng.normal(55.0, 6.0, n))
+    area = _local_format(rng.uniform(1_000, 90_000, n))
+    # Kasus tepi: sel rusak, kosong, dan angka yang sudah numerik di kolom teks
+    bad = rng.choice(n, size=max(1, n // 200), replace=False)
+    productivity[bad[0::3]] = "n/a"
+    productivity[bad[1::3]] = np.nan
+    productivity[bad[2::3]] = 50.5
+    df = pd.DataFrame({
+        "Wilayah": np.repeat([f"Wilayah {i:05d}" for i in range(n_regions)], rows_per_region),
+        "Produktivitas": productivity,
+        "LuasPanen": area,
+    })
+    # Satu wilayah dengan satu baris (std = 0 -> Z-score NaN)
+    single = pd.DataFrame({"Wilayah": ["Wilayah Tunggal"], "Produktivitas": ["51,00"], "LuasPanen": ["1 000,00"]})
+    return pd.concat([df, single], ignore_index=True)
+
+def apply_lambda(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in ["Produktivitas", "LuasPanen"]:
+        df[col] = df[col].apply(dp._clean_numeric_string)
+    df = df.dropna(subset=["Produktivitas", "LuasPanen"])
+    df['z_score'] = df.groupby('Wilayah')['Produktivitas'].transform(lambda x: (x - x.mean()) / x.std(ddof=0))
+    df['GagalPanen'] = (df['z_score'] < config.Z_SCORE_THRESHOLD).astype(int)
+    return df
+
+def vectorized(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in ["Produktivitas", "LuasPanen"]:
+        df[col] = dp.clean_numeric_column(df[col])
+    df = df.dropna(subset=["Produktivitas", "LuasPanen"])
+    df['z_score'] = dp.zscore_by_group(df['Produktivitas'], df['Wilayah'])
+    df['GagalPanen'] = (df['z_score'] < config.Z_SCORE_THRESHOLD).astype(int)
+    return df
+
+def check_parity(df: pd.DataFrame):
+    ref, new = apply_lambda(df), vectorized(df)
+    assert ref.index.equals(new.index), "baris yang tersisa setelah dropna berbeda"
+    for col in ["Produktivitas", "LuasPanen", "z_score"]:
+        a, b = ref[col].to_numpy(dtype=float), new[col].to_numpy(dtype=float)
+        assert np.allclose(a, b, rtol=1e-9, atol=1e-9, equal_nan=True), f"kolom {col} berbeda"
+    assert ref['GagalPanen'].equals(new['GagalPanen']), "label GagalPanen berbeda"
+
+def _time(fn, df, repeat: int) -> float:
+    lat = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        lat.append(time.perf_counter() - start)
+    return float(np.median(lat)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Paritas & benchmark pembersihan angka + Z-score per wilayah")
+    parser.add_argument("--regions", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 40], help="Baris panen per wilayah")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'wilayah':>8}{'baris':>10}{'apply (ms)':>14}{'vektor (ms)':>14}{'speedup':>10}")
+    for n_regions in args.regions:
+        for rows in args.rows:
+            df = make_harvest(n_regions, rows)
+            check_parity(df)
+            old_ms = _time(apply_lambda, df, args.repeat)
+            new_ms = _time(vectorized, df, args.repeat)
+            results.append({"regions": n_regions, "rows": len(df), "apply_lambda_ms": round(old_ms, 3),
+                            "vectorized_ms": round(new_ms, 3), "speedup": round(old_ms / new_ms, 2)})
+            print(f"{n_regions:>8}{len(df):>10}{old_ms:>14.1f}{new_ms:>14.1f}{old_ms / new_ms:>9.1f}x")
+    print("Paritas OK untuk semua ukuran")
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w") as f:
+        json.dump({"params": vars(args), "results": results}, f, indent=2)
+    print(f"Hasil disimpan ke {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark pembentukan jendela sekuens tahunan per wilayah (load_kesimpulan_sequences /
+build_kesimpulan_windows) pada data sintetis besar (default 600 wilayah x 25 tahun).
+
+Dibandingkan:
+  - per_region : jalur lama, groupby -> sort_values('Tahun') -> reset_index -> .values ->
+                 windowing per wilayah lalu concatenate
+  - vectorized : satu sort global + batas blok np.unique + satu gather (gather_windows, serial)
+  - threaded   : sama, gather dibagi ke beberapa thread NumPy (--workers)
+
+Ketiganya diverifikasi menghasilkan jendela & label identik sebelum diukur.
+
+Usage:
+    python ml/benchmarks/bench_sequences.py
+    python ml/benchmarks/bench_sequences.py --regions 2000 --years 30 --workers 4 --repeat 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "sequences.json")
+
+sys.path.insert(0, SRC_DIR)
+import data_processing as dp
+
+def make_frame(n_regions: int, n_years: int, n_features: int = 18, seed: int = 42) -> pd.DataFrame:
+    """Data tahunan teragregasi sintetis, baris diacak seperti CSV yang tidak terurut."""
+    rng = np.random.default_rng(seed)
+    regions = np.repeat([f"Wilayah {i:05d}" for i in range(n_regions)], n_years)
+    years = np.tile(np.arange(2000, 2000 + n_years), n_regions)
+    df = pd.DataFrame(rng.random((len(regions), n_features)).astype(np.float32),
+                      columns=[f"f{i}" for i in range(n_features)])
+    df.insert(0, 'Wilayah', regions)
+    df.insert(1, 'Tahun', years)
+    df['GagalPanen'] = rng.integers(0, 2, size=len(df))
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+def per_region(df: pd.DataFrame, features: list, seq_len: int):
+    X_parts, y_parts = [], []
+    for _, g in df.groupby('Wilayah'):
+        g = g.sort_values('Tahun').reset_index(drop=True)
+        X_g = g[features].values
+        y_g = g['GagalPanen'].values
+        if len(X_g) <= seq_len:
+            continue
+        X_parts.append(dp._sliding_windows(X_g, seq_len))
+        y_parts.append(y_g[:len(X_g) - seq_len + 1])
+    return np.ascontiguousarray(np.concatenate(X_parts)), np.concatenate(y_parts)
+
+def vectorized(df: pd.DataFrame, features: list, seq_len: int, workers: int = 1):
+    df = df.sort_values(['Wilayah', 'Tahun']).reset_index(drop=True)
+    starts = dp._region_window_starts(df['Wilayah'].to_numpy(), seq_len)
+    X = dp.gather_windows(df[features].to_numpy(), starts, seq_len, workers=workers)
+    return X, df['GagalPanen'].to_numpy()[starts]
+
+def _time(fn, repeat: int) -> dict:
+    fn()  # pemanasan
+    lat = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - start)
+    lat = np.asarray(lat) * 1000
+    return {"p50_ms": round(float(np.percentile(lat, 50)), 3), "min_ms": round(float(lat.min()), 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pembentukan jendela sekuens per wilayah")
+    parser.add_argument("--regions", type=int, default=600)
+    parser.add_argument("--years", type=int, default=25)
+    parser.add_argument("--seq-len", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_frame(args.regions, args.years)
+    features = [c for c in df.columns if c.startswith('f')]
+
+    # Paritas dulu: semua varian harus menghasilkan jendela yang sama persis
+    X_ref, y_ref = per_region(df, features, args.seq_len)
+    for name, workers in (("vectorized", 1), ("threaded", args.workers)):
+        X, y = vectorized(df, features, args.seq_len, workers)
+        if not (np.array_equal(X, X_ref) and np.array_equal(y, y_ref)):
+            raise SystemExit(f"❌ Paritas gagal: {name} berbeda dari per_region")
+    print(f"Paritas OK: {len(X_ref)} jendela x {args.seq_len} tahun x {len(features)} fitur")
+
+    # Paksa jalur paralel walau di bawah ambang SEQUENCE_PARALLEL_MIN_WINDOWS
+    dp.config.SEQUENCE_PARALLEL_MIN_WINDOWS = 0
+    results = {
+        "per_region": _time(lambda: per_region(df, features, args.seq_len), args.repeat),
+        "vectorized": _time(lambda: vectorized(df, features, args.seq_len, 1), args.repeat),
+        f"threaded_{args.workers}": _time(lambda: vectorized(df, features, args.seq_len, args.workers), args.repeat),
+    }
+    base = results["per_region"]["p50_ms"]
+    print(f"{'varian':<14}{'p50 (ms)':>12}{'min (ms)':>12}{'speedup':>10}")
+    for name, r in results.items():
+        print(f"{name:<14}{r['p50_ms']:>12.1f}{r['min_ms']:>12.1f}{base / r['p50_ms']:>9.1f}x")
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w") as f:
+        json.dump({"params": vars(args), "n_windows": int(len(X_ref)), "cpu_count": os.cpu_count(),
+                   "results": results}, f, indent=2)
+    print(f"Hasil disimpan ke {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Load generator untuk /predict dan /predict/batch pada jalur Supabase (use_csv=False).
+
+Menjalankan stub Supabase lokal (supabase_stub.py) dengan latensi/error yang bisa disuntikkan,
+menyalakan api/main.py via uvicorn yang diarahkan ke stub, lalu menembakkan request dengan
+konkurensi tetap. Laporan per endpoint: throughput, latensi p50/p90/p99/max, error rate, dan
+wilayah yang gagal di dalam respons 200 /predict/batch.
+Gunakan --max-p99-ms / --max-error-rate sebagai gerbang sebelum deploy (exit code 1).
+
+Usage:
+    python ml/benchmarks/load_test.py --concurrency 8 --duration 60 --db-latency-ms 40
+    python ml/benchmarks/load_test.py --batch-ratio 0.2 --batch-size 16 --db-error-rate 0.02
+    python ml/benchmarks/load_test.py --target http://127.0.0.1:8001   # API yang sudah berjalan
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlparse
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(os.path.dirname(BENCH_DIR), "api")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "load_test.json")
+
+sys.path.insert(0, BENCH_DIR)
+import supabase_stub
+
+def start_api(port: int, stub_url: str, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, SUPABASE_URL=stub_url, SUPABASE_KEY=supabase_stub.STUB_KEY,
+               ML_INFERENCE_WORKERS=str(workers))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=env
+    )
+
+def wait_ready(base_url: str, timeout: float = 180.0):
+    """Menunggu /health menjawab (model dimuat saat startup, bisa butuh waktu)."""
+    parsed = urlparse(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=5)
+            conn.request("GET", "/health")
+            resp = conn.getresponse()
+            body = json.loads(resp.read() or b"{}")
+            conn.close()
+            if body.get("status") == "healthy":
+                return
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"API di {base_url} tidak siap dalam {timeout:.0f} detik")
+
+class Worker(threading.Thread):
+    """Satu koneksi keep-alive yang mengirim request secara berurutan."""
+
+    def __init__(self, base_url: str, plan, stop_at: float, results: list, lock: threading.Lock):
+        super().__init__(daemon=True)
+        parsed = urlparse(base_url)
+        self.host, self.port = parsed.hostname, parsed.port
+        self.plan = plan
+        self.stop_at = stop_at
+        self.results = results
+        self.lock = lock
+
+    def _connect(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=120)
+
+    def run(self):
+        conn = self._connect()
+        local = []
+        while time.time() < self.stop_at:
+            item = self.plan()
+            if item is None:
+                break
+            endpoint, path, payload = item
+            body = json.dumps(payload).encode("utf-8")
+            start = time.perf_counter()
+            item_errors = 0
+            try:
+                conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                raw = resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                conn.close()
+                conn = self._connect()
+            latency = time.perf_counter() - start
+            if endpoint == "/predict/batch" and status == 200:
+                item_errors = count_item_errors(raw)
+            local.append((endpoint, status, latency, item_errors, len(payload) if isinstance(payload, list) else 1))
+        conn.close()
+        with self.lock:
+            self.results.extend(local)
+
+def make_plan(regions: list, total: int, batch_ratio: float, batch_size: int, seed: int):
+    """Pembangkit request (endpoint, path, payload); None jika kuota `total` habis."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    issued = [0]
+
+    def next_item():
+        with lock:
+            if total and issued[0] >= total:
+                return None
+            issued[0] += 1
+            is_batch = rng.random() < batch_ratio
+            if is_batch:
+                return "/predict/batch", "/predict/batch?use_csv=false", rng.sample(regions, min(batch_size, len(regions)))
+            return "/predict", "/predict", {"region": rng.choice(regions), "use_csv": False, "planting_month": rng.randint(1, 12)}
+    return next_item
+
+def count_item_errors(raw: bytes) -> int:
+    """Jumlah wilayah {'error': ...} di respons 200 /predict/batch (gagal per wilayah, bukan per request)."""
+    try:
+        results = json.loads(raw).get("results", [])
+    except (ValueError, AttributeError):
+        return 0
+    return sum(1 for r in results if isinstance(r, dict) and "error" in r)
+
+def summarize(results: list, elapsed: float) -> dict:
+    report = {}
+    for endpoint in sorted({r[0] for r in results}):
+        rows = [r for r in results if r[0] == endpoint]
+        lat = np.asarray([r[2] for r in rows]) * 1000
+        statuses = Counter(str(r[1]) for r in rows)
+        errors = sum(n for s, n in statuses.items() if not s.startswith("2"))
+        item_errors = sum(r[3] for r in rows)
+        items = sum(r[4] for r in rows)
+        report[endpoint] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / elapsed, 3) if elapsed > 0 else None,
+            "p50_ms": round(float(np.percentile(lat, 50)), 3),
+            "p90_ms": round(float(np.percentile(lat, 90)), 3),
+            "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            "max_ms": round(float(lat.max()), 3),
+            "error_rate": round(errors / len(rows), 4),
+            "statuses": dict(statuses),
+            # Hanya /predict/batch: wilayah yang gagal di dalam respons 200
+            "item_errors": item_errors,
+            "item_error_rate": round(item_errors / items, 4) if items else 0.0,
+        }
+    return report
+
+def print_report(report: dict, elapsed: float, stub_cfg):
+    header = f"{'endpoint':<16}{'req':>8}{'req/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'error':>8}"
+    print("\n" + header)
+    print("-" * len(header))
+    for endpoint, r in report.items():
+        print(f"{endpoint:<16}{r['requests']:>8}{r['throughput_rps']:>9.2f}{r['p50_ms']:>10.1f}{r['p90_ms']:>10.1f}"
+              f"{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}{r['error_rate']:>8.1%}")
+        print(f"{'':<16}status: {r['statuses']}" + (f", wilayah error: {r['item_errors']}" if r['item_errors'] else ""))
+    print(f"\nDurasi {elapsed:.1f} detik", end="")
+    if stub_cfg is not None:
+        print(f"; stub Supabase: {stub_cfg.requests} request, {stub_cfg.errors} error disuntikkan", end="")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /predict dan /predict/batch (jalur Supabase)")
+    parser.add_argument("--target", default=None, help="URL API yang sudah berjalan (default: jalankan API sendiri)")
+    parser.add_argument("--api-port", type=int, default=8011)
+    parser.add_argument("--api-workers", type=int, default=2, help="ML_INFERENCE_WORKERS untuk API yang dijalankan")
+    parser.add_argument("--stub-port", type=int, default=54321)
+    parser.add_argument("--data-dir", default=None, help="Data stub (default: ml/data; bisa data sintetis)")
+    parser.add_argument("--db-latency-ms", type=float, default=20.0, help="Latensi stub Supabase per query")
+    parser.add_argument("--db-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--db-error-rate", type=float, default=0.0, help="Fraksi query stub yang dibalas 503")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="Durasi uji (detik)")
+    parser.add_argument("--requests", type=int, default=0, help="Batas total request (0 = sampai durasi habis)")
+    parser.add_argument("--warmup", type=int, default=5, help="Request pemanasan yang tidak dihitung")
+    parser.add_argument("--batch-ratio", type=float, default=0.1, help="Fraksi request ke /predict/batch")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Gagal jika p99 /predict melebihi nilai ini")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Gagal jika error rate endpoint mana pun melebihi nilai ini")
+    args = parser.parse_args()
+
+    stub_server, stub_cfg, api_proc = None, None, None
+    tables = supabase_stub.load_tables(args.data_dir)
+    regions = sorted(r for r in tables["harvest_data"]["by_region"] if r and r != "None")
+
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            stub_cfg = supabase_stub.StubConfig(args.db_latency_ms, args.db_jitter_ms, args.db_error_rate, seed=args.seed)
+            stub_server, _ = supabase_stub.serve(args.stub_port, args.data_dir, stub_cfg)
+            print(f"Stub Supabase di http://127.0.0.1:{args.stub_port} ({args.db_latency_ms}±{args.db_jitter_ms} ms, error {args.db_error_rate:.1%})")
+            api_proc = start_api(args.api_port, f"http://127.0.0.1:{args.stub_port}", args.api_workers)
+            base_url = f"http://127.0.0.1:{args.api_port}"
+        print(f"Menunggu API di {base_url}...")
+        wait_ready(base_url)
+
+        lock = threading.Lock()
+        if args.warmup:
+            warm = make_plan(regions, args.warmup, 0.0, args.batch_size, args.seed + 1)
+            Worker(base_url, warm, time.time() + 300, [], lock).run()
+        if stub_cfg is not None:
+            stub_cfg.requests = stub_cfg.errors = 0
+
+        print(f"Load test: {args.concurrency} koneksi, {args.duration:.0f} detik, {len(regions)} wilayah...")
+        results = []
+        plan = make_plan(regions, args.requests, args.batch_ratio, args.batch_size, args.seed)
+        start = time.time()
+        workers = [Worker(base_url, plan, start + args.duration, results, lock) for _ in range(args.concurrency)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.time() - start
+    finally:
+        if api_proc is not None:
+            api_proc.terminate()
+            api_proc.wait(timeout=30)
+        if stub_server is not None:
+            stub_server.shutdown()
+
+    report = summarize(results, elapsed)
+    print_report(report, elapsed, stub_cfg)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "params": vars(args),
+            "elapsed_s": round(elapsed, 3),
+            "stub": {"requests": stub_cfg.requests, "errors": stub_cfg.errors} if stub_cfg else None,
+            "endpoints": report,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"Hasil disimpan ke {args.output}")
+
+    failures = []
+    if args.max_p99_ms is not None and "/predict" in report and report["/predict"]["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 /predict {report['/predict']['p99_ms']:.1f} ms > {args.max_p99_ms:.1f} ms")
+    if args.max_error_rate is not None:
+        failures += [f"error rate {ep} {r['error_rate']:.1%} > {args.max_error_rate:.1%}"
+                     for ep, r in report.items() if r["error_rate"] > args.max_error_rate]
+        failures += [f"error wilayah {ep} {r['item_error_rate']:.1%} > {args.max_error_rate:.1%}"
+                     for ep, r in report.items() if r["item_error_rate"] > args.max_error_rate]
+    if failures:
+        print("\n⚠️  Gerbang gagal:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
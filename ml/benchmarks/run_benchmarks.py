@@ -0,0 +1,316 @@
+"""
+Benchmark end-to-end pipeline prediksi pada data sintetis 10x/100x/1000x.
+
+Setiap kasus dijalankan di proses terpisah (spawn) agar peak RSS yang dilaporkan milik kasus
+itu sendiri dan cache in-process (model, klimatologi, profil cuaca) tidak bocor antar kasus.
+Untuk setiap kasus dilaporkan: latensi panggilan pertama (cold), p50/p99, throughput
+(item/detik), dan peak RSS; hasilnya dibandingkan dengan baseline JSON.
+
+Usage:
+    python ml/benchmarks/run_benchmarks.py                       # skala 10x dan 100x
+    python ml/benchmarks/run_benchmarks.py --scales 10 100 1000 --repeat 20
+    python ml/benchmarks/run_benchmarks.py --cases predict_harvest_failure api_predict
+    python ml/benchmarks/run_benchmarks.py --save-baseline       # simpan hasil sebagai baseline
+    python ml/benchmarks/run_benchmarks.py --fail-on-regression  # exit 1 jika ada regresi
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import traceback
+import multiprocessing as mp
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ML_DIR = os.path.dirname(BENCH_DIR)
+SRC_DIR = os.path.join(ML_DIR, "src")
+SCRIPTS_DIR = os.path.join(ML_DIR, "scripts")
+API_DIR = os.path.join(ML_DIR, "api")
+
+DATA_ROOT = os.path.join(BENCH_DIR, ".data")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "latest.json")
+
+# Ukuran batch untuk kasus predict_batch / api_predict_batch
+BATCH_REGIONS = 16
+
+sys.path.insert(0, BENCH_DIR)
+import synthetic
+
+# ---------------------------------------------------------------------------
+# Kasus benchmark. Setiap factory menerima data_dir sintetis dan mengembalikan
+# (fn, items_per_call); fn(i) dipanggil berulang dengan indeks iterasi i.
+# Import modul ml/src dilakukan di dalam factory (di proses anak) setelah config
+# diarahkan ke data sintetis.
+# ---------------------------------------------------------------------------
+
+def _case_load_kesimpulan_sequences(data_dir):
+    import data_processing as dp
+    import config
+
+    def fn(i):
+        dataset, _, _ = dp.load_kesimpulan_sequences(kesimpulan_path=config.KESIMPULAN_PATH, is_training=True)
+        return dataset
+    return fn, len(synthetic.regions(data_dir))
+
+def _case_preprocess_features(data_dir):
+    import pandas as pd
+    import data_processing as dp
+
+    df_harvest = pd.read_csv(os.path.join(data_dir, synthetic.HARVEST), sep=";")
+    df_weather = pd.read_csv(os.path.join(data_dir, synthetic.WEATHER), sep=";")
+
+    def fn(i):
+        # preprocess_features me-rename/menambah kolom -> beri salinan baru setiap iterasi
+        dataset, _, _ = dp.preprocess_features(df_harvest.copy(), df_weather.copy(), is_training=True)
+        return dataset
+    return fn, len(df_harvest)
+
+def _case_prepare_kesimpulan_process(data_dir):
+    import prepare_kesimpulan_dataset as prep
+
+    prep.RAW_CSV = os.path.join(data_dir, synthetic.RAW_KESIMPULAN)
+
+    def fn(i):
+        return prep.process()
+    return fn, len(synthetic.regions(data_dir))
+
+def _case_predict_harvest_failure(data_dir):
+    import predict
+
+    names = synthetic.regions(data_dir)
+
+    def fn(i):
+        result = predict.predict_harvest_failure(names[i % len(names)], use_csv=True, planting_month=(i % 12) + 1)
+        if 'error' in result:
+            raise RuntimeError(result['error'])
+        return result
+    return fn, 1
+
+def _case_predict_batch(data_dir):
+    import predict
+
+    names = synthetic.regions(data_dir)
+
+    def fn(i):
+        start = (i * BATCH_REGIONS) % len(names)
+        batch = (names[start:] + names[:start])[:BATCH_REGIONS]
+        return predict.predict_batch(batch, use_csv=True)
+    return fn, BATCH_REGIONS
+
+def _api_client():
+    from fastapi.testclient import TestClient
+    sys.path.insert(0, API_DIR)
+    import main
+    client = TestClient(main.app)
+    client.__enter__()  # jalankan event startup (warm registry model)
+    return client
+
+def _case_api_health(data_dir):
+    client = _api_client()
+    return (lambda i: client.get("/health").raise_for_status()), 1
+
+def _case_api_regions(data_dir):
+    client = _api_client()
+    return (lambda i: client.get("/regions").raise_for_status()), 1
+
+def _case_api_predict(data_dir):
+    client = _api_client()
+    names = synthetic.regions(data_dir)
+
+    def fn(i):
+        payload = {"region": names[i % len(names)], "use_csv": True, "planting_month": (i % 12) + 1}
+        return client.post("/predict", json=payload).raise_for_status()
+    return fn, 1
+
+def _case_api_predict_batch(data_dir):
+    client = _api_client()
+    names = synthetic.regions(data_dir)
+
+    def fn(i):
+        start = (i * BATCH_REGIONS) % len(names)
+        batch = (names[start:] + names[:start])[:BATCH_REGIONS]
+        return client.post("/predict/batch", json=batch).raise_for_status()
+    return fn, BATCH_REGIONS
+
+CASES = {
+    "load_kesimpulan_sequences": _case_load_kesimpulan_sequences,
+    "preprocess_features": _case_preprocess_features,
+    "prepare_kesimpulan_process": _case_prepare_kesimpulan_process,
+    "predict_harvest_failure": _case_predict_harvest_failure,
+    "predict_batch": _case_predict_batch,
+    "api_health": _case_api_health,
+    "api_regions": _case_api_regions,
+    "api_predict": _case_api_predict,
+    "api_predict_batch": _case_api_predict_batch,
+}
+
+# ---------------------------------------------------------------------------
+# Eksekusi di proses anak
+# ---------------------------------------------------------------------------
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS melaporkan byte
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def _point_config_to(data_dir: str):
+    sys.path[:0] = [SRC_DIR, SCRIPTS_DIR]
+    import config
+    config.KESIMPULAN_PATH = os.path.join(data_dir, synthetic.KESIMPULAN)
+    config.WEATHER_CSV_PATH = os.path.join(data_dir, synthetic.WEATHER)
+    config.CLIMATOLOGY_PATH = os.path.join(data_dir, "weather_climatology.json")
+
+def _run_case(case: str, data_dir: str, repeat: int) -> dict:
+    """Dijalankan di proses anak: setup, 1 panggilan cold, lalu `repeat` panggilan terukur."""
+    try:
+        _point_config_to(data_dir)
+        fn, items = CASES[case](data_dir)
+
+        start = time.perf_counter()
+        fn(0)
+        cold = time.perf_counter() - start
+
+        latencies = []
+        for i in range(1, repeat + 1):
+            start = time.perf_counter()
+            fn(i)
+            latencies.append(time.perf_counter() - start)
+        lat = np.asarray(latencies)
+        return {
+            "status": "ok",
+            "n": len(lat),
+            "items_per_call": items,
+            "cold_ms": round(cold * 1000, 3),
+            "p50_ms": round(float(np.percentile(lat, 50)) * 1000, 3),
+            "p99_ms": round(float(np.percentile(lat, 99)) * 1000, 3),
+            "mean_ms": round(float(lat.mean()) * 1000, 3),
+            "throughput_per_s": round(items * len(lat) / float(lat.sum()), 3) if lat.sum() > 0 else None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(limit=5),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+
+def run_case_isolated(case: str, data_dir: str, repeat: int) -> dict:
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(processes=1) as pool:
+        return pool.apply(_run_case, (case, data_dir, repeat))
+
+# ---------------------------------------------------------------------------
+# Laporan & baseline
+# ---------------------------------------------------------------------------
+
+def _key(case: str, scale: int) -> str:
+    return f"{case}@{scale}x"
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Daftar (key, metrik, nilai, baseline, perubahan) yang memburuk melebihi tolerance."""
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base or cur.get("status") != "ok" or base.get("status") != "ok":
+            continue
+        # Latensi & memori: lebih besar lebih buruk; throughput: lebih kecil lebih buruk
+        for metric, higher_is_worse in (("p50_ms", True), ("p99_ms", True), ("peak_rss_mb", True), ("throughput_per_s", False)):
+            b, c = base.get(metric), cur.get(metric)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append((key, metric, c, b, change))
+    return regressions
+
+def _delta(cur: dict, base: dict, metric: str) -> str:
+    if not base or base.get("status") != "ok" or cur.get("status") != "ok" or not base.get(metric):
+        return ""
+    return f"{(cur[metric] - base[metric]) / base[metric] * 100:+.0f}%"
+
+def print_report(results: dict, baseline: dict):
+    header = f"{'kasus':<34}{'cold ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'item/s':>11}{'RSS MB':>9}{'Δp50':>7}{'Δp99':>7}"
+    print("\n" + header)
+    print("-" * len(header))
+    for key, r in results.items():
+        if r["status"] != "ok":
+            print(f"{key:<34}  ERROR: {r['error']}")
+            continue
+        base = baseline.get(key)
+        print(f"{key:<34}{r['cold_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{(r['throughput_per_s'] or 0):>11.1f}{r['peak_rss_mb']:>9.1f}"
+              f"{_delta(r, base, 'p50_ms'):>7}{_delta(r, base, 'p99_ms'):>7}")
+
+def _load_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_json(payload: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline prediksi gagal panen")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100], help="Faktor skala data (default: 10 100)")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES), help="Kasus yang dijalankan")
+    parser.add_argument("--repeat", type=int, default=10, help="Jumlah panggilan terukur per kasus (setelah 1 panggilan cold)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Path baseline JSON")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Path hasil JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="Simpan hasil run ini sebagai baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Toleransi regresi relatif (default: 0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit code 1 jika ada regresi melebihi toleransi")
+    args = parser.parse_args()
+
+    baseline_payload = _load_json(args.baseline)
+    baseline = baseline_payload.get("results", {})
+
+    results = {}
+    for scale in args.scales:
+        data_dir = os.path.join(DATA_ROOT, f"{scale}x")
+        print(f"[{scale}x] Menyiapkan data sintetis di {data_dir}...")
+        synthetic.generate(scale, data_dir)
+        for case in args.cases:
+            print(f"[{scale}x] {case}...")
+            results[_key(case, scale)] = run_case_isolated(case, data_dir, args.repeat)
+
+    payload = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "repeat": args.repeat,
+        "results": results,
+    }
+    _write_json(payload, args.output)
+    print_report(results, baseline)
+    print(f"\nHasil disimpan ke {args.output}")
+
+    if args.save_baseline:
+        _write_json(payload, args.baseline)
+        print(f"Baseline diperbarui: {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"Baseline belum ada ({args.baseline}); jalankan dengan --save-baseline untuk membuatnya.")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} regresi melebihi {args.tolerance:.0%}:")
+        for key, metric, cur, base, change in regressions:
+            print(f"  {key} {metric}: {base} -> {cur} ({change:+.0%})")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print(f"\n✅ Tidak ada regresi melebihi {args.tolerance:.0%} dibanding baseline.")
+
+if __name__ == "__main__":
+    main()
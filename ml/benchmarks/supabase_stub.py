@@ -0,0 +1,184 @@
+"""
+Stub lokal untuk REST API Supabase (PostgREST) yang dipakai data_processing.load_prediction_data.
+
+Melayani GET /rest/v1/harvest_data dan /rest/v1/weather_events dari CSV contoh (atau data
+sintetis dari synthetic.py) dengan filter PostgREST: eq, neq, gt, gte, lt, lte, in, serta
+select dan limit. Latensi dan error dapat disuntikkan untuk mensimulasikan database lambat
+atau tidak stabil.
+
+Nama wilayah di weather_events disamakan dengan harvest_data (tanpa prefix "Kab."/"Kota")
+agar filter eq("Kabupaten/Kota", region) di kedua tabel mengenai wilayah yang sama.
+
+Usage:
+    python ml/benchmarks/supabase_stub.py --port 54321 --latency-ms 40 --jitter-ms 20 --error-rate 0.01
+    # lalu: SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=stub.anon.key
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qsl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path[:0] = [BENCH_DIR, SRC_DIR]
+import synthetic
+import data_processing as dp
+
+REGION_COLUMN = "Kabupaten/Kota"
+# Kunci berbentuk JWT agar lolos validasi format kunci di supabase-py
+STUB_KEY = "stub.anon.key"
+
+def load_tables(data_dir: str = None) -> dict:
+    """Tabel stub sebagai list record per kolom string, seperti JSON yang dikirim PostgREST."""
+    data_dir = data_dir or synthetic.DATA_DIR
+    harvest = pd.read_csv(os.path.join(data_dir, synthetic.HARVEST), sep=";", dtype=str)
+    weather = pd.read_csv(os.path.join(data_dir, synthetic.WEATHER), sep=";", dtype=str)
+    weather[REGION_COLUMN] = weather[REGION_COLUMN].map(dp.normalize_region_name)
+    if "Tahun" in harvest.columns:
+        harvest["Tahun"] = pd.to_numeric(harvest["Tahun"], errors="coerce").astype("Int64")
+    tables = {}
+    for name, df in (("harvest_data", harvest), ("weather_events", weather)):
+        records = json.loads(df.to_json(orient="records", force_ascii=False))
+        # Indeks per wilayah: filter eq pada kolom wilayah tidak perlu memindai seluruh tabel
+        by_region = {}
+        for rec in records:
+            by_region.setdefault(str(rec.get(REGION_COLUMN)), []).append(rec)
+        tables[name] = {"records": records, "by_region": by_region}
+    return tables
+
+def _coerce(a, b):
+    """Bandingkan angka sebagai angka, selain itu sebagai string (tanggal ISO terurut leksikal)."""
+    try:
+        return float(a), float(b)
+    except (TypeError, ValueError):
+        return str(a), str(b)
+
+def _match(value, op: str, arg: str) -> bool:
+    if value is None:
+        return False
+    if op == "eq":
+        return str(value) == arg
+    if op == "neq":
+        return str(value) != arg
+    if op == "in":
+        return str(value) in [v.strip().strip('"') for v in arg.strip("()").split(",")]
+    a, b = _coerce(value, arg)
+    return {"gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b}.get(op, False)
+
+def query(table: dict, params: list) -> list:
+    filters, select, limit = [], None, None
+    for key, value in params:
+        if key == "select":
+            select = None if value == "*" else [c.strip() for c in value.split(",")]
+        elif key == "limit":
+            limit = int(value)
+        elif key in ("order", "offset"):
+            continue
+        else:
+            op, _, arg = value.partition(".")
+            filters.append((key, op, arg))
+
+    rows = table["records"]
+    for key, op, arg in filters:
+        if key == REGION_COLUMN and op == "eq":
+            rows = table["by_region"].get(arg, [])
+            break
+    rows = [r for r in rows if all(_match(r.get(k), op, arg) for k, op, arg in filters)]
+    if limit is not None:
+        rows = rows[:limit]
+    if select:
+        rows = [{c: r.get(c) for c in select} for r in rows]
+    return rows
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def delay(self) -> float:
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+def make_handler(tables: dict, cfg: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Header dan body ditulis terpisah; tanpa ini Nagle + delayed ACK menambah ~40 ms per respons
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with cfg.lock:
+                cfg.requests += 1
+            parsed = urlparse(self.path)
+            parts = parsed.path.strip("/").split("/")
+            if len(parts) != 3 or parts[:2] != ["rest", "v1"] or parts[2] not in tables:
+                self._send(404, {"message": f"relation {parsed.path} does not exist"})
+                return
+
+            time.sleep(cfg.delay())
+            if cfg.should_fail():
+                with cfg.lock:
+                    cfg.errors += 1
+                self._send(503, {"message": "stub: injected failure"})
+                return
+
+            self._send(200, query(tables[parts[2]], parse_qsl(parsed.query, keep_blank_values=True)))
+
+        def log_message(self, fmt, *args):
+            pass  # tanpa log per request agar tidak mengganggu pengukuran
+
+    return Handler
+
+def serve(port: int = 54321, data_dir: str = None, cfg: StubConfig = None, host: str = "127.0.0.1"):
+    """Menjalankan stub di thread latar; mengembalikan (server, thread)."""
+    cfg = cfg or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(load_tables(data_dir), cfg))
+    server.daemon_threads = True
+    server.stub_config = cfg
+    thread = threading.Thread(target=server.serve_forever, name="supabase-stub", daemon=True)
+    thread.start()
+    return server, thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub REST Supabase untuk harvest_data/weather_events")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--data-dir", default=None, help="Direktori CSV (default: ml/data)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latensi tambahan per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Jitter latensi (+-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraksi request yang dibalas 503")
+    args = parser.parse_args()
+
+    cfg = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate)
+    server, thread = serve(args.port, args.data_dir, cfg)
+    print(f"✅ Stub Supabase di http://127.0.0.1:{args.port} (SUPABASE_KEY={STUB_KEY})")
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Generator data sintetis untuk benchmark: memperbanyak jumlah wilayah pada data contoh
+(data_kesimpulan.csv, data_kesimpulan_processed.csv, sample_data_cuaca.csv,
+sample_data_panen.csv) sebanyak `scale` kali dengan skema yang sama persis.
+
+Wilayah salinan ke-k diberi sufiks " 0001", " 0002", ... sehingga nama tetap konsisten lintas
+file (misal, "Kab. Bandung 0001" di data cuaca -> "Bandung 0001" setelah normalisasi), dan
+angka-angkanya diberi jitter acak (seed tetap) agar scaler/model tidak melihat salinan identik.
+
+Usage:
+    python ml/benchmarks/synthetic.py --scale 100 --out ml/benchmarks/.data/100x
+"""
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ML_DIR, "data")
+
+# Nama file keluaran mengikuti nama file asli di ml/data
+RAW_KESIMPULAN = "data_kesimpulan.csv"
+KESIMPULAN = "data_kesimpulan_processed.csv"
+WEATHER = "sample_data_cuaca.csv"
+HARVEST = "sample_data_panen.csv"
+FILES = (RAW_KESIMPULAN, KESIMPULAN, WEATHER, HARVEST)
+
+def _suffixes(scale: int) -> np.ndarray:
+    # Salinan 0 memakai nama asli agar wilayah contoh (misal, "Bandung") tetap ada
+    return np.array([""] + [f" {k:04d}" for k in range(1, scale)], dtype=object)
+
+def _replicate(df: pd.DataFrame, region_col: str, scale: int) -> pd.DataFrame:
+    """Mengulang df sebanyak scale kali; kolom wilayah diberi sufiks per salinan."""
+    out = pd.concat([df] * scale, ignore_index=True)
+    copy_idx = np.repeat(np.arange(scale), len(df))
+    out[region_col] = out[region_col].astype(str) + _suffixes(scale)[copy_idx]
+    return out
+
+def _jitter(values: pd.Series, rng: np.random.Generator, rel: float = 0.05) -> np.ndarray:
+    return values.to_numpy(dtype=float) * rng.normal(1.0, rel, size=len(values))
+
+def make_kesimpulan(scale: int, rng: np.random.Generator) -> pd.DataFrame:
+    df = pd.read_csv(os.path.join(DATA_DIR, KESIMPULAN))
+    out = _replicate(df, "kabupaten_kota", scale)
+    out["hasil_panen"] = _jitter(out["hasil_panen"], rng).round(2)
+    out["delta_ton"] = _jitter(out["delta_ton"], rng).round(2)
+    count_cols = [c for c in out.columns if c.startswith(("event_", "impact_")) or c.endswith("_total_event")]
+    for col in count_cols:
+        out[col] = rng.poisson(out[col].to_numpy(dtype=float))
+    return out
+
+def make_raw_kesimpulan(scale: int) -> pd.DataFrame:
+    # Teks info_cuaca dipertahankan apa adanya: biaya parsing regex yang diukur
+    df = pd.read_csv(os.path.join(DATA_DIR, RAW_KESIMPULAN), sep=";")
+    return _replicate(df, "kabupaten/kota", scale)
+
+def make_weather(scale: int, rng: np.random.Generator) -> pd.DataFrame:
+    df = pd.read_csv(os.path.join(DATA_DIR, WEATHER), sep=";")
+    out = _replicate(df, "Kabupaten/Kota", scale)
+    # Geser tanggal +-3 hari agar distribusi per bulan tidak identik antar salinan
+    dates = pd.to_datetime(out["Tanggal"], errors="coerce")
+    shift = pd.to_timedelta(rng.integers(-3, 4, size=len(out)), unit="D")
+    out["Tanggal"] = (dates + shift).dt.strftime("%Y-%m-%d")
+    return out
+
+def make_harvest(scale: int) -> pd.DataFrame:
+    # Kolom angka tetap string berformat lokal ("54 987,79") seperti file asli
+    df = pd.read_csv(os.path.join(DATA_DIR, HARVEST), sep=";", dtype=str)
+    return _replicate(df, "Kabupaten/Kota", scale)
+
+def generate(scale: int, out_dir: str, seed: int = 42) -> str:
+    """Menulis keempat file sintetis ke out_dir; file yang sudah ada tidak ditulis ulang."""
+    os.makedirs(out_dir, exist_ok=True)
+    if all(os.path.exists(os.path.join(out_dir, f)) for f in FILES):
+        return out_dir
+
+    rng = np.random.default_rng(seed)
+    make_raw_kesimpulan(scale).to_csv(os.path.join(out_dir, RAW_KESIMPULAN), sep=";", index=False)
+    make_kesimpulan(scale, rng).to_csv(os.path.join(out_dir, KESIMPULAN), index=False)
+    make_weather(scale, rng).to_csv(os.path.join(out_dir, WEATHER), sep=";", index=False)
+    make_harvest(scale).to_csv(os.path.join(out_dir, HARVEST), sep=";", index=False)
+    return out_dir
+
+def regions(data_dir: str) -> list:
+    """Daftar wilayah (nama kesimpulan) pada data sintetis, urut seperti di file."""
+    df = pd.read_csv(os.path.join(data_dir, KESIMPULAN), usecols=["kabupaten_kota"])
+    return df["kabupaten_kota"].drop_duplicates().tolist()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate data sintetis untuk benchmark")
+    parser.add_argument("--scale", type=int, required=True, help="Faktor pengali jumlah wilayah (misal, 10, 100, 1000)")
+    parser.add_argument("--out", required=True, help="Direktori keluaran")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.scale, args.out, seed=args.seed)
+    for name in FILES:
+        path = os.path.join(args.out, name)
+        print(f"✅ {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Atribusi fitur model GRU (integrated gradients) untuk semua wilayah sekaligus.
+
+Untuk setiap wilayah, jendela inferensi terbarunya (sama dengan batch_predict) dijelaskan
+relatif terhadap baseline "wilayah rata-rata" (rata-rata jendela semua wilayah):
+
+    kontribusi[t, f] = (x - baseline)[t, f] * rata-rata gradien sepanjang lintasan baseline -> x
+
+lalu dijumlahkan per fitur sepanjang tahun di jendela. Jumlah kontribusi ~= probabilitas
+wilayah - probabilitas baseline (sifat completeness IG); selisihnya dicatat sebagai
+diagnostik. Model multi-horizon dijelaskan pada output pertamanya (probabilitas utama).
+
+Semua titik lintasan (langkah x wilayah) digabung menjadi batch besar sehingga gradien
+dihitung dalam beberapa pemanggilan GradientTape, bukan per wilayah atau per request.
+Hasil disimpan per (versi model, versi data kesimpulan) di config.ATTRIBUTION_PATH dan
+di-cache in-process seperti tabel klimatologi. Tabel dibangun oleh train.py / tune.py setelah
+artefak baru diterbitkan, oleh batch_predict.py, atau lewat CLI di bawah; API hanya membacanya
+dan memakai alasan berbasis aturan selama tabel untuk versi saat ini belum ada.
+
+Usage:
+    python ml/src/attribution.py            # bangun/muat tabel atribusi untuk versi saat ini
+    python ml/src/attribution.py --force
+"""
+import os
+import json
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+
+import config
+import data_processing as dp
+import climatology as clim
+import metrics
+import model_registry
+import prediction_store
+
+# Label Indonesia untuk kolom fitur data kesimpulan (ditampilkan di alasan prediksi)
+FEATURE_LABELS = {
+    'hasil_panen': 'Hasil panen',
+    'delta_ton': 'Perubahan hasil panen',
+    'cuaca_total_event': 'Total kejadian cuaca ekstrem',
+    'dampak_total_event': 'Total dampak cuaca ekstrem',
+    'event_hujan_lebat': 'Hujan lebat',
+    'event_angin_kencang': 'Angin kencang',
+    'event_puting_beliung': 'Puting beliung',
+    'event_hujan_es': 'Hujan es',
+    'event_petir': 'Petir',
+    'event_suhu_ekstrem': 'Suhu ekstrem',
+    'event_jarak_pandang': 'Jarak pandang terbatas',
+    'impact_banjir': 'Banjir / genangan',
+    'impact_tanah_longsor': 'Tanah longsor',
+    'impact_pohon_tumbang': 'Pohon tumbang',
+    'impact_bangunan_rusak': 'Bangunan rusak',
+    'impact_gangguan_transport': 'Gangguan transportasi',
+    'impact_korban_jiwa': 'Korban jiwa / luka',
+    'impact_tidak_ada_data': 'Dampak tanpa keterangan',
+}
+
+_lock = threading.Lock()
+_CACHE = {}
+
+def versions() -> tuple:
+    """(versi model, versi data kesimpulan) yang menentukan tabel atribusi."""
+    return model_registry.artifacts_version(), clim.data_version(config.KESIMPULAN_PATH)
+
+def _gradients(model, x: np.ndarray, output_index: int) -> np.ndarray:
+    """Gradien output[:, output_index] terhadap input untuk satu batch (sampel saling bebas)."""
+    import tensorflow as tf
+
+    x = tf.convert_to_tensor(x, dtype=tf.float32)
+    with tf.GradientTape() as tape:
+        tape.watch(x)
+        out = model(x, training=False)[:, output_index]
+    return tape.gradient(out, x).numpy()
+
+def integrated_gradients(model, X: np.ndarray, baseline: np.ndarray, steps: int = None,
+                         output_index: int = 0, batch_size: int = None) -> np.ndarray:
+    """Atribusi IG [n, seq_len, n_features] untuk semua jendela X terhadap satu baseline.
+
+    Integral didekati dengan aturan titik tengah (steps titik). Titik lintasan semua jendela
+    diratakan menjadi [steps * n, ...] lalu diproses per batch_size titik.
+    """
+    steps = steps or config.ATTRIBUTION_IG_STEPS
+    batch_size = batch_size or config.ATTRIBUTION_BATCH_SIZE
+    X = np.asarray(X, dtype=np.float32)
+    diff = X - baseline
+    alphas = ((np.arange(steps) + 0.5) / steps).astype(np.float32)
+
+    n = len(X)
+    grad_sum = np.zeros_like(X)
+    # Titik ke-i lintasan rata: langkah i // n untuk jendela i % n
+    for lo in range(0, steps * n, batch_size):
+        idx = np.arange(lo, min(lo + batch_size, steps * n))
+        step, window = idx // n, idx % n
+        points = baseline + alphas[step, None, None] * diff[window]
+        np.add.at(grad_sum, window, _gradients(model, points, output_index))
+    return diff * (grad_sum / steps)
+
+def _keras_model(model):
+    # Snapshot serving hanya punya forward pass NumPy; gradien butuh model Keras aslinya
+    import serving_snapshot
+    if isinstance(model, serving_snapshot.SnapshotModel):
+        import tensorflow as tf
+        return tf.keras.models.load_model(model_registry.artifact_paths()[0])
+    return model
+
+def build_attributions(model=None, scaler=None, model_config=None) -> dict:
+    """Menghitung tabel atribusi semua wilayah dari artefak saat ini (tanpa menyimpan)."""
+    if model is None:
+        model, scaler, model_config = model_registry.get_artifacts()
+    model = _keras_model(model)
+    seq_len = int(model_config.get('sequence_length', config.SEQUENCE_LENGTH))
+    regions, X = dp.build_latest_windows(scaler, seq_len)
+    feature_names = _feature_names()
+    if not regions:
+        return {'feature_names': feature_names, 'regions': {}}
+
+    baseline = X.mean(axis=0, keepdims=True).astype(np.float32)
+    outputs = np.asarray(model(np.concatenate([baseline, X]), training=False))[:, 0]
+    baseline_probability, probabilities = float(outputs[0]), outputs[1:]
+
+    contributions = integrated_gradients(model, X, baseline).sum(axis=1)
+    gap = np.abs(contributions.sum(axis=1) - (probabilities - baseline_probability))
+    return {
+        'method': 'integrated_gradients',
+        'steps': config.ATTRIBUTION_IG_STEPS,
+        'feature_names': feature_names,
+        'baseline_probability': round(baseline_probability, 4),
+        # Selisih completeness terbesar; besar = langkah IG kurang
+        'max_completeness_gap': round(float(gap.max()), 6),
+        'regions': {
+            prediction_store.region_key(region): {
+                'region': region,
+                'probability': round(float(probabilities[i]), 4),
+                'contributions': [round(float(c), 5) for c in contributions[i]],
+            }
+            for i, region in enumerate(regions)
+        },
+    }
+
+def _feature_names() -> list:
+    # Urutan kolom sama dengan build_latest_windows / online_update
+    import online_update
+    return online_update._feature_columns(config.KESIMPULAN_PATH)
+
+def _save(payload: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def load_attributions(build: bool = True, force: bool = False, path: str = None) -> dict:
+    """Tabel atribusi untuk versi model & data saat ini.
+
+    Urutan: cache in-process -> file tersimpan (jika versinya cocok) -> hitung ulang lalu simpan
+    (hanya jika build=True). None jika tabel belum ada dan build=False.
+    """
+    path = path or config.ATTRIBUTION_PATH
+    key = versions()
+    if not force and key in _CACHE:
+        metrics.cache_lookup('attributions', hit=True)
+        return _CACHE[key]
+
+    with _lock:
+        if not force and key in _CACHE:
+            metrics.cache_lookup('attributions', hit=True)
+            return _CACHE[key]
+        metrics.cache_lookup('attributions', hit=False)
+
+        payload = None
+        if not force and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                if (payload.get('model_version'), payload.get('data_version')) != key:
+                    payload = None
+            except (OSError, ValueError):
+                payload = None
+
+        if payload is None:
+            if not build:
+                return None
+            print(f"Menghitung atribusi fitur (model {key[0]}, data {key[1]})...")
+            payload = {
+                'model_version': key[0],
+                'data_version': key[1],
+                'built_at': datetime.now().isoformat(timespec='seconds'),
+                **build_attributions(),
+            }
+            _save(payload, path)
+
+        _CACHE.clear()  # hanya simpan versi terbaru
+        _CACHE[key] = payload
+        return payload
+
+def refresh() -> dict:
+    """Membangun tabel untuk artefak yang baru diterbitkan (train.py / tune.py).
+
+    Model sudah tersimpan saat ini dipanggil, jadi kegagalan hanya dicetak; tabel bisa dibangun
+    ulang nanti lewat CLI modul ini atau batch_predict.py.
+    """
+    try:
+        table = load_attributions()
+    except Exception as e:
+        print(f"Peringatan: atribusi fitur belum dibangun ({e}); jalankan python ml/src/attribution.py")
+        return None
+    print(f"Atribusi fitur {len(table['regions'])} wilayah -> {config.ATTRIBUTION_PATH}")
+    return table
+
+def region_contributions(region_name: str, build: bool = False) -> list:
+    """
+    Kontribusi per fitur untuk satu wilayah, diurutkan dari pengaruh terbesar (|kontribusi|).
+    Positif = menaikkan probabilitas gagal panen dibanding wilayah rata-rata.
+
+    Jalur request hanya membaca tabel (build=False): menghitung IG semua wilayah di dalam request
+    terlalu mahal. None jika tabel untuk versi saat ini atau wilayahnya tidak tersedia.
+    """
+    table = load_attributions(build=build)
+    if table is None:
+        return None
+    entry = table['regions'].get(prediction_store.region_key(region_name))
+    if entry is None:
+        return None
+    items = [
+        {'feature': name, 'label': FEATURE_LABELS.get(name, name.replace('_', ' ').capitalize()),
+         'contribution': value}
+        for name, value in zip(table['feature_names'], entry['contributions'])
+    ]
+    return sorted(items, key=lambda item: -abs(item['contribution']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Atribusi fitur (integrated gradients) untuk semua wilayah")
+    parser.add_argument("--force", action="store_true", help="Hitung ulang walau versi model & data sama")
+    args = parser.parse_args()
+    table = load_attributions(force=args.force)
+    print(f"✅ Atribusi {len(table['regions'])} wilayah -> {config.ATTRIBUTION_PATH} "
+          f"(baseline {table.get('baseline_probability')}, gap completeness maks {table.get('max_completeness_gap')})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Job batch (malam) yang menghitung di muka prediksi semua wilayah x semua bulan tanam.
+
+Semua wilayah diskor dalam SATU model.predict atas jendela terbaru per wilayah
+(data_processing.build_latest_windows). Probabilitas model tidak bergantung pada bulan tanam,
+jadi setiap wilayah cukup diskor sekali lalu dirakit untuk bulan 0 (tanpa bulan tanam) dan
+bulan 1-12 dengan profil cuaca dan klimatologi yang sama. Wilayah dengan pembaruan online
+(online_update.py) diskor dari jendela dan klimatologi overlay-nya, sama dengan jalur live. Hasil ditulis ke prediction_store
+(SQLite lokal) yang dibaca API, dan opsional dipublikasikan ke tabel `predictions` Supabase
+dengan satu bulk upsert.
+
+Usage (misal, dari cron setiap malam):
+    python ml/src/batch_predict.py
+    python ml/src/batch_predict.py --publish
+"""
+import os
+import time
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+import config
+import data_processing as dp
+import climatology as clim
+import weather_profile as wp
+import model_registry
+import prediction_store
+import online_update
+import predict
+import attribution
+
+def _weather_by_region(min_year: int) -> dict:
+    """Data cuaca semua wilayah (kunci climatology.region_key) via pemilihan yang sama dengan jalur live."""
+    if not os.path.exists(config.WEATHER_CSV_PATH):
+        print(f"Peringatan: file cuaca tidak ditemukan: {config.WEATHER_CSV_PATH}")
+        return {}
+    return predict.weather_by_region(pd.read_csv(config.WEATHER_CSV_PATH, sep=';'), min_year)
+
+def score_all_regions(model, scaler, model_config) -> (list, list, list):
+    """(wilayah, probabilitas, risiko per horizon) untuk semua wilayah dalam satu lintasan model.
+
+    Risiko per horizon hanya terisi untuk model multi-horizon (None untuk model satu-output).
+    """
+    seq_len = int(model_config.get('sequence_length', config.SEQUENCE_LENGTH))
+    regions, X = dp.build_latest_windows(scaler, seq_len)
+    if not regions:
+        return [], [], []
+    # Wilayah dengan pembaruan online diskor dari jendela overlay (sama dengan jalur live)
+    for i, region in enumerate(regions):
+        window = online_update.window(region)
+        if window is not None:
+            X[i] = window
+    outputs = model.predict(X, batch_size=max(config.BATCH_SIZE, 256), verbose=0)
+    risks = [predict.horizon_risks(row, model_config) for row in outputs]
+    return regions, [float(p) for p in outputs[:, 0]], risks
+
+def build_rows(months=range(1, 13)) -> list:
+    """Merakit hasil lengkap untuk setiap wilayah x (bulan 0 + months)."""
+    model, scaler, model_config = model_registry.get_artifacts()
+    threshold = model_config.get('optimal_threshold', 0.5)
+
+    start = time.perf_counter()
+    regions, probabilities, horizon_risks = score_all_regions(model, scaler, model_config)
+    print(f"Skoring {len(regions)} wilayah selesai dalam {time.perf_counter() - start:.2f} detik")
+
+    # Atribusi fitur semua wilayah dalam satu komputasi gradien batch (disimpan per versi model & data,
+    # juga dibaca API); dipakai untuk alasan prediksi dan field feature_contributions
+    start = time.perf_counter()
+    attribution.load_attributions()
+    print(f"Atribusi fitur siap dalam {time.perf_counter() - start:.2f} detik")
+
+    min_year = datetime.now().year - config.HISTORICAL_YEARS_FOR_PREDICTION
+    weather = _weather_by_region(min_year)
+    climatology = clim.load_climatology()
+    empty_weather = pd.DataFrame()
+    empty_harvest = pd.DataFrame()  # data kesimpulan tidak memuat data panen harian (sama dengan jalur live)
+
+    meta = {
+        'model_version': model_registry.state()['model_version'],
+        'data_version': prediction_store.data_version(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    today = datetime.now().strftime('%Y-%m-%d')
+
+    rows = []
+    for region, probability, risks in zip(regions, probabilities, horizon_risks):
+        key = clim.region_key(region)
+        updated = online_update.revision(region) > 0
+        # Atribusi hanya berlaku untuk jendela data dasar (lihat predict._region_contributions)
+        contributions = None if updated else attribution.region_contributions(region, build=True)
+        df_weather = weather.get(key, empty_weather)
+        profile = wp.build_weather_profile(df_weather)
+        region_climatology = online_update.region_climatology(region) if updated else None
+        if region_climatology is None:
+            region_climatology = climatology.get(key, {})
+        for month in [0, *months]:
+            period = predict.prediction_period_for(month) if month else None
+            result = predict.assemble_result(
+                region, probability, threshold, df_weather, empty_harvest,
+                profile=profile, prediction_period=period, climatology=region_climatology,
+                horizon_risks=risks, contributions=contributions
+            )
+            rows.append({
+                'region': region,
+                'planting_month': month,
+                'prediction_for_date': period['start_date'] if period else today,
+                'result': result,
+                **meta,
+            })
+    return rows
+
+def publish(rows: list):
+    """Upsert batch ke `predictions` (kunci unik region + prediction_for_date) via PredictionWriter."""
+    import prediction_writer as pw
+
+    with pw.PredictionWriter() as writer:
+        for row in rows:
+            # Bulan 0 bertanggal hari ini dan bisa bentrok dengan bulan berjalan -> hanya publikasi bulan tanam
+            if row['planting_month']:
+                writer.write(pw.record_from_result(row['result'], row['prediction_for_date']))
+    print(f"✅ {writer.stats['rows']} baris dipublikasikan ke tabel predictions "
+          f"({writer.stats['batches']} batch, {writer.stats['retries']} retry)")
+
+def run(months=range(1, 13), store_path: str = None, publish_remote: bool = False) -> dict:
+    start = time.perf_counter()
+    rows = build_rows(months)
+    path = prediction_store.write_all(rows, store_path)
+    print(f"✅ {len(rows)} hasil disimpan ke {path} ({time.perf_counter() - start:.1f} detik)")
+    if publish_remote:
+        publish(rows)
+    return prediction_store.summary(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Hitung di muka prediksi semua wilayah x bulan tanam")
+    parser.add_argument("--months", type=int, nargs="+", default=list(range(1, 13)), help="Bulan tanam (default: 1-12)")
+    parser.add_argument("--store", default=None, help="Path SQLite (default: config.PREDICTION_STORE_PATH)")
+    parser.add_argument("--publish", action="store_true", help="Juga upsert ke tabel predictions Supabase")
+    args = parser.parse_args()
+
+    summary = run(args.months, args.store, args.publish)
+    print(f"Ringkasan store: {summary}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Tabel klimatologi cuaca ekstrem: wilayah x bulan kalender -> jumlah kejadian, jumlah tahun
+pengamatan, dan histogram jenis kejadian.
+
+Tabel dibangun SEKALI per versi data cuaca (dan per jendela 10 tahun terakhir), disimpan ke
+config.CLIMATOLOGY_PATH, lalu dipakai get_weather_forecast* sebagai lookup tiga baris
+sehingga API tidak perlu memindai baris cuaca mentah per request.
+"""
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cache in-process: (data_version, min_year) -> {kunci wilayah: {bulan: entri}}
+_CACHE = {}
+# Naik jika skema kunci/entri berubah -> tabel tersimpan lama dibangun ulang
+_TABLE_FORMAT = 2
+
+def region_key(region_name) -> str:
+    """Kunci wilayah tabel: region_index.normalize_key, jadi "Kota X" tidak tergabung dengan kabupaten "X"."""
+    import region_index  # region_index mengimpor modul ini
+    return region_index.normalize_key(region_name)
+
+def region_keys(names: pd.Series) -> pd.Series:
+    """region_key per baris (dihitung sekali per nama unik)."""
+    names = names.fillna('').astype(str)
+    return names.map({name: region_key(name) for name in names.unique()})
+
+def _min_year() -> int:
+    return datetime.now().year - config.HISTORICAL_YEARS_FOR_PREDICTION
+
+def data_version(path: str = None) -> str:
+    """Versi data cuaca dari metadata file (ukuran + mtime), murah untuk dicek per request."""
+    path = path or config.WEATHER_CSV_PATH
+    if not os.path.exists(path):
+        return "missing"
+    st = os.stat(path)
+    return hashlib.sha1(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()[:16]
+
+def _prepare_frame(df_weather: pd.DataFrame, min_year: int) -> pd.DataFrame:
+    """Kolom minimal (Wilayah = region_key, Tahun, Bulan, Kejadian) dalam jendela min_year."""
+    dates = pd.to_datetime(df_weather[config.DATE_COLUMN], errors='coerce')
+    if config.REGION_COLUMN in df_weather.columns:
+        regions = region_keys(df_weather[config.REGION_COLUMN])
+    else:
+        regions = pd.Series("", index=df_weather.index)
+    if config.WEATHER_EVENT_COLUMN in df_weather.columns:
+        events = df_weather[config.WEATHER_EVENT_COLUMN]
+    else:
+        events = pd.Series(np.nan, index=df_weather.index, dtype=object)
+
+    df = pd.DataFrame({'Wilayah': regions, 'Tanggal': dates, 'Kejadian': events}).dropna(subset=['Tanggal'])
+    df['Tahun'] = df['Tanggal'].dt.year
+    df['Bulan'] = df['Tanggal'].dt.month
+    return df[df['Tahun'] >= min_year]
+
+def _build_table(df: pd.DataFrame) -> dict:
+    """Agregasi tervektorisasi: satu groupby untuk ukuran bulan, satu explode untuk histogram."""
+    table = {}
+    if df.empty:
+        return table
+
+    sizes = df.groupby(['Wilayah', 'Bulan']).agg(n_events=('Tahun', 'size'), n_years=('Tahun', 'nunique'))
+    for (region, month), row in sizes.iterrows():
+        table.setdefault(region, {})[int(month)] = {
+            'n_events': int(row['n_events']),
+            'n_years': int(row['n_years']),
+            'events_per_year': float(row['n_events'] / row['n_years']) if row['n_years'] else 0.0,
+            'histogram': []
+        }
+
+    events = df[['Wilayah', 'Bulan', 'Kejadian']].dropna(subset=['Kejadian'])
+    if not events.empty:
+        events = events.assign(Kejadian=events['Kejadian'].astype(str).str.split(', ')).explode('Kejadian')
+        events = events[events['Kejadian'] != '']
+        counts = (events.groupby(['Wilayah', 'Bulan', 'Kejadian']).size()
+                  .rename('count').reset_index()
+                  .sort_values(['Wilayah', 'Bulan', 'count'], ascending=[True, True, False], kind='stable'))
+        for (region, month), grp in counts.groupby(['Wilayah', 'Bulan'], sort=False):
+            table[region][int(month)]['histogram'] = [
+                [event, int(count)] for event, count in zip(grp['Kejadian'], grp['count'])
+            ]
+    return table
+
+def build_region_climatology(df_weather: pd.DataFrame, min_year: int = None) -> dict:
+    """Tabel bulan -> entri untuk DataFrame cuaca yang sudah difilter ke satu wilayah."""
+    if df_weather.empty or config.DATE_COLUMN not in df_weather.columns:
+        return {}
+    df = _prepare_frame(df_weather, _min_year() if min_year is None else min_year)
+    df['Wilayah'] = ''  # gabungkan semua baris ke satu wilayah
+    return _build_table(df).get('', {})
+
+def build_climatology(df_weather: pd.DataFrame, min_year: int = None) -> dict:
+    """Tabel wilayah (region_key) -> bulan -> entri untuk seluruh data cuaca."""
+    if df_weather.empty or config.DATE_COLUMN not in df_weather.columns:
+        return {}
+    return _build_table(_prepare_frame(df_weather, _min_year() if min_year is None else min_year))
+
+def _read_weather_csv(path: str) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_csv(path, sep=';')
+
+def _save(payload: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def _decode_regions(regions: dict) -> dict:
+    # JSON hanya mendukung key string; kembalikan key bulan ke int
+    return {region: {int(m): entry for m, entry in months.items()} for region, months in regions.items()}
+
+def load_climatology(weather_path: str = None, table_path: str = None) -> dict:
+    """Mengembalikan tabel klimatologi untuk versi data saat ini.
+
+    Urutan: cache in-process -> file tersimpan (jika versi & min_year cocok) -> bangun ulang
+    dari CSV cuaca lalu simpan.
+    """
+    weather_path = weather_path or config.WEATHER_CSV_PATH
+    table_path = table_path or config.CLIMATOLOGY_PATH
+    key = (data_version(weather_path), _min_year())
+    metrics.cache_lookup('climatology', hit=key in _CACHE)
+    if key in _CACHE:
+        return _CACHE[key]
+
+    regions = None
+    if os.path.exists(table_path):
+        try:
+            with open(table_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            if (payload.get('format') == _TABLE_FORMAT and payload.get('data_version') == key[0]
+                    and payload.get('min_year') == key[1]):
+                regions = _decode_regions(payload.get('regions', {}))
+        except (OSError, ValueError):
+            regions = None
+
+    if regions is None:
+        logger.info("Membangun tabel klimatologi cuaca (versi data %s, tahun >= %s)...", key[0], key[1])
+        regions = build_climatology(_read_weather_csv(weather_path), min_year=key[1])
+        _save({
+            'format': _TABLE_FORMAT,
+            'data_version': key[0],
+            'min_year': key[1],
+            'built_at': datetime.now().isoformat(timespec='seconds'),
+            'regions': regions
+        }, table_path)
+
+    _CACHE.clear()  # hanya simpan versi terbaru
+    _CACHE[key] = regions
+    return regions
+
+def get_region_climatology(region_name: str) -> dict:
+    """Entri bulan untuk satu wilayah; {} jika wilayah tidak ada di data cuaca."""
+    return load_climatology().get(region_key(region_name), {})
+
+if __name__ == "__main__":
+    # Bangun ulang tabel di muka (misal, setelah data cuaca diperbarui)
+    table = load_climatology()
+    print(f"✅ Tabel klimatologi: {len(table)} wilayah -> {config.CLIMATOLOGY_PATH}")
@@ -1,5 +1,4 @@
 import numpy as np
-import tensorflow as tf
 import os
 
 # --- Variabel Target & Kunci ---
@@ -24,19 +23,39 @@ SEQUENCE_LENGTH = 12
 SEQUENCE_STRIDE = 1
 # Ukuran Batch
 BATCH_SIZE = 32
+# Thread NumPy untuk menyalin jendela sekuens (data_processing.gather_windows); 1 = serial.
+# Paralel hanya dipakai jika jumlah jendela cukup besar untuk menutup biaya thread
+SEQUENCE_BUILD_WORKERS = int(os.environ.get("ML_SEQUENCE_BUILD_WORKERS", "1"))
+SEQUENCE_PARALLEL_MIN_WINDOWS = 20000
 
 # --- Parameter Pelatihan ---
 # 20% dari data akan digunakan untuk validasi
 VALIDATION_SPLIT = 0.2
 EPOCHS = 50
-# Tentukan metrik yang paling penting untuk peringatan dini: Recall [43, 44, 45, 46, 47, 48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 39, 4, 21, 61, 62]
-TUNER_OBJECTIVE = tf.keras.metrics.Recall(name="val_recall")
-# Jika menggunakan string:
-# TUNER_OBJECTIVE = kt.Objective("val_recall", direction="max") [63, 64, 65, 50, 51, 66, 67, 68, 69, 70, 21]
+
+# --- Pelatihan inkremental (train.py --incremental) ---
+# Model lama di-fine-tune hanya pada jendela yang berisi tahun > high-water mark pelatihan terakhir,
+# ditambah sampel replay jendela lama (kelipatan jumlah jendela baru) agar pola lama tidak terlupa
+INCREMENTAL_REPLAY_RATIO = 1.0
+INCREMENTAL_EPOCHS = 20
+INCREMENTAL_LEARNING_RATE = 1e-4
+# Model baru hanya dipromosikan jika, pada split validasi yang tidak dipakai kalibrasi, recall
+# (di threshold target recall yang sama) dan ROC-AUC-nya tidak turun lebih dari toleransi ini
+INCREMENTAL_RECALL_TOLERANCE = 0.0
+INCREMENTAL_AUC_TOLERANCE = 0.0
+
+# --- Model multi-horizon (train.py --horizons) ---
+# Horizon default (tahun setelah tahun terakhir jendela) jika --horizons diberikan tanpa nilai.
+# Satu output sigmoid per horizon; horizon pertama menjadi 'probability' utama di API.
+FORECAST_HORIZONS = (1, 2, 3)
 
 # Ambang batas probabilitas (0.0 - 1.0) untuk klasifikasi akhir.
-# Nilai default 0.5 di-override oleh skrip train.py.
+# Nilai default 0.5 di-override oleh tahap kalibrasi (evaluate.py) saat train.py / tune.py
+# dijalankan, dan disimpan sebagai 'optimal_threshold' di model_config.json.
 OPTIMAL_THRESHOLD = 0.5
+# Target recall minimum saat kalibrasi threshold; di antara threshold yang mencapainya
+# dipilih yang presisinya tertinggi.
+TARGET_RECALL = 0.8
 
 # Jumlah tahun historis yang digunakan untuk prediksi (10 tahun terakhir)
 HISTORICAL_YEARS_FOR_PREDICTION = 10
@@ -46,4 +65,71 @@ HISTORICAL_YEARS_FOR_PREDICTION = 10
 _BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # root ml/
 MODEL_PATH = os.path.join(_BASE_DIR, "models", "gru_model.keras")
 SCALER_PATH = os.path.join(_BASE_DIR, "models", "feature_scaler.joblib")
-CONFIG_PATH = os.path.join(_BASE_DIR, "models", "model_config.json")  # Untuk menyimpan threshold
\ No newline at end of file
+CONFIG_PATH = os.path.join(_BASE_DIR, "models", "model_config.json")  # Untuk menyimpan threshold
+# Artefak hasil train.py/tune.py: satu direktori per versi (nama file seperti di atas) + pointer
+# CURRENT yang diganti atomik; path di atas hanya dipakai jika pointer belum ada (artefak lama)
+ARTIFACTS_DIR = os.path.join(_BASE_DIR, "models", "artifacts")
+ARTIFACT_KEEP_VERSIONS = 3
+
+# --- Path Data Lokal ---
+KESIMPULAN_PATH = os.path.join(_BASE_DIR, "data", "data_kesimpulan_processed.csv")
+WEATHER_CSV_PATH = os.path.join(_BASE_DIR, "data", "sample_data_cuaca.csv")
+# Tabel klimatologi cuaca ekstrem (wilayah x bulan) yang dibangun ulang per versi data cuaca
+CLIMATOLOGY_PATH = os.path.join(_BASE_DIR, "models", "weather_climatology.json")
+# Direktori kerja tuning (dataset .npy bersama untuk worker + bobot trial)
+TUNING_DIR = os.path.join(_BASE_DIR, "models", "tuning")
+# Cache artefak preprocessing (scaler + jendela) berbasis hash isi input; lihat preprocess_cache.py
+PREPROCESS_CACHE_DIR = os.path.join(_BASE_DIR, "models", "preprocess_cache")
+PREPROCESS_CACHE_MAX_ENTRIES = 4
+# Dataset pelatihan out-of-core (train.py --sharded): shard .npy jendela ter-skala, lihat sharded_dataset.py
+SHARD_DIR = os.path.join(_BASE_DIR, "models", "shards")
+SHARD_CSV_CHUNK_ROWS = 200_000   # baris CSV per chunk saat preprocessing
+SHARD_BUCKETS = 16               # partisi wilayah (hash) -> satu bucket harus muat di RAM
+SHARD_WINDOWS = 8192             # jendela per shard
+SHARD_CYCLE_LENGTH = 4           # shard yang dibaca bersamaan oleh interleave
+SHARD_SHUFFLE_BUFFER = 10_000    # jendela di shuffle buffer tf.data
+
+# --- Serving ---
+# Jumlah thread executor untuk inferensi di API (request di luar slot ini mengantre)
+INFERENCE_WORKERS = int(os.environ.get("ML_INFERENCE_WORKERS", "2"))
+# Batas wilayah yang sedang diproses sekaligus per stream /predict/batch/stream
+STREAM_MAX_IN_FLIGHT = int(os.environ.get("ML_STREAM_MAX_IN_FLIGHT", str(INFERENCE_WORKERS * 2)))
+# Respons lebih kecil dari ini tidak dikompresi (gzip/Brotli tidak sebanding biayanya)
+RESPONSE_COMPRESSION_MIN_BYTES = 1024
+# Cache-Control max-age (detik) untuk browser / proxy Node; setelahnya klien revalidasi via ETag.
+# Hasil /predict ikut berubah saat bulan berganti (forecast), jadi dibuat lebih pendek
+REGIONS_CACHE_MAX_AGE = 3600
+PREDICT_CACHE_MAX_AGE = 300
+# Snapshot read-only (bobot model, jendela terbaru, klimatologi) yang di-mmap worker API.
+# Diaktifkan oleh api/serve.py; lihat serving_snapshot.py
+SERVING_SNAPSHOT_ENABLED = os.environ.get("ML_SERVING_SNAPSHOT", "0") == "1"
+SERVING_SNAPSHOT_DIR = os.environ.get("ML_SERVING_SNAPSHOT_DIR", os.path.join(_BASE_DIR, "models", "serving_snapshot"))
+# Direktori state metrik per worker; jika diatur, /metrics menggabungkan semua worker (lihat metrics.py).
+# Diisi oleh api/serve.py untuk --workers > 1
+METRICS_MULTIPROC_DIR = os.environ.get("ML_METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 5.0
+# Jurnal pembaruan online per wilayah (agregat tahunan / kejadian cuaca baru); lihat online_update.py
+ONLINE_UPDATE_JOURNAL = os.environ.get("ML_ONLINE_UPDATE_JOURNAL", os.path.join(_BASE_DIR, "models", "online_updates.jsonl"))
+# Hasil prediksi yang dihitung di muka oleh batch_predict.py (job malam)
+PREDICTION_STORE_PATH = os.path.join(_BASE_DIR, "models", "predictions.sqlite")
+# Hasil tersimpan yang lebih tua dari ini dianggap basi -> fallback ke inferensi live
+PRECOMPUTED_MAX_AGE_HOURS = 36
+
+# Atribusi fitur integrated gradients semua wilayah, per (versi model, versi data); lihat attribution.py
+ATTRIBUTION_PATH = os.path.join(_BASE_DIR, "models", "attributions.json")
+ATTRIBUTION_IG_STEPS = 32         # titik integral lintasan baseline -> jendela
+ATTRIBUTION_BATCH_SIZE = 4096     # titik lintasan per pemanggilan GradientTape
+ATTRIBUTION_TOP_REASONS = 3       # fitur teratas yang dijadikan alasan prediksi
+
+# --- Publikasi ke tabel predictions (prediction_writer.py) ---
+# Baris per INSERT multi-row; flush paksa jika record tertua menunggu lebih dari interval (detik)
+PREDICTION_WRITER_BATCH_SIZE = 500
+PREDICTION_WRITER_FLUSH_INTERVAL = 2.0
+PREDICTION_WRITER_MAX_RETRIES = 5
+
+# --- Tracing ---
+# Fraksi request yang ditrace (0 = mati, 1 = semua). Span per tahap dicatat di ring buffer
+# in-process dan, jika ML_TRACE_EXPORT_PATH diatur, ditambahkan ke file JSONL.
+TRACE_SAMPLE_RATE = float(os.environ.get("ML_TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORT_PATH = os.environ.get("ML_TRACE_EXPORT_PATH")
+TRACE_BUFFER_SIZE = 200
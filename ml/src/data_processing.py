@@ -1,5 +1,6 @@
 import os
 import re
+import logging
 import joblib
 import json
 import pandas as pd
@@ -7,11 +8,13 @@ import numpy as np
 from sqlalchemy import create_engine
 from sqlalchemy.pool import NullPool
 from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.utils import timeseries_dataset_from_array
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 import config
+import tracing
+
+logger = logging.getLogger(__name__)
 
 # Muat variabel.env
 load_dotenv()
@@ -27,6 +30,42 @@ def _clean_numeric_string(s: str) -> float:
     except (ValueError, TypeError):
         return np.nan
 
+def clean_numeric_column(values: pd.Series) -> pd.Series:
+    """Versi tervektorisasi _clean_numeric_string untuk satu kolom (tanpa regex Python per sel).
+
+    String: spasi dihapus, koma -> titik, gagal parse -> NaN. Nilai non-string (angka) dipakai apa adanya.
+    """
+    try:
+        text = values.str.replace(r'\s', '', regex=True).str.replace(',', '.', regex=False)
+    except AttributeError:
+        # Kolom tanpa string sama sekali (sudah numerik)
+        return pd.to_numeric(values, errors='coerce')
+    cleaned = pd.to_numeric(text, errors='coerce')
+    # .str memberi NaN untuk sel non-string -> ambil nilai numerik aslinya
+    return cleaned.fillna(pd.to_numeric(values.where(text.isna()), errors='coerce'))
+
+def zscore_by_group(values: pd.Series, groups: pd.Series) -> pd.Series:
+    """Z-score per grup (std populasi, ddof=0) dengan transform bawaan groupby, tanpa lambda per grup."""
+    grouped = values.groupby(groups)
+    return (values - grouped.transform('mean')) / grouped.transform('std', ddof=0)
+
+def normalize_region_name(name) -> str:
+    """Menghapus prefix administratif ('Kab. Bandung' -> 'Bandung') untuk matching nama wilayah."""
+    if pd.isna(name):
+        return ""
+    name = str(name).strip()
+    # Hapus prefix umum (dengan spasi setelahnya)
+    prefixes = ["Kab. ", "Kabupaten ", "Kota ", "Kotamadya "]
+    for prefix in prefixes:
+        if name.startswith(prefix):
+            name = name[len(prefix):].strip()
+    # Juga coba tanpa spasi
+    prefixes_no_space = ["Kab.", "Kabupaten", "Kota", "Kotamadya"]
+    for prefix in prefixes_no_space:
+        if name.startswith(prefix) and len(name) > len(prefix):
+            name = name[len(prefix):].strip()
+    return name
+
 def _get_db_engine():
     """Membuat koneksi DB langsung (SQLAlchemy) untuk data besar (pelatihan)."""
     db_url = os.environ.get("SUPABASE_DB_URL_POOLER")
@@ -42,7 +81,7 @@ def _get_api_client() -> Client:
     key = os.environ.get("SUPABASE_KEY")
     if not url or not key:
         raise ValueError("SUPABASE_URL atau SUPABASE_KEY tidak diatur di.env")
-    return create_client(url, key) [12, 63, 73, 2, 74, 10, 75, 11, 76, 77]
+    return create_client(url, key)
 
 def load_training_data() -> (pd.DataFrame, pd.DataFrame):
     """Menarik data panen dan cuaca untuk pelatihan model (10 tahun terakhir)."""
@@ -90,12 +129,12 @@ def load_training_data() -> (pd.DataFrame, pd.DataFrame):
 
 def load_prediction_data(region_name: str, start_date: str) -> (pd.DataFrame, pd.DataFrame):
     """Menarik data terbaru untuk satu wilayah guna membuat prediksi."""
-    print(f"Menarik data prediksi untuk {region_name} dari Supabase (via API)...")
+    logger.debug("Menarik data prediksi untuk %s dari Supabase (via API)...", region_name)
     client = _get_api_client()
     
     # Ganti nama tabel dan kolom jika berbeda
-    harvest_response = client.table("harvest_data").select("*").eq("Kabupaten/Kota", region_name).execute() [85]
-    weather_response = client.table("weather_events").select("*").eq("Kabupaten/Kota", region_name).gte("Tanggal", start_date).execute() [85]
+    harvest_response = client.table("harvest_data").select("*").eq("Kabupaten/Kota", region_name).execute()
+    weather_response = client.table("weather_events").select("*").eq("Kabupaten/Kota", region_name).gte("Tanggal", start_date).execute()
     
     return pd.DataFrame(harvest_response.data), pd.DataFrame(weather_response.data)
 
@@ -147,7 +186,7 @@ def preprocess_features(df_harvest: pd.DataFrame, df_weather: pd.DataFrame, scal
     """
     Inti dari pipeline ML. Mengubah data mentah menjadi sekuens yang siap untuk GRU.
     """
-    print("Memulai pra-pemrosesan fitur...")
+    logger.debug("Memulai pra-pemrosesan fitur...")
     
     # === 1. Pra-pemrosesan Data Panen (Y dan Fitur X) ===
     
@@ -180,15 +219,13 @@ def preprocess_features(df_harvest: pd.DataFrame, df_weather: pd.DataFrame, scal
     # Bersihkan angka (misal, "54 987,79" -> 54987.79) 
     for col in ["Produktivitas", "LuasPanen"]:
         if col in df_harvest.columns:
-            df_harvest[col] = df_harvest[col].apply(_clean_numeric_string)
+            df_harvest[col] = clean_numeric_column(df_harvest[col])
     df_harvest = df_harvest.dropna(subset=["Produktivitas", "LuasPanen"])
     
     # Buat label (Y) hanya jika pelatihan
     if is_training:
         # Hitung Z-score produktivitas PER WILAYAH untuk menemukan anomali [86, 87, 88, 89, 90, 91]
-        df_harvest['z_score'] = df_harvest.groupby('Wilayah')['Produktivitas'].transform(
-            lambda x: (x - x.mean()) / x.std(ddof=0)
-        )
+        df_harvest['z_score'] = zscore_by_group(df_harvest['Produktivitas'], df_harvest['Wilayah'])
         # Label 1 (Gagal Panen) jika Z-score di bawah ambang batas [22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 2, 42]
         df_harvest['GagalPanen'] = (df_harvest['z_score'] < config.Z_SCORE_THRESHOLD).astype(int)
         
@@ -198,24 +235,7 @@ def preprocess_features(df_harvest: pd.DataFrame, df_weather: pd.DataFrame, scal
     df_weather_proc = df_weather.rename(columns={config.REGION_COLUMN: "Wilayah"})
     df_weather_proc[config.DATE_COLUMN] = pd.to_datetime(df_weather_proc[config.DATE_COLUMN])
     
-    # Normalisasi nama wilayah untuk matching dengan data panen
-    def normalize_region_name(name):
-        if pd.isna(name):
-            return ""
-        name = str(name).strip()
-        # Hapus prefix umum (dengan spasi setelahnya)
-        prefixes = ["Kab. ", "Kabupaten ", "Kota ", "Kotamadya "]
-        for prefix in prefixes:
-            if name.startswith(prefix):
-                name = name[len(prefix):].strip()
-        # Juga coba tanpa spasi
-        prefixes_no_space = ["Kab.", "Kabupaten", "Kota", "Kotamadya"]
-        for prefix in prefixes_no_space:
-            if name.startswith(prefix) and len(name) > len(prefix):
-                name = name[len(prefix):].strip()
-        return name
-    
-    # Normalisasi nama wilayah di data cuaca
+    # Normalisasi nama wilayah di data cuaca agar cocok dengan data panen
     df_weather_proc['Wilayah'] = df_weather_proc['Wilayah'].apply(normalize_region_name)
     
     # One-Hot Encoding untuk 'Cuaca Ekstrem' dan 'Dampak' 
@@ -294,45 +314,49 @@ def preprocess_features(df_harvest: pd.DataFrame, df_weather: pd.DataFrame, scal
             known_features = scaler.feature_names_in_
             features_df = features_df.reindex(columns=known_features, fill_value=0)
     
-    if is_training:
-        # Buat dan 'fit' scaler HANYA pada data pelatihan
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_features = scaler.fit_transform(features_df)
-    else:
-        # 'Transform' data prediksi menggunakan scaler yang sudah ada
-        scaled_features = scaler.transform(features_df)
+    with tracing.span('scale', rows=len(features_df)):
+        if is_training:
+            # Buat dan 'fit' scaler HANYA pada data pelatihan
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            scaled_features = scaler.fit_transform(features_df)
+        else:
+            # 'Transform' data prediksi menggunakan scaler yang sudah ada
+            scaled_features = scaler.transform(features_df)
         
     labels = df_merged['GagalPanen'].values if (is_training and 'GagalPanen' in df_merged.columns) else None
 
     # === 5. Buat Sekuens (Windowing) ===
-    print(f"Membuat sekuens (windowing) dengan panjang {config.SEQUENCE_LENGTH}...")
+    logger.debug("Membuat sekuens (windowing) dengan panjang %s...", config.SEQUENCE_LENGTH)
     
-    if is_training:
-        # Untuk training: buat sequence dari semua data (sudah di-shuffle nanti)
-        dataset = timeseries_dataset_from_array(
-            data=scaled_features,
-            targets=labels,
-            sequence_length=config.SEQUENCE_LENGTH,
-            sequence_stride=config.SEQUENCE_STRIDE,
-            batch_size=config.BATCH_SIZE,
-            shuffle=True
-        )
-    else:
-        # Untuk prediksi: buat sequence per wilayah
-        # Simpan informasi wilayah sebelum di-drop
-        wilayah_info = df_merged['Wilayah'].values if 'Wilayah' in df_merged.columns else None
+    from tensorflow.keras.utils import timeseries_dataset_from_array
+
+    with tracing.span('window'):
+        if is_training:
+            # Untuk training: buat sequence dari semua data (sudah di-shuffle nanti)
+            dataset = timeseries_dataset_from_array(
+                data=scaled_features,
+                targets=labels,
+                sequence_length=config.SEQUENCE_LENGTH,
+                sequence_stride=config.SEQUENCE_STRIDE,
+                batch_size=config.BATCH_SIZE,
+                shuffle=True
+            )
+        else:
+            # Untuk prediksi: buat sequence per wilayah
+            # Simpan informasi wilayah sebelum di-drop
+            wilayah_info = df_merged['Wilayah'].values if 'Wilayah' in df_merged.columns else None
         
-        # Buat sequence hanya dari data wilayah yang diminta (harusnya sudah di-filter di predict.py)
-        # Tapi untuk memastikan, kita buat sequence dari semua data yang ada
-        # dan ambil yang terakhir (paling recent)
-        dataset = timeseries_dataset_from_array(
-            data=scaled_features,
-            targets=None,
-            sequence_length=config.SEQUENCE_LENGTH,
-            sequence_stride=config.SEQUENCE_STRIDE,
-            batch_size=1,
-            shuffle=False  # Jangan shuffle untuk prediksi, ambil urutan temporal
-        )
+            # Buat sequence hanya dari data wilayah yang diminta (harusnya sudah di-filter di predict.py)
+            # Tapi untuk memastikan, kita buat sequence dari semua data yang ada
+            # dan ambil yang terakhir (paling recent)
+            dataset = timeseries_dataset_from_array(
+                data=scaled_features,
+                targets=None,
+                sequence_length=config.SEQUENCE_LENGTH,
+                sequence_stride=config.SEQUENCE_STRIDE,
+                batch_size=1,
+                shuffle=False  # Jangan shuffle untuk prediksi, ambil urutan temporal
+            )
     
     return dataset, scaler, labels if is_training else None
 
@@ -347,18 +371,15 @@ def load_kesimpulan_sequences(kesimpulan_path: str = None, is_training: bool = T
     """
     import pandas as pd
     from sklearn.preprocessing import MinMaxScaler
-    from tensorflow.keras.utils import timeseries_dataset_from_array
     import tensorflow as tf
 
     # Tentukan path default
     if kesimpulan_path is None:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)  # ml/
-        kesimpulan_path = os.path.join(project_root, 'data', 'data_kesimpulan_processed.csv')
+        kesimpulan_path = config.KESIMPULAN_PATH
 
-    print(f"Memuat data kesimpulan dari: {kesimpulan_path}")
+    logger.debug("Memuat data kesimpulan dari: %s", kesimpulan_path)
     if not os.path.exists(kesimpulan_path):
-        print("ERROR: File data_kesimpulan_processed.csv tidak ditemukan.")
+        logger.error("File data_kesimpulan_processed.csv tidak ditemukan: %s", kesimpulan_path)
         return tf.data.Dataset.from_tensor_slices(([])), None, None
 
     df = pd.read_csv(kesimpulan_path)
@@ -375,14 +396,14 @@ def load_kesimpulan_sequences(kesimpulan_path: str = None, is_training: bool = T
     required_cols = ['Wilayah', 'Tahun']
     for col in required_cols:
         if col not in df.columns:
-            print(f"ERROR: Kolom wajib '{col}' tidak ada pada data kesimpulan.")
+            logger.error("Kolom wajib '%s' tidak ada pada data kesimpulan.", col)
             return tf.data.Dataset.from_tensor_slices(([])), None, None
 
     # Optional: filter wilayah spesifik
     if region_filter:
         df = df[df['Wilayah'].astype(str).str.strip().str.lower() == str(region_filter).strip().lower()]
         if df.empty:
-            print(f"Peringatan: Tidak ada data untuk wilayah '{region_filter}' pada CSV kesimpulan.")
+            logger.warning("Tidak ada data untuk wilayah '%s' pada CSV kesimpulan.", region_filter)
     # Sortir data per wilayah dan tahun
     df = df.sort_values(['Wilayah', 'Tahun']).reset_index(drop=True)
 
@@ -399,63 +420,187 @@ def load_kesimpulan_sequences(kesimpulan_path: str = None, is_training: bool = T
     feature_df = feature_df[numeric_cols]
 
     # Fit/transform scaler
-    if is_training:
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_all = scaler.fit_transform(feature_df)
-    else:
-        # Saat prediksi, scaler wajib diberikan dari luar oleh pemanggil (train menyimpan & load)
-        # Untuk kompatibilitas, jika tidak ada scaler maka gagal dengan jelas
-        if scaler is None:
-            raise ValueError("Scaler harus disediakan saat is_training=False")
-        scaled_all = scaler.transform(feature_df)
-
-    # Sisipkan kembali untuk mempermudah slicing per wilayah
-    df_scaled = pd.DataFrame(scaled_all, columns=numeric_cols)
-    df_scaled['Wilayah'] = df['Wilayah'].values
-    df_scaled['Tahun'] = df['Tahun'].values
-    if label_series is not None:
-        df_scaled['GagalPanen'] = label_series.values
+    with tracing.span('scale', rows=len(feature_df)):
+        if is_training:
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            scaled_all = scaler.fit_transform(feature_df)
+        else:
+            # Saat prediksi, scaler wajib diberikan dari luar oleh pemanggil (train menyimpan & load)
+            # Untuk kompatibilitas, jika tidak ada scaler maka gagal dengan jelas
+            if scaler is None:
+                raise ValueError("Scaler harus disediakan saat is_training=False")
+            scaled_all = scaler.transform(feature_df)
 
     # Tentukan panjang sekuens
     if not is_training and desired_seq_len is not None and desired_seq_len > 1:
         seq_len = int(desired_seq_len)
     else:
         # Hitung panjang minimal deret per wilayah untuk menentukan sequence_length yang aman
-        min_len = df_scaled.groupby('Wilayah').size().min()
+        min_len = df.groupby('Wilayah').size().min()
         seq_len = min(config.SEQUENCE_LENGTH, max(2, int(min_len) - 1))  # butuh minimal 2 titik agar ada target
     if seq_len < 2:
-        print("ERROR: Data per wilayah terlalu pendek untuk membentuk sekuens.")
+        logger.error("Data per wilayah terlalu pendek untuk membentuk sekuens.")
         return tf.data.Dataset.from_tensor_slices(([])), None, None
 
-    print(f"Membuat sekuens tahunan per wilayah dengan panjang {seq_len}...")
-
-    # Bangun dataset per wilayah lalu gabungkan
-    dataset_all = None
-    for wilayah, g in df_scaled.groupby('Wilayah'):
-        g = g.sort_values('Tahun').reset_index(drop=True)
-        X_g = g[numeric_cols].values
-        y_g = g['GagalPanen'].values if (is_training and 'GagalPanen' in g.columns) else None
-
-        # Lewati wilayah yang terlalu pendek
-        if len(X_g) <= seq_len:
-            continue
-
-        ds = timeseries_dataset_from_array(
-            data=X_g,
-            targets=y_g if is_training else None,
-            sequence_length=seq_len,
-            sequence_stride=1,
-            batch_size=(config.BATCH_SIZE if is_training else 1),
-            shuffle=is_training
-        )
-
-        if dataset_all is None:
-            dataset_all = ds
+    logger.debug("Membuat sekuens tahunan per wilayah dengan panjang %s...", seq_len)
+
+    with tracing.span('window', seq_len=seq_len):
+        # df sudah diurutkan global per (Wilayah, Tahun) -> blok wilayah kontigu, jendela dikumpulkan
+        # dengan satu gather (opsional paralel) alih-alih groupby + sort + salin per wilayah
+        window_starts = _region_window_starts(df['Wilayah'].to_numpy(), seq_len)
+        if not len(window_starts):
+            logger.error("Tidak ada wilayah yang memiliki panjang deret memadai untuk sekuens.")
+            return tf.data.Dataset.from_tensor_slices(([])), None, None
+
+        X = gather_windows(np.asarray(scaled_all, dtype=np.float32), window_starts, seq_len)
+        if is_training and label_series is not None:
+            dataset_all = tf.data.Dataset.from_tensor_slices((X, label_series.to_numpy()[window_starts]))
+            # Setara shuffle=True timeseries_dataset_from_array: acak lokal, diulang tiap iterasi
+            dataset_all = dataset_all.shuffle(config.BATCH_SIZE * 8).batch(config.BATCH_SIZE)
         else:
-            dataset_all = dataset_all.concatenate(ds)
+            # Prediksi: urutan temporal dipertahankan, satu jendela per batch
+            dataset_all = tf.data.Dataset.from_tensor_slices(X).batch(1)
 
-    if dataset_all is None:
-        print("ERROR: Tidak ada wilayah yang memiliki panjang deret memadai untuk sekuens.")
-        return tf.data.Dataset.from_tensor_slices(([])), None, None
+    return dataset_all, scaler, (label_series.values if is_training and label_series is not None else None)
+
+def _sliding_windows(values: np.ndarray, seq_len: int) -> np.ndarray:
+    """Membentuk jendela (n - seq_len + 1, seq_len, ...) tanpa loop Python.
+
+    Hasilnya adalah view read-only; panggil np.ascontiguousarray jika perlu disalin.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(values, seq_len, axis=0)
+    # sliding_window_view menaruh sumbu jendela di akhir -> pindahkan ke posisi 1
+    return np.moveaxis(windows, -1, 1) if values.ndim > 1 else windows
+
+def _region_window_starts(regions: np.ndarray, seq_len: int) -> np.ndarray:
+    """Indeks awal semua jendela (stride 1) dari data yang SUDAH diurutkan per (Wilayah, Tahun).
 
-    return dataset_all, scaler, (label_series.values if is_training and label_series is not None else None)
\ No newline at end of file
+    Batas blok wilayah diambil dari np.unique (blok kontigu setelah sort global), jadi tidak ada
+    groupby/sort per wilayah. Wilayah dengan deret <= seq_len dilewati seperti jalur lama.
+    Urutan hasil: wilayah urut nama, lalu tahun (sama dengan iterasi groupby).
+    """
+    _, starts, counts = np.unique(regions, return_index=True, return_counts=True)
+    keep = counts > seq_len
+    starts, n_windows = starts[keep], counts[keep] - seq_len + 1
+    # Jendela ke-j secara global -> awal blok wilayahnya + posisi di dalam blok
+    first = np.concatenate([[0], np.cumsum(n_windows)[:-1]])
+    return np.repeat(starts - first, n_windows) + np.arange(n_windows.sum())
+
+def gather_windows(values: np.ndarray, window_starts: np.ndarray, seq_len: int, workers: int = None) -> np.ndarray:
+    """Menyalin jendela [n, seq_len, n_features] dari values dengan satu gather NumPy.
+
+    Untuk jumlah jendela besar, gather dibagi ke beberapa thread (np.take melepas GIL) yang
+    masing-masing mengisi potongan array keluaran yang sama.
+    """
+    workers = config.SEQUENCE_BUILD_WORKERS if workers is None else workers
+    out = np.empty((len(window_starts), seq_len) + values.shape[1:], dtype=values.dtype)
+    offsets = np.arange(seq_len)
+
+    def fill(lo, hi):
+        np.take(values, window_starts[lo:hi, None] + offsets, axis=0, out=out[lo:hi])
+
+    if workers <= 1 or len(window_starts) < config.SEQUENCE_PARALLEL_MIN_WINDOWS:
+        fill(0, len(window_starts))
+        return out
+
+    from concurrent.futures import ThreadPoolExecutor
+    bounds = np.linspace(0, len(window_starts), workers + 1, dtype=int)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="windows") as pool:
+        list(pool.map(fill, bounds[:-1], bounds[1:]))
+    return out
+
+def build_kesimpulan_windows(kesimpulan_path: str = None, seq_len: int = None, scaler=None, with_years: bool = False,
+                             horizons=None):
+    """Membangun seluruh jendela pelatihan dari data kesimpulan sebagai array NumPy.
+
+    Semantik sama dengan load_kesimpulan_sequences(is_training=True): sekuens per wilayah,
+    stride 1, dan label jendela adalah label pada indeks awal jendela. Bedanya, hasil
+    dikembalikan sebagai array (bukan tf.data) agar bisa disimpan ke .npy dan dibagikan
+    antar proses (misal, worker tuning) via memory-map.
+
+    scaler: jika diberikan (misal, fine-tuning model lama) hanya transform, tanpa fit ulang.
+    with_years: tambahkan tahun terakhir tiap jendela sebagai elemen kelima (untuk high-water mark).
+    horizons: daftar horizon (tahun) untuk model multi-horizon; y[:, j] = label pada tahun
+        terakhir jendela + horizons[j]. Hanya jendela yang semua target horizonnya ada yang dipakai.
+
+    Mengembalikan: (X [n, seq_len, n_features] float32, y [n] atau [n, n_horizons] int8, scaler,
+    feature_names[, end_years [n]])
+    """
+    if kesimpulan_path is None:
+        kesimpulan_path = config.KESIMPULAN_PATH
+
+    print(f"Memuat data kesimpulan dari: {kesimpulan_path}")
+    if not os.path.exists(kesimpulan_path):
+        raise FileNotFoundError(f"File data kesimpulan tidak ditemukan: {kesimpulan_path}")
+
+    df = pd.read_csv(kesimpulan_path).rename(columns={
+        'kabupaten_kota': 'Wilayah',
+        'tahun': 'Tahun',
+        'label_gagal': 'GagalPanen'
+    })
+    for col in ['Wilayah', 'Tahun', 'GagalPanen']:
+        if col not in df.columns:
+            raise ValueError(f"Kolom wajib '{col}' tidak ada pada data kesimpulan.")
+
+    df = df.sort_values(['Wilayah', 'Tahun']).reset_index(drop=True)
+    feature_df = df.drop(columns=['Wilayah', 'Tahun', 'GagalPanen', 'status_panen'], errors='ignore')
+    feature_names = feature_df.select_dtypes(include=[np.number]).columns.tolist()
+
+    if scaler is None:
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaled_all = scaler.fit_transform(df[feature_names]).astype(np.float32)
+    else:
+        scaled_all = scaler.transform(df[feature_names]).astype(np.float32)
+    labels_all = df['GagalPanen'].to_numpy(dtype=np.int8)
+    years_all = df['Tahun'].to_numpy()
+
+    if seq_len is None:
+        min_len = df.groupby('Wilayah').size().min()
+        seq_len = min(config.SEQUENCE_LENGTH, max(2, int(min_len) - 1))
+    if seq_len < 2:
+        raise ValueError("Data per wilayah terlalu pendek untuk membentuk sekuens.")
+
+    print(f"Membuat jendela tahunan per wilayah dengan panjang {seq_len}...")
+    # Multi-horizon: deret harus cukup panjang untuk jendela + target terjauh
+    horizons = np.asarray(horizons, dtype=int) if horizons else None
+    span = seq_len if horizons is None else seq_len + int(horizons.max())
+    window_starts = _region_window_starts(df['Wilayah'].to_numpy(), span)
+    if not len(window_starts):
+        raise ValueError("Tidak ada wilayah yang memiliki panjang deret memadai untuk sekuens.")
+
+    X = gather_windows(scaled_all, window_starts, seq_len)
+    if horizons is None:
+        y = labels_all[window_starts]
+    else:
+        y = labels_all[(window_starts + seq_len - 1)[:, None] + horizons]
+    if with_years:
+        return X, y, scaler, feature_names, years_all[window_starts + seq_len - 1]
+    return X, y, scaler, feature_names
+
+def build_latest_windows(scaler, seq_len: int, kesimpulan_path: str = None):
+    """Jendela inferensi terbaru (seq_len tahun terakhir) untuk SEMUA wilayah sekaligus.
+
+    Setara dengan mengambil sekuens terakhir load_kesimpulan_sequences(is_training=False,
+    region_filter=wilayah) per wilayah, tetapi dengan satu transform scaler dan satu gather
+    NumPy sehingga seluruh wilayah bisa diskor dalam satu model.predict. Wilayah dengan
+    deret <= seq_len dilewati, sama seperti jalur live.
+
+    Mengembalikan: (regions [n] list nama kesimpulan, X [n, seq_len, n_features] float32)
+    """
+    kesimpulan_path = kesimpulan_path or config.KESIMPULAN_PATH
+    df = pd.read_csv(kesimpulan_path).rename(columns={
+        'kabupaten_kota': 'Wilayah',
+        'tahun': 'Tahun',
+        'label_gagal': 'GagalPanen'
+    })
+    df = df.sort_values(['Wilayah', 'Tahun']).reset_index(drop=True)
+    feature_df = df.drop(columns=['Wilayah', 'Tahun', 'GagalPanen', 'status_panen'], errors='ignore')
+    feature_df = feature_df[feature_df.select_dtypes(include=[np.number]).columns]
+    scaled_all = scaler.transform(feature_df).astype(np.float32)
+
+    # Batas blok per wilayah dari data terurut: akhir blok = awal blok berikutnya
+    regions, starts, counts = np.unique(df['Wilayah'].to_numpy(), return_index=True, return_counts=True)
+    keep = counts > seq_len
+    ends = starts[keep] + counts[keep]
+    X = scaled_all[(ends - seq_len)[:, None] + np.arange(seq_len)]
+    return regions[keep].tolist(), X
@@ -0,0 +1,183 @@
+"""
+Tahap evaluasi & kalibrasi threshold untuk model GRU.
+
+Skor validasi dihitung dalam satu forward pass tervektorisasi, lalu threshold dipilih dari
+kurva ROC / precision-recall dengan objektif berbasis recall (peringatan dini lebih
+mengutamakan menangkap gagal panen). Artefak model, scaler, dan config ditulis ke direktori
+versi baru lalu diaktifkan dengan satu penggantian pointer, sehingga threshold selalu sesuai
+dengan model yang tersimpan.
+"""
+import os
+import json
+import uuid
+import shutil
+from datetime import datetime
+from typing import Tuple
+
+import joblib
+import numpy as np
+import tensorflow as tf
+from sklearn.metrics import (
+    classification_report,
+    confusion_matrix,
+    precision_recall_curve,
+    roc_auc_score,
+    roc_curve,
+)
+
+import config
+
+def collect_windows(dataset) -> Tuple[np.ndarray, np.ndarray]:
+    """Menggabungkan batch tf.data (x, y) menjadi dua array NumPy."""
+    xs, ys = [], []
+    for x, y in dataset:
+        xs.append(x.numpy())
+        ys.append(y.numpy())
+    if not xs:
+        return np.empty((0,)), np.empty((0,))
+    return np.concatenate(xs, axis=0), np.concatenate(ys, axis=0).ravel()
+
+def score_windows(model, X: np.ndarray) -> np.ndarray:
+    """Skor probabilitas untuk seluruh jendela dalam satu pemanggilan model (tanpa loop batch Python)."""
+    if len(X) == 0:
+        return np.empty((0,), dtype=np.float32)
+    return np.asarray(model(tf.convert_to_tensor(X, dtype=tf.float32), training=False)).ravel()
+
+def sweep_thresholds(y_true: np.ndarray, y_score: np.ndarray) -> dict:
+    """Menyapu kandidat threshold dari kurva precision-recall dan ROC sekaligus.
+
+    Kandidat adalah threshold dari precision_recall_curve; TPR/FPR untuk tiap kandidat
+    diambil dari roc_curve via searchsorted (keduanya menggunakan titik skor unik yang sama).
+    """
+    precision, recall, pr_thresholds = precision_recall_curve(y_true, y_score)
+    fpr, tpr, roc_thresholds = roc_curve(y_true, y_score, drop_intermediate=False)
+
+    # roc_thresholds menurun; balik agar bisa dicari dengan searchsorted
+    roc_asc = roc_thresholds[::-1]
+    pos = np.searchsorted(roc_asc, pr_thresholds, side='left')
+    pos = np.clip(pos, 0, len(roc_asc) - 1)
+    roc_idx = len(roc_asc) - 1 - pos
+
+    precision, recall = precision[:-1], recall[:-1]  # elemen terakhir tidak punya threshold
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    return {
+        'threshold': pr_thresholds,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'tpr': tpr[roc_idx],
+        'fpr': fpr[roc_idx],
+    }
+
+def select_recall_threshold(y_true: np.ndarray, y_score: np.ndarray, target_recall: float = None) -> dict:
+    """Memilih threshold dengan objektif berbasis recall.
+
+    Di antara threshold yang mencapai recall >= target_recall, pilih yang presisinya
+    tertinggi (threshold tertinggi jika seri). Jika tidak ada yang mencapai target,
+    pilih threshold dengan recall tertinggi.
+    """
+    target_recall = config.TARGET_RECALL if target_recall is None else target_recall
+    y_true = np.asarray(y_true).astype(int)
+    if len(y_true) == 0 or len(np.unique(y_true)) < 2:
+        return {'threshold': config.OPTIMAL_THRESHOLD, 'target_recall': target_recall,
+                'note': 'Validasi hanya berisi satu kelas; threshold default dipakai'}
+
+    sweep = sweep_thresholds(y_true, y_score)
+    meets = sweep['recall'] >= target_recall
+    if meets.any():
+        candidates = np.flatnonzero(meets)
+        # lexsort: kunci terakhir = utama -> presisi maksimum, lalu threshold maksimum
+        best = candidates[np.lexsort((sweep['threshold'][candidates], sweep['precision'][candidates]))[-1]]
+    else:
+        best = int(np.argmax(sweep['recall']))
+
+    return {
+        'threshold': float(np.clip(sweep['threshold'][best], 0.0, 1.0)),
+        'target_recall': target_recall,
+        'precision': float(sweep['precision'][best]),
+        'recall': float(sweep['recall'][best]),
+        'f1': float(sweep['f1'][best]),
+        'tpr': float(sweep['tpr'][best]),
+        'fpr': float(sweep['fpr'][best]),
+        'roc_auc': float(roc_auc_score(y_true, y_score)),
+        'n_candidates': int(len(sweep['threshold'])),
+        'n_val': int(len(y_true)),
+    }
+
+def score_dataset(model, dataset) -> Tuple[np.ndarray, np.ndarray]:
+    """(label, skor) dari tf.data (x, y) per batch; hanya skor yang disimpan, bukan jendelanya."""
+    ys, scores = [], []
+    for x, y in dataset:
+        scores.append(np.asarray(model(x, training=False)).ravel())
+        ys.append(np.asarray(y).ravel())
+    if not ys:
+        return np.empty((0,)), np.empty((0,), dtype=np.float32)
+    return np.concatenate(ys), np.concatenate(scores)
+
+def calibrate_threshold(model, X_val: np.ndarray, y_val: np.ndarray, target_recall: float = None) -> dict:
+    """Tahap evaluasi: skor validasi sekali jalan -> sapu threshold -> laporan kalibrasi."""
+    return calibrate_scores(y_val, score_windows(model, X_val), target_recall)
+
+def calibrate_scores(y_val: np.ndarray, y_score: np.ndarray, target_recall: float = None) -> dict:
+    """Seperti calibrate_threshold, untuk skor yang sudah dihitung (misal, dari score_dataset)."""
+    calibration = select_recall_threshold(y_val, y_score, target_recall)
+
+    y_true = np.asarray(y_val).astype(int)
+    if len(y_true) > 0:
+        y_pred = (y_score >= calibration['threshold']).astype(int)
+        print(f"Threshold terkalibrasi: {calibration['threshold']:.4f} (target recall {calibration['target_recall']})")
+        print(confusion_matrix(y_true, y_pred, labels=[0, 1]))
+        print(classification_report(y_true, y_pred, labels=[0, 1], target_names=['Normal', 'Gagal Panen'], zero_division=0))
+    return calibration
+
+def calibrate_horizons(model, X_val: np.ndarray, y_val: np.ndarray, horizons, target_recall: float = None) -> list:
+    """Kalibrasi per horizon untuk model multi-horizon: satu forward pass, threshold per kolom output."""
+    if len(X_val) == 0:
+        scores = np.empty((0, len(horizons)), dtype=np.float32)
+    else:
+        scores = np.asarray(model(tf.convert_to_tensor(X_val, dtype=tf.float32), training=False))
+    calibrations = []
+    for j, horizon in enumerate(horizons):
+        print(f"\nHorizon +{horizon} tahun:")
+        calibrations.append({'horizon': int(horizon), **calibrate_scores(y_val[:, j], scores[:, j], target_recall)})
+    return calibrations
+
+def _fsync_write_json(path: str, payload: dict):
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+def save_artifacts_atomic(model, scaler, model_config: dict) -> str:
+    """Menyimpan model, scaler, dan config (termasuk optimal_threshold) sebagai satu versi.
+
+    Ketiga file ditulis ke direktori sementara, direktori di-os.replace menjadi
+    config.ARTIFACTS_DIR/<versi>, lalu file pointer CURRENT diganti secara atomik. Pembaca
+    (model_registry) menentukan versi dari satu pembacaan pointer, jadi tidak pernah memuat
+    model baru dengan threshold/sequence_length lama atau sebaliknya. Versi lama dipangkas
+    hingga config.ARTIFACT_KEEP_VERSIONS. Mengembalikan direktori versi baru.
+    """
+    import model_registry
+
+    root = config.ARTIFACTS_DIR
+    version = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:6]}"
+    tmp_dir = os.path.join(root, f"{version}.tmp")
+    os.makedirs(tmp_dir)
+    model.save(os.path.join(tmp_dir, os.path.basename(config.MODEL_PATH)))
+    joblib.dump(scaler, os.path.join(tmp_dir, os.path.basename(config.SCALER_PATH)))
+    _fsync_write_json(os.path.join(tmp_dir, os.path.basename(config.CONFIG_PATH)), model_config)
+    directory = os.path.join(root, version)
+    os.replace(tmp_dir, directory)
+
+    pointer = os.path.join(root, model_registry.POINTER)
+    _fsync_write_json(f"{pointer}.tmp", {'version': version})
+    os.replace(f"{pointer}.tmp", pointer)
+
+    # Nama versi diawali timestamp -> urutan leksikografis = urutan waktu
+    old = sorted(d for d in os.listdir(root)
+                 if d != version and not d.endswith('.tmp') and os.path.isdir(os.path.join(root, d)))
+    for d in old[:max(0, len(old) - (config.ARTIFACT_KEEP_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(root, d), ignore_errors=True)
+    return directory
@@ -0,0 +1,289 @@
+"""
+Registry metrik in-process dengan format teks Prometheus (exposition format 0.0.4).
+
+Sengaja tanpa dependensi tambahan: cukup Counter, Gauge, dan Histogram berlabel yang
+thread-safe, lalu render() dipanggil oleh endpoint /metrics di api/main.py.
+
+Registry hidup per proses. Dengan beberapa worker uvicorn (api/serve.py) setiap scrape dijawab
+oleh satu worker saja, jadi enable_multiprocess(dir) dipanggil di setiap worker: state proses
+ditulis berkala ke <dir>/<pid>.json dan render() menggabungkan file semua worker (counter &
+histogram dijumlahkan, termasuk dari worker yang sudah berhenti; gauge hanya dari worker yang
+masih hidup). Angka worker lain bisa tertinggal paling lama satu interval flush.
+
+Contoh:
+    metrics.REQUESTS.inc(endpoint='/predict', method='POST', status='200')
+    with metrics.INFERENCE_SECONDS.time():
+        model.predict(...)
+"""
+import os
+import json
+import math
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+
+# Bucket latensi default (detik): dari cache hit hingga inferensi dingin
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+class _Metric:
+    kind = None
+    # Penggabungan nilai antarworker (mode multi-proses): 'sum' atau 'max'
+    multiprocess_mode = 'sum'
+    # True: nilai dari worker yang sudah berhenti tidak lagi berlaku
+    live_only = False
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        if not self.labelnames and self.kind != 'histogram':
+            self._values[()] = 0.0  # metrik tanpa label selalu punya sampel
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Label untuk {self.name} harus {self.labelnames}, didapat {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _items(self) -> list:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def _combine(self, a, b):
+        return a + b if self.multiprocess_mode == 'sum' else max(a, b)
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self, items=None) -> list:
+        items = self._items() if items is None else items
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    live_only = True
+
+    def __init__(self, name: str, documentation: str, labelnames=(), multiprocess_mode: str = 'sum'):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    render = Counter.render
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _items(self) -> list:
+        with self._lock:
+            return sorted((k, [[*s[0]], s[1], s[2]]) for k, s in self._values.items())
+
+    def _combine(self, a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]]
+
+    def render(self, items=None) -> list:
+        items = self._items() if items is None else items
+        lines = self._header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = _format_labels(self.labelnames, key, extra=[('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {n}")
+        return lines
+
+_REGISTRY = []
+
+def _register(metric):
+    _REGISTRY.append(metric)
+    return metric
+
+# --- Metrik API ---
+REQUESTS = _register(Counter(
+    'ml_http_requests_total', 'Jumlah request HTTP per endpoint.', ('endpoint', 'method', 'status')))
+REQUEST_SECONDS = _register(Histogram(
+    'ml_http_request_duration_seconds', 'Latensi request HTTP per endpoint.', ('endpoint', 'method')))
+EXECUTOR_QUEUE_DEPTH = _register(Gauge(
+    'ml_executor_queue_depth', 'Pekerjaan inferensi yang menunggu slot executor.'))
+EXECUTOR_IN_FLIGHT = _register(Gauge(
+    'ml_executor_in_flight', 'Pekerjaan inferensi yang sedang berjalan di executor.'))
+
+# --- Metrik pipeline prediksi ---
+INFERENCE_SECONDS = _register(Histogram(
+    'ml_model_inference_seconds', 'Durasi model.predict per request.'))
+DATA_LOAD_SECONDS = _register(Histogram(
+    'ml_data_load_seconds', 'Durasi pemuatan data (kesimpulan + cuaca) per request.', ('source',)))
+CACHE_REQUESTS = _register(Counter(
+    'ml_cache_requests_total', 'Lookup cache per cache dan hasil (hit/miss).', ('cache', 'result')))
+
+# --- Versi artefak yang sedang dilayani (nilai selalu 1, informasi di label) ---
+MODEL_INFO = _register(Gauge(
+    'ml_model_info', 'Versi model yang dimuat.', ('model_version', 'threshold'), multiprocess_mode='max'))
+DATASET_INFO = _register(Gauge(
+    'ml_dataset_info', 'Versi data yang dilayani.', ('dataset', 'version'), multiprocess_mode='max'))
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+def cache_hit_ratios(items=None) -> dict:
+    """Rasio hit per cache, dihitung dari CACHE_REQUESTS (atau items hasil gabungan antarworker)."""
+    totals = {}
+    for (cache, result), v in (CACHE_REQUESTS._items() if items is None else items):
+        hit, total = totals.get(cache, (0.0, 0.0))
+        totals[cache] = (hit + (v if result == 'hit' else 0.0), total + v)
+    return {cache: (hit / total if total else 0.0) for cache, (hit, total) in totals.items()}
+
+# --- Agregasi antarworker ---
+_multiprocess = {'dir': None}
+
+def enable_multiprocess(directory: str, interval: float = 5.0):
+    """Mulai menulis state proses ini ke <directory>/<pid>.json (saat ini, tiap interval, dan saat keluar)."""
+    if _multiprocess['dir'] is not None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    _multiprocess['dir'] = directory
+    flush()
+    atexit.register(flush)
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            flush()
+
+    threading.Thread(target=loop, name='metrics-flush', daemon=True).start()
+
+def flush():
+    directory = _multiprocess['dir']
+    if directory is None:
+        return
+    state = {m.name: [[list(key), value] for key, value in m._items()] for m in _REGISTRY}
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _collect() -> dict:
+    """{nama metrik: [(label, nilai)]} digabung dari file state semua worker."""
+    flush()
+    by_name = {m.name: m for m in _REGISTRY}
+    merged = {name: {} for name in by_name}
+    directory = _multiprocess['dir']
+    for filename in os.listdir(directory):
+        pid, ext = os.path.splitext(filename)
+        if ext != '.json' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        alive = _alive(int(pid))
+        for name, items in state.items():
+            metric = by_name.get(name)
+            if metric is None or (metric.live_only and not alive):
+                continue
+            values = merged[name]
+            for key, value in items:
+                key = tuple(key)
+                values[key] = value if key not in values else metric._combine(values[key], value)
+    return {name: sorted(values.items()) for name, values in merged.items()}
+
+def render() -> str:
+    collected = _collect() if _multiprocess['dir'] is not None else {}
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render(collected.get(metric.name)))
+    # Rasio hit sebagai gauge turunan agar langsung bisa dipakai di dashboard
+    lines.append("# HELP ml_cache_hit_ratio Rasio hit per cache sejak proses (semua worker) dimulai.")
+    lines.append("# TYPE ml_cache_hit_ratio gauge")
+    for cache, ratio in sorted(cache_hit_ratios(collected.get(CACHE_REQUESTS.name)).items()):
+        lines.append(f'ml_cache_hit_ratio{{cache="{_escape(cache)}"}} {_format_value(ratio)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,285 @@
+"""
+Tabel aturan deklaratif untuk rekomendasi mitigasi.
+
+Setiap dimensi (risiko, suhu, kelembapan, curah hujan, angin, cuaca ekstrem, perawatan rutin)
+berisi daftar kasus berurutan: kasus pertama yang kondisinya terpenuhi dipakai (setara
+if/elif/else). Kondisi dievaluasi terhadap konteks yang dibentuk dari WeatherProfile.
+
+Tabel dikompilasi sekali: kombinasi kasus yang terpilih membentuk "bucket" profil, dan
+template seksi per (level risiko, bucket) di-cache. Per request hanya tersisa evaluasi kondisi
+dan pengisian angka ke template; hasilnya seksi terstruktur yang diratakan menjadi daftar
+mitigation_recommendations (to_flat_list).
+"""
+from functools import lru_cache
+
+from weather_profile import WeatherProfile
+
+# Level item: 0 -> "- teks", 1 -> "  • teks" (sub-item)
+ITEM, SUBITEM = 0, 1
+
+def _items(*texts, level=ITEM):
+    return tuple((level, text) for text in texts)
+
+def _has(key):
+    return lambda c: c[key] is not None
+
+def _always(_c):
+    return True
+
+# Struktur: (dimensi, ((kunci_kasus, kondisi, seksi), ...))
+# seksi: 'header' = template baris judul (format daftar datar), 'items' = item statis,
+#        'groups' = item bersyarat [(kunci, kondisi, item)], dievaluasi semuanya (bukan elif).
+MITIGATION_RULES = (
+    ('risiko', (
+        ('tinggi', lambda c: c['risk_level'] == "Tinggi" or c['probability'] >= 0.7, {
+            'header': "[ALERT] TINDAKAN SEGERA DIPERLUKAN",
+            'items': _items(
+                "Tingkatkan monitoring lahan secara intensif (setiap 2-3 hari)",
+                "Siapkan sistem drainase darurat untuk mengatasi genangan air",
+                "Pertimbangkan memanen lebih awal jika tanaman sudah cukup matang",
+                "Hubungi dinas pertanian setempat untuk bantuan teknis",
+                "Pertimbangkan asuransi pertanian untuk melindungi kerugian",
+            ),
+        }),
+        ('sedang', lambda c: c['risk_level'] == "Sedang" or 0.5 <= c['probability'] < 0.7, {
+            'header': "[NOTICE] PERHATIAN KHUSUS DIPERLUKAN",
+            'items': _items(
+                "Monitor kondisi lahan secara rutin (setiap minggu)",
+                "Pastikan sistem irigasi dan drainase berfungsi dengan baik",
+                "Lakukan pemupukan sesuai jadwal dan dosis yang tepat",
+                "Waspada terhadap hama dan penyakit tanaman",
+                "Siapkan rencana cadangan jika kondisi memburuk",
+            ),
+        }),
+        ('rendah', _always, {
+            'header': "[INFO] KONDISI NORMAL - PERAWATAN RUTIN",
+            'items': (),
+        }),
+    )),
+    ('suhu', (
+        ('tinggi', lambda c: c['avg_temperature'] is not None and c['avg_temperature'] > 32, {
+            'header': "\n🌡️ REKOMENDASI BERDASARKAN SUHU TINGGI ({avg_temperature:.1f}°C):",
+            'items': _items(
+                "Lakukan penyiraman lebih sering pada pagi dan sore hari",
+                "Gunakan mulsa untuk mengurangi penguapan air",
+                "Pertimbangkan naungan sementara untuk mengurangi stress panas",
+                "Hindari pemupukan pada siang hari, lakukan pagi atau sore",
+                "Pantau kelembapan tanah lebih intensif",
+            ),
+        }),
+        ('rendah', lambda c: c['avg_temperature'] is not None and c['avg_temperature'] < 22, {
+            'header': "\n🌡️ REKOMENDASI BERDASARKAN SUHU RENDAH ({avg_temperature:.1f}°C):",
+            'items': _items(
+                "Lakukan pemupukan dengan Nitrogen untuk meningkatkan ketahanan dingin",
+                "Gunakan varietas padi yang tahan suhu rendah",
+                "Pertimbangkan penanaman lebih dalam untuk melindungi akar",
+                "Pantau perkembangan tanaman lebih ketat karena pertumbuhan lebih lambat",
+            ),
+        }),
+        ('optimal', _has('avg_temperature'), {
+            'header': "\n🌡️ SUHU OPTIMAL ({avg_temperature:.1f}°C):",
+            'items': _items(
+                "Suhu dalam kisaran optimal untuk pertumbuhan padi",
+                "Lanjutkan perawatan rutin sesuai jadwal",
+            ),
+        }),
+    )),
+    ('kelembapan', (
+        ('tinggi', lambda c: c['avg_humidity'] is not None and (c['avg_humidity'] > 85 or c['high_humidity_days'] > c['n_rows'] * 0.3), {
+            'header': "\n💧 REKOMENDASI BERDASARKAN KELEMBAPAN TINGGI ({avg_humidity:.1f}%):",
+            'items': _items(
+                "Waspada terhadap penyakit jamur (Blast, Brown Spot)",
+                "Gunakan fungisida preventif dengan bahan aktif Tricyclazole atau Isoprothiolane",
+                "Pastikan jarak tanam tidak terlalu rapat (gunakan sistem Jajar Legowo 2:1)",
+                "Lakukan pemangkasan daun yang terlalu rimbun untuk sirkulasi udara",
+                "Hindari pemupukan Nitrogen berlebihan yang meningkatkan kelembapan",
+                "Monitor gejala penyakit setiap 3-5 hari",
+            ),
+        }),
+        ('rendah', lambda c: c['avg_humidity'] is not None and c['avg_humidity'] < 60, {
+            'header': "\n💧 REKOMENDASI BERDASARKAN KELEMBAPAN RENDAH ({avg_humidity:.1f}%):",
+            'items': _items(
+                "Tingkatkan frekuensi penyiraman untuk menjaga kelembapan tanah",
+                "Gunakan mulsa untuk mempertahankan kelembapan",
+                "Waspada terhadap hama seperti Wereng Batang Coklat (WBC) yang menyukai kondisi kering",
+                "Pertimbangkan irigasi tetes untuk efisiensi air",
+            ),
+        }),
+        ('normal', _has('avg_humidity'), {
+            'header': "\n💧 KELEMBAPAN NORMAL ({avg_humidity:.1f}%):",
+            'items': _items("Kelembapan dalam kisaran optimal"),
+        }),
+    )),
+    ('curah_hujan', (
+        ('tinggi', lambda c: c['avg_rainfall'] is not None and (c['avg_rainfall'] > 20 or c['extreme_rain_days'] > 5), {
+            'header': "\n🌧️ REKOMENDASI BERDASARKAN CURAH HUJAN TINGGI (Rata-rata: {avg_rainfall:.1f}mm/hari, Total: {total_rainfall:.0f}mm):",
+            'items': _items(
+                "Perbaiki dan perlebar saluran drainase di sekitar lahan",
+                "Gunakan varietas padi yang tahan genangan (contoh: Inpari, Ciherang)",
+                "Buat bedengan lebih tinggi untuk menghindari genangan",
+                "Siapkan pompa air untuk mengatasi genangan jika terjadi banjir",
+                "Hindari pemupukan saat hujan lebat, tunggu kondisi lebih kering",
+                "Waspada terhadap penyakit busuk batang akibat genangan",
+            ),
+        }),
+        ('rendah', lambda c: c['avg_rainfall'] is not None and c['avg_rainfall'] < 5 and c['total_rainfall'] < 100, {
+            'header': "\n🌧️ REKOMENDASI BERDASARKAN CURAH HUJAN RENDAH (Rata-rata: {avg_rainfall:.1f}mm/hari, Total: {total_rainfall:.0f}mm):",
+            'items': _items(
+                "Pastikan sistem irigasi berfungsi optimal",
+                "Lakukan penghematan air dengan irigasi berselang (intermittent)",
+                "Gunakan varietas padi yang tahan kekeringan",
+                "Pertimbangkan penanaman lebih awal untuk menghindari puncak musim kering",
+                "Waspada terhadap hama yang menyukai kondisi kering",
+            ),
+        }),
+        ('normal', _has('avg_rainfall'), {
+            'header': "\n🌧️ CURAH HUJAN NORMAL (Rata-rata: {avg_rainfall:.1f}mm/hari):",
+            'items': _items("Curah hujan dalam kisaran normal untuk pertumbuhan padi"),
+        }),
+    )),
+    ('angin', (
+        ('kencang', lambda c: c['avg_wind_speed'] is not None and (c['avg_wind_speed'] > 20 or c['max_wind_speed'] > 40), {
+            'header': "\n💨 REKOMENDASI BERDASARKAN ANGIN KENCANG (Rata-rata: {avg_wind_speed:.1f} km/jam, Maks: {max_wind_speed:.1f} km/jam):",
+            'items': _items(
+                "Tanam tanaman pelindung (windbreak) di sekeliling lahan",
+                "Perkuat struktur penopang tanaman jika diperlukan",
+                "Waspada terhadap risiko rebah (lodging) tanaman",
+                "Pertimbangkan varietas padi yang tahan rebah",
+                "Hindari pemupukan Nitrogen berlebihan yang membuat tanaman lebih rentan rebah",
+            ),
+        }),
+        ('normal', _has('avg_wind_speed'), {
+            'header': "\n💨 KONDISI ANGIN NORMAL ({avg_wind_speed:.1f} km/jam):",
+            'items': _items("Kecepatan angin dalam kisaran normal"),
+        }),
+    )),
+    ('cuaca_ekstrem', (
+        ('ada', lambda c: c['n_event_types'] > 0, {
+            'header': "\n⚠️ REKOMENDASI BERDASARKAN CUACA EKSTREM:",
+            'items': (),
+            'groups': (
+                ('hujan_lebat', lambda c: c['n_hujan_lebat'] > 5,
+                 _items("Hujan Lebat: {n_hujan_lebat} kejadian terdeteksi") + _items(
+                     "Perbaiki saluran drainase untuk mengatasi hujan lebat",
+                     "Hindari penanaman di area yang rawan banjir",
+                     "Gunakan varietas padi yang tahan genangan",
+                     level=SUBITEM)),
+                ('angin_kencang', lambda c: c['n_angin_kencang'] > 3,
+                 _items("Angin Kencang: {n_angin_kencang} kejadian terdeteksi") + _items(
+                     "Tanam tanaman pelindung di sekeliling lahan",
+                     "Perkuat struktur penopang tanaman jika diperlukan",
+                     level=SUBITEM)),
+                ('puting_beliung', lambda c: c['has_puting_beliung'],
+                 _items("Puting Beliung: {n_puting_beliung} kejadian terdeteksi") + _items(
+                     "Waspada terhadap puting beliung, siapkan rencana evakuasi",
+                     "Pastikan struktur bangunan pertanian cukup kuat",
+                     level=SUBITEM)),
+            ),
+        }),
+    )),
+    ('perawatan_rutin', (
+        ('selalu', _always, {
+            'header': "\n📋 PERAWATAN RUTIN LAHAN PADI{region_suffix}:",
+            'items': _items(
+                "Lakukan penyiangan gulma secara berkala",
+                "Pantau ketersediaan air irigasi",
+                "Lakukan pemupukan berimbang (N, P, K) sesuai kondisi lahan",
+                "Kontrol hama dan penyakit dengan pestisida yang tepat",
+                "Gunakan benih berkualitas dan varietas yang sesuai dengan kondisi wilayah",
+                "Lakukan rotasi tanaman untuk menjaga kesuburan tanah",
+                "Terapkan sistem tanam jajar legowo untuk hasil optimal",
+            ),
+        }),
+    )),
+)
+
+class _Template:
+    """String yang hanya di-format jika mengandung placeholder (ditentukan saat kompilasi)."""
+    __slots__ = ('text', 'dynamic')
+
+    def __init__(self, text):
+        self.text = text
+        self.dynamic = '{' in text
+
+    def render(self, ctx):
+        return self.text.format(**ctx) if self.dynamic else self.text
+
+def _compile(rules):
+    """Mengubah tabel aturan menjadi indeks {(dimensi, kasus): seksi terkompilasi}."""
+    index = {}
+    for dimension, cases in rules:
+        for case_key, _cond, section in cases:
+            groups = {
+                group_key: tuple((level, _Template(text)) for level, text in items)
+                for group_key, _gcond, items in section.get('groups', ())
+            }
+            index[(dimension, case_key)] = {
+                'header': _Template(section['header']),
+                'items': tuple((level, _Template(text)) for level, text in section['items']),
+                'groups': groups,
+            }
+    return index
+
+_COMPILED = _compile(MITIGATION_RULES)
+
+def _context(probability: float, risk_level: str, profile: WeatherProfile, region_name: str = None) -> dict:
+    events = profile.event_counts
+    return {
+        **profile.metrics,
+        'probability': probability,
+        'risk_level': risk_level,
+        'n_rows': profile.n_rows,
+        'n_event_types': len(events),
+        'n_hujan_lebat': int(events.get('Hujan Lebat', 0)),
+        'n_angin_kencang': int(events.get('Angin Kencang', 0)),
+        'n_puting_beliung': int(events.get('Puting Beliung', 0)),
+        'has_puting_beliung': 'Puting Beliung' in events,
+        'region_suffix': f" - {region_name}" if region_name else "",
+    }
+
+def profile_bucket(ctx: dict) -> tuple:
+    """Kunci bucket: kasus terpilih per dimensi (+ grup bersyarat yang aktif)."""
+    bucket = []
+    for dimension, cases in MITIGATION_RULES:
+        for case_key, cond, section in cases:
+            if cond(ctx):
+                active = tuple(g_key for g_key, g_cond, _items in section.get('groups', ()) if g_cond(ctx))
+                bucket.append((dimension, case_key, active))
+                break
+    return tuple(bucket)
+
+@lru_cache(maxsize=1024)
+def _sections_for_bucket(bucket: tuple) -> tuple:
+    """Template seksi untuk satu bucket (di-cache; bucket sudah mencakup level risiko)."""
+    sections = []
+    for dimension, case_key, active in bucket:
+        compiled = _COMPILED[(dimension, case_key)]
+        items = compiled['items'] + tuple(item for g_key in active for item in compiled['groups'][g_key])
+        sections.append((dimension, compiled['header'], items))
+    return tuple(sections)
+
+def evaluate(probability: float, risk_level: str, profile: WeatherProfile, region_name: str = None) -> list:
+    """Mengevaluasi aturan dan mengembalikan seksi terstruktur.
+
+    Setiap seksi: {'key', 'header' (baris judul format daftar datar), 'subtitle', 'items': [(level, teks)]}
+    """
+    ctx = _context(probability, risk_level, profile, region_name)
+    sections = []
+    for dimension, header, items in _sections_for_bucket(profile_bucket(ctx)):
+        header_text = header.render(ctx)
+        sections.append({
+            'key': dimension,
+            'header': header_text,
+            'subtitle': header_text.strip().rstrip(':'),
+            'items': [(level, tpl.render(ctx)) for level, tpl in items],
+        })
+    return sections
+
+def to_flat_list(sections: list) -> list:
+    """Format daftar string datar (kontrak lama mitigation_recommendations)."""
+    lines = []
+    for section in sections:
+        lines.append(section['header'])
+        for level, text in section['items']:
+            lines.append(f"- {text}" if level == ITEM else f"  • {text}")
+    return lines
@@ -1,10 +1,14 @@
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import GRU, Dense, Dropout, Input
-from keras_tuner import HyperParameters
+from keras_tuner import HyperModel, HyperParameters
 
-def build_model(input_shape, hp=None):
-    """Membangun arsitektur model GRU yang dapat dituning."""
+def build_model(input_shape, hp=None, n_outputs=1):
+    """Membangun arsitektur model GRU yang dapat dituning.
+
+    n_outputs > 1: satu sigmoid per horizon prediksi (model multi-horizon), semua horizon
+    keluar dari satu forward pass.
+    """
     
     # Gunakan HyperParameters default jika tidak disediakan (untuk pelatihan akhir)
     if hp is None:
@@ -35,8 +39,8 @@ def build_model(input_shape, hp=None):
     model.add(Dropout(hp.Float('dropout_2', 0.1, 0.4, step=0.1)))
     
     # Output Layer
-    # 'sigmoid' untuk klasifikasi biner (GagalPanen ya/tidak)
-    model.add(Dense(1, activation='sigmoid'))
+    # 'sigmoid' untuk klasifikasi biner (GagalPanen ya/tidak), satu unit per horizon
+    model.add(Dense(n_outputs, activation='sigmoid'))
     
     # Compile Model
     model.compile(
@@ -49,6 +53,21 @@ def build_model(input_shape, hp=None):
     
     return model
 
-def build_tuner_model(hp):
-    """Fungsi wrapper untuk KerasTuner."""
-    raise NotImplementedError("Gunakan kelas HyperModel di train.py untuk input_shape dinamis")
\ No newline at end of file
+class GRUHyperModel(HyperModel):
+    """Wrapper build_model untuk KerasTuner dengan input_shape dinamis."""
+    def __init__(self, input_shape, n_outputs=1):
+        super().__init__()
+        self.input_shape = tuple(input_shape)
+        self.n_outputs = n_outputs
+
+    def build(self, hp):
+        return build_model(self.input_shape, hp, n_outputs=self.n_outputs)
+
+def search_space() -> HyperParameters:
+    """Mendaftarkan ruang pencarian build_model tanpa menyimpan model yang dibangun."""
+    hp = HyperParameters()
+    # input_shape tidak memengaruhi ruang pencarian; cukup bentuk minimal yang valid
+    tf.keras.backend.clear_session()
+    build_model((2, 1), hp)
+    tf.keras.backend.clear_session()
+    return hp
@@ -0,0 +1,133 @@
+"""
+Registry artefak model (model Keras, scaler, model_config) untuk proses serving.
+
+Artefak dimuat sekali dan dipakai ulang lintas request. evaluate.save_artifacts_atomic menulis
+ketiga file ke direktori versi baru di config.ARTIFACTS_DIR lalu mengganti satu file pointer
+(CURRENT) secara atomik; versi artefak = nama direktori yang ditunjuk pointer, jadi model,
+scaler, dan config selalu dimuat sebagai satu set. Setiap akses hanya melakukan os.stat pada
+pointer. Tanpa pointer (artefak lama), path tetap config.MODEL_PATH dkk. dengan versi dari
+metadata file. /health membaca state() tanpa menyentuh disk.
+"""
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+import joblib
+
+import config
+import metrics
+
+_ARTIFACT_PATHS = (config.MODEL_PATH, config.SCALER_PATH, config.CONFIG_PATH)
+POINTER = 'CURRENT'
+
+_lock = threading.Lock()
+_state = {
+    'artifacts': None,   # (model, scaler, model_config)
+    'version': None,
+    'loaded_at': None,
+    'last_error': None,
+}
+
+# Isi pointer per proses: (inode, mtime pointer) -> nama direktori versi
+_pointer = {'key': None, 'version': None}
+
+def _pointer_version(root: str = None):
+    pointer = os.path.join(root or config.ARTIFACTS_DIR, POINTER)
+    try:
+        st = os.stat(pointer)
+        key = (st.st_ino, st.st_mtime_ns)  # os.replace selalu membuat inode baru
+    except OSError:
+        return None
+    if _pointer['key'] != key:
+        with open(pointer, 'r', encoding='utf-8') as f:
+            _pointer.update(key=key, version=json.load(f)['version'])
+    return _pointer['version']
+
+def _resolve() -> tuple:
+    """(versi, (model, scaler, config)) dari SATU pembacaan pointer agar keduanya konsisten."""
+    version = _pointer_version()
+    if version is None:
+        return _file_version(_ARTIFACT_PATHS), _ARTIFACT_PATHS
+    directory = os.path.join(config.ARTIFACTS_DIR, version)
+    return version, tuple(os.path.join(directory, os.path.basename(p)) for p in _ARTIFACT_PATHS)
+
+def artifact_paths() -> tuple:
+    """Path (model, scaler, config) dari versi artefak aktif."""
+    return _resolve()[1]
+
+def artifacts_version() -> str:
+    """Versi artefak aktif: nama direktori versi, atau metadata file untuk artefak lama."""
+    return _resolve()[0]
+
+def _file_version(paths) -> str:
+    """Versi dari metadata file (ukuran + mtime); 'missing' jika ada yang belum ada."""
+    parts = []
+    for path in paths:
+        if not os.path.exists(path):
+            return "missing"
+        st = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+def _load(use_snapshot: bool = True, paths: tuple = None, version: str = None):
+    if paths is None:
+        version, paths = _resolve()
+    model_path, scaler_path, config_path = paths
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model tidak ditemukan di {model_path}. Jalankan train.py terlebih dahulu.")
+
+    # Mode multi-worker: bobot dari snapshot mmap (forward pass NumPy), TensorFlow tidak dimuat
+    model = None
+    if use_snapshot and config.SERVING_SNAPSHOT_ENABLED:
+        import serving_snapshot
+        snapshot = serving_snapshot.current(model_version=version, require_data=False)
+        if snapshot is not None:
+            model = snapshot.model
+    if model is None:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(model_path)
+    scaler = joblib.load(scaler_path)
+
+    with open(config_path, 'r') as f:
+        model_config = json.load(f)
+
+    return model, scaler, model_config
+
+def get_artifacts():
+    """(model, scaler, model_config) untuk versi artefak saat ini, dimuat ulang hanya jika berubah."""
+    version, paths = _resolve()
+    if _state['artifacts'] is not None and _state['version'] == version:
+        metrics.cache_lookup('model', hit=True)
+        return _state['artifacts']
+
+    with _lock:
+        # Cek ulang: thread lain mungkin sudah memuat versi ini
+        if _state['artifacts'] is not None and _state['version'] == version:
+            metrics.cache_lookup('model', hit=True)
+            return _state['artifacts']
+        metrics.cache_lookup('model', hit=False)
+        try:
+            artifacts = _load(paths=paths, version=version)
+        except Exception as e:
+            _state['last_error'] = str(e)
+            raise
+        _state.update(artifacts=artifacts, version=version, last_error=None,
+                      loaded_at=datetime.now().isoformat(timespec='seconds'))
+
+    threshold = artifacts[2].get('optimal_threshold', config.OPTIMAL_THRESHOLD)
+    metrics.MODEL_INFO.clear()
+    metrics.MODEL_INFO.set(1, model_version=version, threshold=threshold)
+    return artifacts
+
+def state() -> dict:
+    """Snapshot state registry tanpa I/O (untuk /health)."""
+    model_config = _state['artifacts'][2] if _state['artifacts'] is not None else {}
+    return {
+        'model_loaded': _state['artifacts'] is not None,
+        'model_version': _state['version'],
+        'loaded_at': _state['loaded_at'],
+        'threshold': model_config.get('optimal_threshold'),
+        'last_error': _state['last_error'],
+    }
@@ -0,0 +1,232 @@
+"""
+Pembaruan online per wilayah tanpa membangun ulang seluruh riwayat.
+
+Dua jenis pembaruan:
+  - agregat tahunan baru (skema fitur data kesimpulan) -> diskalakan dengan scaler model lalu
+    jendela terbaru wilayah tersebut digeser satu tahun (atau baris terakhir diganti jika tahunnya
+    sama, misal koreksi data);
+  - kejadian cuaca ekstrem baru -> jumlah kejadian, histogram, dan jumlah tahun pada tabel
+    klimatologi wilayah tersebut ditambah di tempat.
+
+Pembaruan disimpan sebagai overlay in-process di atas data dasar (CSV / snapshot serving) dan
+dicatat ke jurnal JSONL. Setiap proses (worker API) membaca baris jurnal baru pada akses
+berikutnya sehingga semua worker melihat pembaruan yang sama. Hanya cache milik wilayah itu
+yang diinvalidasi: baris prediction_store wilayah tersebut dihapus dan revisi wilayahnya naik
+(dipakai dalam ETag /predict).
+
+Overlay dan jurnal hanya berlaku untuk versi model & data dasar saat pembaruan dibuat; setelah
+CSV diperbarui dan job malam berjalan, entri lama diabaikan karena sudah tercakup data dasar.
+"""
+import os
+import json
+import copy
+import logging
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import config
+import data_processing as dp
+import climatology as clim
+import prediction_store
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_state = {
+    'base_key': None,     # (versi model, versi data) dasar overlay
+    'offset': 0,          # posisi baca jurnal (byte)
+    'regions': {},        # region_key -> {'window', 'last_year', 'climatology', 'revision'}
+}
+_base = {'key': None, 'windows': None, 'last_years': None, 'years': None}
+
+def _versions() -> tuple:
+    import model_registry
+    return model_registry.artifacts_version(), prediction_store.data_version()
+
+# --- Data dasar (dibaca sekali per versi data) ---
+
+def _feature_columns(kesimpulan_path: str) -> list:
+    """Urutan kolom fitur seperti build_latest_windows / load_kesimpulan_sequences."""
+    df = pd.read_csv(kesimpulan_path, nrows=50).rename(columns={
+        'kabupaten_kota': 'Wilayah', 'tahun': 'Tahun', 'label_gagal': 'GagalPanen'
+    })
+    features = df.drop(columns=['Wilayah', 'Tahun', 'GagalPanen', 'status_panen'], errors='ignore')
+    return features.select_dtypes(include=[np.number]).columns.tolist()
+
+def _load_base(scaler, seq_len: int, base_key: tuple):
+    # Jendela diskalakan dengan scaler model -> model baru (versi artefak lain) = data dasar baru
+    if _base['key'] == (*base_key, seq_len):
+        return _base
+    regions, X = dp.build_latest_windows(scaler, seq_len)
+    years = pd.read_csv(config.KESIMPULAN_PATH, usecols=['kabupaten_kota', 'tahun'])
+    last_years = years.groupby('kabupaten_kota')['tahun'].max()
+
+    # Tahun pengamatan per (wilayah, bulan) agar n_years klimatologi bisa diperbarui dengan tepat
+    observed = {}
+    if os.path.exists(config.WEATHER_CSV_PATH):
+        frame = clim._prepare_frame(pd.read_csv(config.WEATHER_CSV_PATH, sep=';'), clim._min_year())
+        for (region, month), grp in frame.groupby(['Wilayah', 'Bulan'])['Tahun']:
+            observed[(region, int(month))] = set(int(y) for y in grp.unique())
+
+    _base.update(
+        key=(*base_key, seq_len),
+        windows={prediction_store.region_key(r): X[i] for i, r in enumerate(regions)},
+        last_years={prediction_store.region_key(r): int(y) for r, y in last_years.items()},
+        years=observed,
+        features=_feature_columns(config.KESIMPULAN_PATH),
+    )
+    return _base
+
+def _region_state(region_name: str, scaler, seq_len: int, base_key: tuple) -> dict:
+    key = prediction_store.region_key(region_name)
+    if key not in _state['regions']:
+        base = _load_base(scaler, seq_len, base_key)
+        window = base['windows'].get(key)
+        clim_key = clim.region_key(region_name)
+        _state['regions'][key] = {
+            'window': None if window is None else np.array(window, dtype=np.float32),
+            'last_year': base['last_years'].get(key),
+            'climatology': copy.deepcopy(clim.get_region_climatology(region_name)),
+            'years': {m: set(base['years'].get((clim_key, m), ())) for m in range(1, 13)},
+            'revision': 0,
+        }
+    return _state['regions'][key]
+
+# --- Penerapan pembaruan ---
+
+def _apply_yearly(state: dict, entry: dict, scaler):
+    year = int(entry['year'])
+    if state['window'] is None:
+        raise ValueError(f"Wilayah {entry['region']} belum punya jendela dasar (deret tahunan terlalu pendek)")
+    if state['last_year'] is not None and year < state['last_year']:
+        raise ValueError(f"Tahun {year} lebih lama dari tahun terakhir {state['last_year']}; perlu rebuild penuh")
+
+    columns = _base['features']
+    missing = [c for c in columns if c not in entry['features']]
+    if missing:
+        raise ValueError(f"Fitur tidak lengkap, kurang: {', '.join(missing)}")
+    row = pd.DataFrame([[entry['features'][c] for c in columns]], columns=columns)
+    scaled = scaler.transform(row).astype(np.float32)[0]
+
+    if state['last_year'] is not None and year == state['last_year']:
+        state['window'][-1] = scaled  # koreksi tahun terakhir
+    else:
+        state['window'] = np.vstack([state['window'][1:], scaled[None]])
+        state['last_year'] = year
+
+def _apply_weather(state: dict, entry: dict, scaler):
+    table = state['climatology']
+    min_year = clim._min_year()
+    for event in entry['events']:
+        date = pd.to_datetime(event.get('date'), errors='coerce')
+        if pd.isna(date) or date.year < min_year:
+            continue
+        month = int(date.month)
+        item = table.setdefault(month, {'n_events': 0, 'n_years': 0, 'events_per_year': 0.0, 'histogram': []})
+        state['years'][month].add(int(date.year))
+        item['n_events'] += 1
+        item['n_years'] = len(state['years'][month])
+        item['events_per_year'] = float(item['n_events'] / item['n_years'])
+
+        counts = dict(item['histogram'])
+        for name in str(event.get('kejadian') or '').split(', '):
+            if name and name.lower() != 'nan':
+                counts[name] = counts.get(name, 0) + 1
+        # Urutan sama dengan climatology._build_table: jumlah menurun, seri urut nama kejadian
+        item['histogram'] = [[k, v] for k, v in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))]
+
+_APPLY = {'yearly': _apply_yearly, 'weather': _apply_weather}
+
+def _apply(entry: dict, scaler, model_config: dict, base_key: tuple, state: dict = None):
+    seq_len = int(model_config.get('sequence_length', config.SEQUENCE_LENGTH))
+    if state is None:
+        state = _region_state(entry['region'], scaler, seq_len, base_key)
+    _APPLY[entry['kind']](state, entry, scaler)
+    return state
+
+def _sync():
+    """Menyamakan overlay dengan versi dasar lalu menerapkan baris jurnal yang belum dibaca."""
+    import model_registry
+
+    model_version, data_version = _versions()
+    if _state['base_key'] != (model_version, data_version):
+        _state.update(base_key=(model_version, data_version), offset=0, regions={})
+
+    path = config.ONLINE_UPDATE_JOURNAL
+    if not os.path.exists(path) or os.path.getsize(path) <= _state['offset']:
+        return
+    _, scaler, model_config = model_registry.get_artifacts()
+    with open(path, 'rb') as f:
+        f.seek(_state['offset'])
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break  # baris yang masih ditulis proses lain
+            _state['offset'] += len(raw)
+            entry = json.loads(raw)
+            if entry.get('model_version') != model_version or entry.get('data_version') != data_version:
+                continue
+            try:
+                state = _apply(entry, scaler, model_config, _state['base_key'])
+            except ValueError as e:
+                logger.warning("Pembaruan online dilewati (%s): %s", entry.get('region'), e)
+                continue
+            state['revision'] += 1
+
+def _submit(entry: dict) -> dict:
+    import model_registry
+
+    with _lock:
+        _sync()
+        model_version, data_version = _versions()
+        _, scaler, model_config = model_registry.get_artifacts()
+        entry = {**entry, 'model_version': model_version, 'data_version': data_version,
+                 'created_at': datetime.now().isoformat(timespec='seconds')}
+
+        # Validasi pada salinan: entri yang gagal tidak pernah masuk jurnal
+        seq_len = int(model_config.get('sequence_length', config.SEQUENCE_LENGTH))
+        trial = copy.deepcopy(_region_state(entry['region'], scaler, seq_len, (model_version, data_version)))
+        _apply(entry, scaler, model_config, (model_version, data_version), state=trial)
+
+        os.makedirs(os.path.dirname(config.ONLINE_UPDATE_JOURNAL), exist_ok=True)
+        with open(config.ONLINE_UPDATE_JOURNAL, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        # Jurnal adalah satu-satunya sumber: entri ini (dan entri proses lain) diterapkan lewat _sync
+        _sync()
+
+        # Hanya cache wilayah ini yang basi
+        prediction_store.invalidate(entry['region'])
+        state = _state['regions'][prediction_store.region_key(entry['region'])]
+        return {'region': entry['region'], 'revision': state['revision'], 'last_year': state['last_year']}
+
+def add_yearly_aggregate(region_name: str, year: int, features: dict) -> dict:
+    """Agregat tahunan baru (kolom fitur data kesimpulan) untuk satu wilayah -> jendela digeser."""
+    return _submit({'kind': 'yearly', 'region': region_name, 'year': int(year), 'features': features})
+
+def add_weather_events(region_name: str, events: list) -> dict:
+    """Kejadian cuaca baru [{'date': 'YYYY-MM-DD', 'kejadian': 'Hujan Lebat, Angin Kencang'}, ...]."""
+    return _submit({'kind': 'weather', 'region': region_name, 'events': list(events)})
+
+# --- Dibaca jalur prediksi ---
+
+def _updated(region_name: str):
+    with _lock:
+        _sync()
+        return _state['regions'].get(prediction_store.region_key(region_name))
+
+def window(region_name: str):
+    """Jendela terbaru hasil pembaruan online, atau None jika wilayah belum pernah diperbarui."""
+    state = _updated(region_name)
+    return None if state is None or state['revision'] == 0 else state['window']
+
+def region_climatology(region_name: str):
+    """Klimatologi wilayah hasil pembaruan online, atau None jika belum pernah diperbarui."""
+    state = _updated(region_name)
+    return None if state is None or state['revision'] == 0 else state['climatology']
+
+def revision(region_name: str) -> int:
+    """Jumlah pembaruan online yang sudah diterapkan ke wilayah (untuk ETag/cache)."""
+    state = _updated(region_name)
+    return 0 if state is None else state['revision']
@@ -3,27 +3,113 @@ Skrip untuk melakukan prediksi gagal panen menggunakan model yang sudah dilatih.
 """
 import os
 import json
-import joblib
+import logging
 import numpy as np
-import tensorflow as tf
 import pandas as pd
 import data_processing as dp
+import climatology as clim
+import weather_profile as wp
+import tracing
+import metrics
+import model_registry
+import prediction_store
+import serving_snapshot
+import online_update
+import attribution
+import region_index
 import config
 
+logger = logging.getLogger(__name__)
+
+# Field hasil yang selalu ada (murah: hanya butuh output model)
+CORE_FIELDS = ('region', 'probability', 'threshold', 'prediction', 'risk_level', 'confidence')
+# Field yang bisa dipilih via fields=/view=; yang tidak diminta tidak dihitung sama sekali
+OPTIONAL_FIELDS = ('reasons', 'mitigation_recommendations', 'weather_forecast', 'web_summary', 'horizon_risks',
+                   'feature_contributions')
+
+def resolve_fields(fields=None, view: str = None) -> frozenset:
+    """
+    Field opsional yang diminta. view='compact' -> tidak ada; view='full'/None -> semua;
+    fields (list atau string dipisah koma) -> hanya itu (field inti selalu ikut).
+    """
+    if fields:
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        requested = {f.strip() for f in fields if f.strip()} - set(CORE_FIELDS)
+        unknown = requested - set(OPTIONAL_FIELDS)
+        if unknown:
+            raise ValueError(f"Field tidak dikenal: {', '.join(sorted(unknown))}. Pilihan: {', '.join(OPTIONAL_FIELDS)}")
+        return frozenset(requested)
+    if view in (None, 'full'):
+        return frozenset(OPTIONAL_FIELDS)
+    if view == 'compact':
+        return frozenset()
+    raise ValueError("view harus 'full' atau 'compact'")
+
+def _select_fields(result: dict, fields) -> dict:
+    if fields is None or 'error' in result:
+        return result
+    return {k: v for k, v in result.items() if k in CORE_FIELDS or k in fields}
+
 def load_model_and_artifacts():
-    """Memuat model, scaler, dan config yang sudah dilatih."""
-    if not os.path.exists(config.MODEL_PATH):
-        raise FileNotFoundError(f"Model tidak ditemukan di {config.MODEL_PATH}. Jalankan train.py terlebih dahulu.")
-    
-    model = tf.keras.models.load_model(config.MODEL_PATH)
-    scaler = joblib.load(config.SCALER_PATH)
-    
-    with open(config.CONFIG_PATH, 'r') as f:
-        model_config = json.load(f)
-    
-    return model, scaler, model_config
+    """Memuat model, scaler, dan config yang sudah dilatih (di-cache oleh model_registry)."""
+    return model_registry.get_artifacts()
+
+def resolve_region(region_name: str, use_csv: bool = True):
+    """
+    Validasi + kanonikalisasi nama wilayah lewat region_index SEBELUM data apa pun dimuat.
+    Mengembalikan (nama kanonik, None) atau (None, hasil error berisi saran wilayah).
+    Jalur Supabase tidak divalidasi (daftar wilayahnya ada di database, bukan CSV kesimpulan).
+    """
+    if not use_csv:
+        return region_name, None
+    index = region_index.get_index()
+    if not len(index):
+        return region_name, None  # file kesimpulan tidak ada -> biarkan jalur lama melaporkan errornya
+    match = index.resolve(region_name)
+    if match is not None:
+        return match[0], None
+    suggestions = index.suggest(region_name)
+    message = f"Wilayah '{region_name}' tidak ditemukan."
+    if suggestions:
+        message += f" Mungkin maksud Anda: {', '.join(suggestions)}"
+    return None, {'error': message, 'region': region_name, 'suggestions': suggestions}
+
+def get_prediction(region_name: str, start_date: str = None, use_csv: bool = True, planting_month: int = None,
+                   allow_precomputed: bool = True, fields=None):
+    """
+    Hasil prediksi dari store batch_predict jika masih valid (versi model & data sama, belum
+    kedaluwarsa); jika tidak ada, fallback ke inferensi live predict_harvest_failure.
+    Store hanya berlaku untuk jalur CSV tanpa start_date khusus dan wilayah tanpa pembaruan online.
+    fields: lihat resolve_fields.
+    """
+    region_name, error = resolve_region(region_name, use_csv)
+    if error:
+        return error
+    if allow_precomputed and _precomputed_valid(region_name, start_date, use_csv):
+        cached = prediction_store.get(
+            region_name,
+            planting_month,
+            model_version=model_registry.artifacts_version(),
+            data_version=prediction_store.data_version()
+        )
+        metrics.cache_lookup('precomputed', hit=cached is not None)
+        if cached is not None:
+            cached['region'] = region_name
+            return _select_fields(cached, fields)
+    return predict_harvest_failure(region_name, start_date=start_date, use_csv=use_csv, planting_month=planting_month,
+                                   fields=fields)
+
+def _precomputed_valid(region_name: str, start_date: str, use_csv: bool) -> bool:
+    """
+    Store batch_predict hanya mewakili jalur CSV tanpa start_date khusus. Wilayah dengan pembaruan
+    online selalu diskor live: baris store bisa ditulis ulang job malam tanpa overlay, dan revisinya
+    sudah masuk ETag /predict.
+    """
+    return use_csv and start_date is None and online_update.revision(region_name) == 0
 
-def predict_harvest_failure(region_name: str, start_date: str = None, use_csv: bool = True, planting_month: int = None):
+def predict_harvest_failure(region_name: str, start_date: str = None, use_csv: bool = True, planting_month: int = None,
+                            fields=None):
     """
     Memprediksi kemungkinan gagal panen untuk suatu wilayah.
     
@@ -32,208 +118,186 @@ def predict_harvest_failure(region_name: str, start_date: str = None, use_csv: b
         start_date: Tanggal mulai untuk data cuaca (format: 'YYYY-MM-DD')
         use_csv: Jika True, gunakan data CSV lokal. Jika False, gunakan Supabase API
         planting_month: Bulan penanaman (1-12). Jika diberikan, akan memprediksi 3 bulan ke depan dari bulan penanaman
+        fields: Field opsional yang dihitung (lihat resolve_fields); None = semua
     
     Returns:
         dict: Hasil prediksi dengan probabilitas dan klasifikasi
     """
-    print(f"Memuat model dan artefak...")
-    model, scaler, model_config = load_model_and_artifacts()
+    region_name, error = resolve_region(region_name, use_csv)
+    if error:
+        return error
+    with tracing.trace('predict_harvest_failure', region=region_name, use_csv=use_csv, planting_month=planting_month):
+        return _predict_harvest_failure(region_name, start_date, use_csv, planting_month, fields)
+
+def prediction_period_for(planting_month: int) -> dict:
+    """Periode 3 bulan sejak bulan penanaman (tahun depan jika bulannya sudah lewat)."""
+    from datetime import datetime, timedelta
+    current_year = datetime.now().year
+    current_month = datetime.now().month
+    
+    # Jika bulan penanaman sudah lewat tahun ini, gunakan tahun depan
+    if planting_month < current_month:
+        planting_year = current_year + 1
+    else:
+        planting_year = current_year
+    
+    # Tanggal mulai penanaman
+    planting_start = datetime(planting_year, planting_month, 1)
+    # Tanggal akhir (3 bulan setelah penanaman)
+    planting_end = planting_start + timedelta(days=90)  # ~3 bulan
+    
+    # Untuk training data, ambil data historis dari bulan yang sama di tahun-tahun sebelumnya
+    # Misalnya jika penanaman di bulan 10, ambil data Oktober dari tahun-tahun sebelumnya
+    return {
+        'planting_month': planting_month,
+        'planting_year': planting_year,
+        'planting_start': planting_start,
+        'planting_end': planting_end,
+        'start_date': planting_start.strftime('%Y-%m-%d'),
+        'end_date': planting_end.strftime('%Y-%m-%d')
+    }
+
+def _filter_min_year(df: pd.DataFrame, min_year: int, label: str) -> pd.DataFrame:
+    """Filter data ke 10 tahun terakhir via kolom Tahun atau Tanggal."""
+    if df.empty:
+        return df
+    before_count = len(df)
+    if 'Tahun' in df.columns:
+        df = df[df['Tahun'] >= min_year].copy()
+    elif config.DATE_COLUMN in df.columns:
+        dates = pd.to_datetime(df[config.DATE_COLUMN], errors='coerce')
+        df = df[dates.dt.year >= min_year].copy()
+        df[config.DATE_COLUMN] = dates[dates.dt.year >= min_year]
+    else:
+        return df
+    logger.debug("Data %s setelah filter tahun >= %s: %s -> %s baris", label, min_year, before_count, len(df))
+    return df
+
+def weather_by_region(df_weather: pd.DataFrame, min_year: int, region_name: str = None) -> dict:
+    """
+    Data cuaca per wilayah (kunci climatology.region_key), tahun >= min_year, urut tanggal.
+
+    Satu-satunya pemilihan baris cuaca wilayah: jalur live (region_name -> hanya wilayah itu)
+    dan batch_predict (semua wilayah) memakai fungsi ini sehingga keduanya melihat baris yang
+    sama, dan "Kota X" tidak tergabung dengan kabupaten "X".
+    """
+    if df_weather.empty:
+        return {}
+    if config.REGION_COLUMN in df_weather.columns:
+        keys = clim.region_keys(df_weather[config.REGION_COLUMN])
+    else:
+        keys = pd.Series(clim.region_key(region_name or ''), index=df_weather.index)
+    if region_name is not None:
+        mask = keys == clim.region_key(region_name)
+        df_weather, keys = df_weather[mask], keys[mask]
+    if config.DATE_COLUMN in df_weather.columns:
+        dates = pd.to_datetime(df_weather[config.DATE_COLUMN], errors='coerce')
+        recent = dates.dt.year >= min_year
+        df_weather = df_weather[recent].assign(**{config.DATE_COLUMN: dates[recent]})
+        df_weather = df_weather.sort_values(by=config.DATE_COLUMN, kind='stable')
+    return {key: g.reset_index(drop=True) for key, g in df_weather.groupby(keys, sort=False)}
+
+def _predict_harvest_failure(region_name: str, start_date: str, use_csv: bool, planting_month: int, fields=None):
+    # Jika planting_month diberikan, hitung periode prediksi 3 bulan ke depan
+    prediction_period = prediction_period_for(planting_month) if planting_month is not None else None
+    if prediction_period:
+        logger.debug("Memprediksi %s, periode %s hingga %s", region_name, prediction_period['start_date'], prediction_period['end_date'])
+    
+    # Tanpa field opsional (view=compact) data cuaca tidak dibutuhkan sama sekali
+    # (horizon_risks & feature_contributions berasal dari model, bukan dari data cuaca)
+    need_weather = fields is None or bool(set(fields) - {'horizon_risks', 'feature_contributions'})
+    need_contributions = fields is None or bool(set(fields) & {'reasons', 'web_summary', 'feature_contributions'})
+    scored = _score_region(region_name, start_date, use_csv, need_weather=need_weather,
+                           need_contributions=need_contributions)
+    if 'error' in scored:
+        return scored
+    return assemble_result(
+        region_name, scored['probability'], scored['threshold'], scored['df_weather'], scored['df_harvest'],
+        profile=scored['profile'], prediction_period=prediction_period, climatology=scored['climatology'],
+        fields=fields, horizon_risks=scored['horizon_risks'], contributions=scored['contributions']
+    )
+
+def _score_region(region_name: str, start_date: str, use_csv: bool, need_weather: bool = True,
+                  need_contributions: bool = True) -> dict:
+    """
+    Memuat data wilayah, menjalankan model, dan menyiapkan profil cuaca + klimatologi.
+    Semua bagian ini tidak bergantung pada bulan tanam sehingga bisa dipakai ulang untuk
+    beberapa skenario bulan tanam. Mengembalikan dict berisi 'error' jika data tidak cukup.
+    need_weather=False (jalur CSV): CSV cuaca, profil, dan klimatologi dilewati.
+    need_contributions=False: tabel atribusi fitur tidak dibaca.
+    """
+    with tracing.span('load_model'):
+        model, scaler, model_config = load_model_and_artifacts()
     threshold = model_config.get('optimal_threshold', 0.5)
     
     # Hitung batas tahun untuk data historis (10 tahun terakhir)
     from datetime import datetime
     current_year = datetime.now().year
     min_year = current_year - config.HISTORICAL_YEARS_FOR_PREDICTION
-    print(f"Menggunakan data historis dari {min_year} hingga {current_year} ({config.HISTORICAL_YEARS_FOR_PREDICTION} tahun terakhir)")
+    logger.debug("Menggunakan data historis dari %s hingga %s", min_year, current_year)
     
-    # Jika planting_month diberikan, hitung periode prediksi 3 bulan ke depan
-    prediction_period = None
-    if planting_month is not None:
-        from datetime import datetime, timedelta
-        current_year = datetime.now().year
-        current_month = datetime.now().month
-        
-        # Jika bulan penanaman sudah lewat tahun ini, gunakan tahun depan
-        if planting_month < current_month:
-            planting_year = current_year + 1
-        else:
-            planting_year = current_year
-        
-        # Tanggal mulai penanaman
-        planting_start = datetime(planting_year, planting_month, 1)
-        # Tanggal akhir (3 bulan setelah penanaman)
-        planting_end = planting_start + timedelta(days=90)  # ~3 bulan
-        
-        # Untuk training data, ambil data historis dari bulan yang sama di tahun-tahun sebelumnya
-        # Misalnya jika penanaman di bulan 10, ambil data Oktober dari tahun-tahun sebelumnya
-        prediction_period = {
-            'planting_month': planting_month,
-            'planting_year': planting_year,
-            'planting_start': planting_start,
-            'planting_end': planting_end,
-            'start_date': planting_start.strftime('%Y-%m-%d'),
-            'end_date': planting_end.strftime('%Y-%m-%d')
-        }
-        
-        print(f"Memprediksi untuk wilayah: {region_name}")
-        print(f"Bulan penanaman: {planting_month} ({planting_start.strftime('%B %Y')})")
-        print(f"Periode prediksi: {prediction_period['start_date']} hingga {prediction_period['end_date']}")
-    else:
-        print(f"Memprediksi untuk wilayah: {region_name}")
+    # Mode multi-worker (api/serve.py): jendela terbaru & klimatologi dari snapshot mmap
+    snapshot = serving_snapshot.current() if use_csv else None
     
     # Muat data prediksi
-    if use_csv:
-        # Gunakan dataset kesimpulan yang sudah teragregasi per tahun
-        desired_seq_len = int(model_config.get('sequence_length', config.SEQUENCE_LENGTH))
-        dataset, _, _ = dp.load_kesimpulan_sequences(
-            is_training=False,
-            scaler=scaler,
-            region_filter=region_name,
-            desired_seq_len=desired_seq_len
-        )
+    dataset = None
+    with tracing.span('load'), metrics.DATA_LOAD_SECONDS.time(source='csv' if use_csv else 'supabase'):
+        # Pembaruan online (online_update.py) lebih baru dari snapshot maupun CSV dasar
+        window = online_update.window(region_name) if use_csv else None
+        if window is None and snapshot is not None:
+            window = snapshot.window(region_name)
+        if window is not None:
+            # Hanya jendela terakhir yang dipakai untuk prediksi -> tidak perlu membangun semua sekuens
+            dataset = window[None]
+        elif use_csv:
+            # Gunakan dataset kesimpulan yang sudah teragregasi per tahun (span scale/window di dalamnya)
+            desired_seq_len = int(model_config.get('sequence_length', config.SEQUENCE_LENGTH))
+            dataset, _, _ = dp.load_kesimpulan_sequences(
+                is_training=False,
+                scaler=scaler,
+                region_filter=region_name,
+                desired_seq_len=desired_seq_len
+            )
         
-        # Muat data cuaca dari file CSV untuk kebutuhan ringkasan web/rekomendasi
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)  # ml/
-        weather_csv_path = os.path.join(project_root, 'data', 'sample_data_cuaca.csv')
-        
-        if os.path.exists(weather_csv_path):
-            df_weather = pd.read_csv(weather_csv_path, sep=';')  # Gunakan separator titik koma
-            print(f"Data cuaca loaded: {len(df_weather)} baris")
-            print(f"Kolom: {df_weather.columns.tolist()}")
-            # Filter berdasarkan wilayah dan tahun terakhir
-            if config.REGION_COLUMN in df_weather.columns:
-                before_filter = len(df_weather)
-                # Normalisasi nama wilayah: hilangkan spasi dan bandingkan substring
-                region_normalized = region_name.replace(' ', '').lower()
-                df_weather['region_normalized'] = df_weather[config.REGION_COLUMN].str.replace(' ', '').str.lower()
-                df_weather = df_weather[df_weather['region_normalized'].str.contains(region_normalized, na=False)]
-                print(f"Filter wilayah '{region_name}': {before_filter} -> {len(df_weather)} baris")
-                df_weather = df_weather.drop(columns=['region_normalized'], errors='ignore')
+        if use_csv:
+            # Muat data cuaca dari file CSV untuk kebutuhan ringkasan web/rekomendasi
+            weather_csv_path = config.WEATHER_CSV_PATH
+            if not need_weather:
+                df_weather = pd.DataFrame()
+            elif os.path.exists(weather_csv_path):
+                df_weather = pd.read_csv(weather_csv_path, sep=';')  # Gunakan separator titik koma
+                logger.debug("Data cuaca loaded: %s baris", len(df_weather))
+            else:
+                logger.warning("File cuaca tidak ditemukan: %s", weather_csv_path)
+                df_weather = pd.DataFrame()
             
-            # Filter untuk 10 tahun terakhir
-            if config.DATE_COLUMN in df_weather.columns:
-                df_weather[config.DATE_COLUMN] = pd.to_datetime(df_weather[config.DATE_COLUMN], errors='coerce')
-                df_weather['Tahun'] = df_weather[config.DATE_COLUMN].dt.year
-                before_filter = len(df_weather)
-                df_weather = df_weather[df_weather['Tahun'] >= min_year].copy()
-                print(f"Filter tahun >= {min_year}: {before_filter} -> {len(df_weather)} baris")
-                df_weather = df_weather.drop(columns=['Tahun'], errors='ignore')
+            # Untuk data panen, gunakan DataFrame kosong (karena kesimpulan tidak memuat data harian)
+            df_harvest = pd.DataFrame()
         else:
-            print(f"File cuaca tidak ditemukan: {weather_csv_path}")
-            df_weather = pd.DataFrame()
-            
-        # Untuk data panen, gunakan DataFrame kosong (karena kesimpulan tidak memuat data harian)
-        df_harvest = pd.DataFrame()
+            # Untuk production: ambil dari Supabase, default mulai dari 10 tahun yang lalu
+            if not start_date:
+                start_date = datetime(min_year, 1, 1).strftime('%Y-%m-%d')
+            df_harvest, df_weather = dp.load_prediction_data(region_name, start_date)
     
-    else:
-        # Untuk production: ambil dari Supabase
-        # Pastikan menggunakan data 10 tahun terakhir
-        if not start_date:
-            # Default: mulai dari 10 tahun yang lalu
-            from datetime import datetime, timedelta
-            start_date = datetime(min_year, 1, 1).strftime('%Y-%m-%d')
-            print(f"Menggunakan data dari Supabase mulai dari {start_date} (10 tahun terakhir)")
-        
-        df_harvest, df_weather = dp.load_prediction_data(region_name, start_date)
-        
-        # Filter tambahan untuk memastikan hanya data 10 tahun terakhir
-        if not df_weather.empty and config.DATE_COLUMN in df_weather.columns:
-            df_weather[config.DATE_COLUMN] = pd.to_datetime(df_weather[config.DATE_COLUMN])
-            df_weather['Tahun'] = df_weather[config.DATE_COLUMN].dt.year
-            before_count = len(df_weather)
-            df_weather = df_weather[df_weather['Tahun'] >= min_year].copy()
-            df_weather = df_weather.drop(columns=['Tahun'])
-            print(f"Data cuaca Supabase setelah filter 10 tahun: {before_count} -> {len(df_weather)} baris")
-        
-        if not df_harvest.empty:
-            if 'Tahun' in df_harvest.columns:
-                before_count = len(df_harvest)
-                df_harvest = df_harvest[df_harvest['Tahun'] >= min_year].copy()
-                print(f"Data panen Supabase setelah filter 10 tahun: {before_count} -> {len(df_harvest)} baris")
-            elif config.DATE_COLUMN in df_harvest.columns:
-                df_harvest[config.DATE_COLUMN] = pd.to_datetime(df_harvest[config.DATE_COLUMN], errors='coerce')
-                df_harvest['Tahun'] = df_harvest[config.DATE_COLUMN].dt.year
-                before_count = len(df_harvest)
-                df_harvest = df_harvest[df_harvest['Tahun'] >= min_year].copy()
-                df_harvest = df_harvest.drop(columns=['Tahun'])
-                print(f"Data panen Supabase setelah filter 10 tahun: {before_count} -> {len(df_harvest)} baris")
-    
-    if not use_csv:
-        if df_harvest.empty or df_weather.empty:
+    with tracing.span('filter'):
+        if not use_csv and (df_harvest.empty or df_weather.empty):
             return {
                 'error': f'Data tidak ditemukan untuk wilayah {region_name}. Panen: {len(df_harvest)} baris, Cuaca: {len(df_weather)} baris',
                 'region': region_name
             }
-    
-    # Filter ulang data cuaca untuk memastikan hanya 10 tahun terakhir
-    if config.DATE_COLUMN in df_weather.columns:
-        df_weather[config.DATE_COLUMN] = pd.to_datetime(df_weather[config.DATE_COLUMN], errors='coerce')
-        df_weather['Tahun'] = df_weather[config.DATE_COLUMN].dt.year
-        before_count = len(df_weather)
-        df_weather = df_weather[df_weather['Tahun'] >= min_year].copy()
-        df_weather = df_weather.drop(columns=['Tahun'])
-        print(f"Data cuaca final setelah filter 10 tahun terakhir: {before_count} -> {len(df_weather)} baris")
-    
-    # Filter ulang data panen untuk memastikan hanya 10 tahun terakhir
-    if 'Tahun' in df_harvest.columns:
-        before_count = len(df_harvest)
-        df_harvest = df_harvest[df_harvest['Tahun'] >= min_year].copy()
-        print(f"Data panen final setelah filter 10 tahun terakhir: {before_count} -> {len(df_harvest)} baris")
-    elif config.DATE_COLUMN in df_harvest.columns:
-        df_harvest[config.DATE_COLUMN] = pd.to_datetime(df_harvest[config.DATE_COLUMN], errors='coerce')
-        df_harvest['Tahun'] = df_harvest[config.DATE_COLUMN].dt.year
-        before_count = len(df_harvest)
-        df_harvest = df_harvest[df_harvest['Tahun'] >= min_year].copy()
-        df_harvest = df_harvest.drop(columns=['Tahun'])
-        print(f"Data panen final setelah filter 10 tahun terakhir: {before_count} -> {len(df_harvest)} baris")
-    
-    # Pastikan data hanya untuk wilayah yang diminta (double check setelah filter awal)
-    # Normalisasi nama untuk matching
-    def normalize_region_name_check(name):
-        if pd.isna(name):
-            return ""
-        name = str(name).strip()
-        prefixes = ["Kab. ", "Kabupaten ", "Kota ", "Kotamadya "]
-        for prefix in prefixes:
-            if name.startswith(prefix):
-                name = name[len(prefix):].strip()
-        prefixes_no_space = ["Kab.", "Kabupaten", "Kota", "Kotamadya"]
-        for prefix in prefixes_no_space:
-            if name.startswith(prefix) and len(name) > len(prefix):
-                name = name[len(prefix):].strip()
-        return name
-    
-    region_normalized_check = normalize_region_name_check(region_name)
-    
-    # Filter ulang untuk memastikan hanya data wilayah yang diminta
-    if config.REGION_COLUMN in df_harvest.columns:
-        df_harvest['_normalized_check'] = df_harvest[config.REGION_COLUMN].apply(normalize_region_name_check)
-        before_count = len(df_harvest)
-        df_harvest = df_harvest[df_harvest['_normalized_check'] == region_normalized_check].drop(columns=['_normalized_check'])
-        print(f"Filter panen: {before_count} -> {len(df_harvest)} baris untuk {region_name}")
-    
-    if config.REGION_COLUMN in df_weather.columns:
-        df_weather['_normalized_check'] = df_weather[config.REGION_COLUMN].apply(normalize_region_name_check)
-        before_count = len(df_weather)
-        df_weather = df_weather[df_weather['_normalized_check'] == region_normalized_check].drop(columns=['_normalized_check'])
-        print(f"Filter cuaca: {before_count} -> {len(df_weather)} baris untuk {region_name}")
-    
-    # Pastikan data diurutkan berdasarkan tanggal untuk sequence yang konsisten
-    if config.DATE_COLUMN in df_weather.columns:
-        df_weather = df_weather.sort_values(by=config.DATE_COLUMN).reset_index(drop=True)
-    
-    # Debug: cek unique wilayah yang masih ada
-    if config.REGION_COLUMN in df_harvest.columns:
-        unique_regions_harvest = df_harvest[config.REGION_COLUMN].unique()
-        print(f"Wilayah unik di data panen setelah filter: {unique_regions_harvest}")
-    if config.REGION_COLUMN in df_weather.columns:
-        unique_regions_weather = df_weather[config.REGION_COLUMN].unique()
-        print(f"Wilayah unik di data cuaca setelah filter: {unique_regions_weather}")
+        
+        # Cuaca wilayah ini, 10 tahun terakhir, urut tanggal (sama dengan batch_predict)
+        df_weather = weather_by_region(df_weather, min_year, region_name).get(clim.region_key(region_name), pd.DataFrame())
+        
+        # Data panen: 10 tahun terakhir, hanya wilayah yang diminta (kunci yang sama dengan cuaca)
+        df_harvest = _filter_min_year(df_harvest, min_year, 'panen')
+        if config.REGION_COLUMN in df_harvest.columns:
+            df_harvest = df_harvest[clim.region_keys(df_harvest[config.REGION_COLUMN]) == clim.region_key(region_name)]
+        tracing.annotate(weather_rows=len(df_weather), harvest_rows=len(df_harvest))
+        logger.debug("Filter %s: cuaca %s baris, panen %s baris", region_name, len(df_weather), len(df_harvest))
     
     if not use_csv:
         # Preprocess data (jalur lama menggunakan panen + cuaca harian)
-        print("Memproses data...")
         dataset, _, _ = dp.preprocess_features(
             df_harvest,
             df_weather,
@@ -253,70 +317,180 @@ def predict_harvest_failure(region_name: str, start_date: str = None, use_csv: b
         }
 
     # Prediksi
-    print("Menjalankan prediksi...")
-    predictions = model.predict(dataset, verbose=0)
-    
-    # Debug: print info tentang predictions
-    print(f"Jumlah sequence yang diprediksi: {len(predictions)}")
-    if len(predictions) > 0:
-        print(f"Contoh prediksi (3 pertama): {predictions[:3].flatten()}")
-        print(f"Contoh prediksi (3 terakhir): {predictions[-3:].flatten()}")
+    with tracing.span('infer'), metrics.INFERENCE_SECONDS.time():
+        predictions = model.predict(dataset, verbose=0)
     
     # Ambil prediksi terakhir (paling recent) - ini adalah prediksi untuk data terbaru
-    # Jika ada multiple sequences, ambil yang terakhir karena data sudah diurutkan berdasarkan tanggal
+    # Jika ada multiple sequences, ambil yang terakhir karena data sudah diurutkan berdasarkan tanggal.
+    # Model multi-horizon: semua horizon ada di baris yang sama (kolom pertama = probabilitas utama)
     latest_prediction = float(predictions[-1][0])
-    print(f"Prediksi untuk {region_name}: {latest_prediction:.4f}")
-    is_failure = latest_prediction >= threshold
-    
-    # Interpretasi
-    risk_level = "Tinggi" if latest_prediction >= 0.7 else "Sedang" if latest_prediction >= threshold else "Rendah"
-    
-    # Import modul rekomendasi
-    import recommendations as rec
-    
-    # Dapatkan alasan dan rekomendasi
-    if is_failure:
-        reasons = rec.get_failure_reasons(latest_prediction, df_weather, df_harvest)
-    else:
-        reasons = rec.get_success_reasons(latest_prediction, df_weather, df_harvest)
+    logger.debug("Prediksi untuk %s: %.4f (%s sequence)", region_name, latest_prediction, len(predictions))
+    
+    # Profil cuaca wilayah dihitung sekali dan dipakai alasan, mitigasi, dan ringkasan web.
+    # Jalur CSV di-cache per (versi data, wilayah, tahun minimum).
+    profile, region_climatology = None, None
+    if need_weather:
+        profile_key = (clim.data_version(), prediction_store.region_key(region_name), min_year) if use_csv else None
+        profile = wp.get_weather_profile(df_weather, cache_key=profile_key)
+        
+        # Forecast dari tabel klimatologi (dibangun sekali per versi data cuaca).
+        # Jalur Supabase tidak punya tabel tersimpan -> dibangun dari df_weather wilayah ini.
+        if use_csv:
+            region_climatology = online_update.region_climatology(region_name)
+        if region_climatology is None and snapshot is not None:
+            region_climatology = snapshot.region_climatology(region_name)
+        elif region_climatology is None and use_csv:
+            region_climatology = clim.get_region_climatology(region_name)
     
-    mitigation = rec.get_mitigation_recommendations(latest_prediction, risk_level, df_weather, region_name)
+    return {
+        'probability': latest_prediction,
+        'threshold': threshold,
+        'df_weather': df_weather,
+        'df_harvest': df_harvest,
+        'profile': profile,
+        'climatology': region_climatology,
+        'horizon_risks': horizon_risks(predictions[-1], model_config),
+        'contributions': _region_contributions(region_name, use_csv) if need_contributions else None,
+    }
+
+def _region_contributions(region_name: str, use_csv: bool):
+    """
+    Kontribusi fitur dari tabel atribusi (dihitung sekali per versi model & data untuk semua
+    wilayah, di luar request). Hanya berlaku untuk jendela data dasar: jalur Supabase, wilayah
+    dengan pembaruan online, dan versi yang tabelnya belum dibangun memakai alasan berbasis aturan.
+    """
+    if not use_csv or online_update.revision(region_name) > 0:
+        return None
+    with tracing.span('attribution'):
+        return attribution.region_contributions(region_name)
+
+def _risk_level(probability: float, threshold: float) -> str:
+    return "Tinggi" if probability >= 0.7 else "Sedang" if probability >= threshold else "Rendah"
+
+def horizon_risks(outputs, model_config: dict):
+    """
+    Risiko per horizon dari satu baris output model multi-horizon (train.py --horizons),
+    masing-masing dengan threshold terkalibrasinya. None untuk model satu-output.
+    """
+    horizons = model_config.get('horizons')
+    if not horizons:
+        return None
+    default = model_config.get('optimal_threshold', 0.5)
+    thresholds = model_config.get('horizon_thresholds') or [default] * len(horizons)
+    risks = []
+    for horizon, probability, threshold in zip(horizons, np.asarray(outputs, dtype=float).ravel(), thresholds):
+        risks.append({
+            'horizon_years': int(horizon),
+            'probability': round(float(probability), 4),
+            'threshold': threshold,
+            'prediction': 'Gagal Panen' if probability >= threshold else 'Normal',
+            'risk_level': _risk_level(probability, threshold),
+        })
+    return risks
+
+def assemble_result(
+    region_name: str,
+    probability: float,
+    threshold: float,
+    df_weather: pd.DataFrame,
+    df_harvest: pd.DataFrame,
+    profile: wp.WeatherProfile = None,
+    prediction_period: dict = None,
+    climatology: dict = None,
+    fields=None,
+    horizon_risks: list = None,
+    contributions: list = None
+) -> dict:
+    """
+    Membentuk hasil prediksi lengkap (alasan, mitigasi, forecast, ringkasan web) dari satu
+    probabilitas model. Dipakai jalur live maupun batch_predict agar keduanya identik.
+    fields membatasi field opsional yang dihitung (None = semua); web_summary membutuhkan
+    alasan, mitigasi, dan forecast sehingga ketiganya tetap dihitung bila ia diminta.
+    horizon_risks (model multi-horizon) disertakan apa adanya, tanpa inferensi tambahan.
+    contributions (attribution.region_contributions) dipakai untuk alasan dan field
+    feature_contributions; None = alasan berbasis aturan.
+    """
+    is_failure = probability >= threshold
     
-    # Jika ada bulan penanaman, buat forecast untuk 3 bulan ke depan dari bulan penanaman
-    if prediction_period:
-        weather_forecast = rec.get_weather_forecast_from_planting_month(
-            df_weather, 
-            planting_month=prediction_period['planting_month'],
-            planting_year=prediction_period['planting_year']
-        )
-    else:
-        weather_forecast = rec.get_weather_forecast(df_weather, months=3)
+    # Interpretasi
+    risk_level = _risk_level(probability, threshold)
     
     result = {
         'region': region_name,
-        'probability': round(latest_prediction, 4),
+        'probability': round(probability, 4),
         'threshold': threshold,
         'prediction': 'Gagal Panen' if is_failure else 'Normal',
         'risk_level': risk_level,
-        'confidence': 'Tinggi' if abs(latest_prediction - threshold) > 0.2 else 'Sedang',
-        'reasons': reasons,
-        'mitigation_recommendations': mitigation,
-        'weather_forecast': weather_forecast,
-        'web_summary': build_web_summary(
-            prediction_label='Gagal Panen' if is_failure else 'Normal',
-            probability=latest_prediction,
-            risk_level=risk_level,
-            df_weather=df_weather,
-            df_harvest=df_harvest,
-            reasons=reasons,
-            mitigation=mitigation,
-            weather_forecast=weather_forecast
-        )
+        'confidence': 'Tinggi' if abs(probability - threshold) > 0.2 else 'Sedang',
     }
+    fields = OPTIONAL_FIELDS if fields is None else fields
+    if horizon_risks is not None and 'horizon_risks' in fields:
+        result['horizon_risks'] = horizon_risks
+    if contributions is not None and 'feature_contributions' in fields:
+        result['feature_contributions'] = contributions
+    need_summary = 'web_summary' in fields
+    need_reasons = need_summary or 'reasons' in fields
+    need_mitigation = need_summary or 'mitigation_recommendations' in fields
+    need_forecast = need_summary or 'weather_forecast' in fields
+    if not (need_reasons or need_mitigation or need_forecast):
+        return result
     
+    # Import modul rekomendasi
+    import recommendations as rec
+    
+    if profile is None and (need_reasons or need_mitigation):
+        profile = wp.build_weather_profile(df_weather)
+    
+    reasons, mitigation, weather_forecast = None, None, None
+    with tracing.span('recommend'):
+        # Dapatkan alasan dan rekomendasi
+        if need_reasons:
+            if is_failure:
+                reasons = rec.get_failure_reasons(probability, df_weather, df_harvest, profile=profile,
+                                                  contributions=contributions)
+            else:
+                reasons = rec.get_success_reasons(probability, df_weather, df_harvest, profile=profile,
+                                                  contributions=contributions)
+        
+        if need_mitigation:
+            mitigation = rec.get_mitigation_recommendations(probability, risk_level, df_weather, region_name, profile=profile)
+        
+        # Jika ada bulan penanaman, buat forecast untuk 3 bulan ke depan dari bulan penanaman
+        if need_forecast and prediction_period:
+            weather_forecast = rec.get_weather_forecast_from_planting_month(
+                df_weather, 
+                planting_month=prediction_period['planting_month'],
+                planting_year=prediction_period['planting_year'],
+                climatology=climatology
+            )
+        elif need_forecast:
+            weather_forecast = rec.get_weather_forecast(df_weather, months=3, climatology=climatology)
+    
+    if need_summary:
+        with tracing.span('summarize'):
+            web_summary = build_web_summary(
+                prediction_label=result['prediction'],
+                probability=probability,
+                risk_level=risk_level,
+                df_weather=df_weather,
+                df_harvest=df_harvest,
+                reasons=reasons,
+                mitigation=mitigation,
+                weather_forecast=weather_forecast,
+                profile=profile
+            )
+    
+    if 'reasons' in fields:
+        result['reasons'] = reasons
+    if 'mitigation_recommendations' in fields:
+        result['mitigation_recommendations'] = mitigation
+    if 'weather_forecast' in fields:
+        result['weather_forecast'] = weather_forecast
+    if need_summary:
+        result['web_summary'] = web_summary
     return result
 
-def predict_batch(regions: list, use_csv: bool = True, planting_month: int = None):
+def predict_batch(regions: list, use_csv: bool = True, planting_month: int = None, fields=None):
     """
     Memprediksi untuk beberapa wilayah sekaligus.
     
@@ -324,21 +498,142 @@ def predict_batch(regions: list, use_csv: bool = True, planting_month: int = Non
         regions: List nama kabupaten/kota
         use_csv: Jika True, gunakan data CSV lokal
         planting_month: Bulan penanaman (1-12) untuk prediksi 3 bulan ke depan
+        fields: Field opsional yang dihitung (lihat resolve_fields); None = semua
     
     Returns:
         list: List hasil prediksi untuk setiap wilayah
     """
-    results = []
-    for region in regions:
-        try:
-            result = predict_harvest_failure(region, use_csv=use_csv, planting_month=planting_month)
-            results.append(result)
-        except Exception as e:
-            results.append({
-                'region': region,
-                'error': str(e)
-            })
-    return results
+    return [predict_one(region, use_csv=use_csv, planting_month=planting_month, fields=fields) for region in regions]
+
+def predict_one(region: str, use_csv: bool = True, planting_month: int = None, fields=None) -> dict:
+    """Satu wilayah untuk jalur batch/stream: error dikembalikan sebagai hasil, bukan dilempar."""
+    try:
+        return get_prediction(region, use_csv=use_csv, planting_month=planting_month, fields=fields)
+    except Exception as e:
+        return {
+            'region': region,
+            'error': str(e)
+        }
+
+def _scenario_entry(prediction_period: dict, weather_forecast: dict) -> dict:
+    return {
+        'planting_month': prediction_period['planting_month'],
+        'planting_year': prediction_period['planting_year'],
+        'start_date': prediction_period['start_date'],
+        'end_date': prediction_period['end_date'],
+        # Total rata-rata kejadian cuaca ekstrem selama 3 bulan setelah tanam (pembanding antarbulan)
+        'expected_extreme_events': round(sum(m['prediksi_kejadian'] for m in weather_forecast.get('forecast', [])), 1),
+        'weather_forecast': weather_forecast,
+    }
+
+def _scenarios_result(base: dict, scenarios: list) -> dict:
+    """Bagian hasil yang tidak bergantung bulan tanam + daftar skenario per bulan."""
+    ranked = sorted(scenarios, key=lambda s: (s['expected_extreme_events'], s['planting_month']))
+    result = {
+        'region': base['region'],
+        'probability': base['probability'],
+        'threshold': base['threshold'],
+        'prediction': base['prediction'],
+        'risk_level': base['risk_level'],
+        'confidence': base['confidence'],
+        'reasons': base['reasons'],
+        'mitigation_recommendations': base['mitigation_recommendations'],
+        'scenarios': scenarios,
+        'recommended_planting_months': [s['planting_month'] for s in ranked[:3]],
+    }
+    # Field dari model (bukan bulan tanam) hanya ikut jika tersedia
+    for field in ('horizon_risks', 'feature_contributions'):
+        if base.get(field) is not None:
+            result[field] = base[field]
+    return result
+
+def get_scenarios(region_name: str, start_date: str = None, use_csv: bool = True, allow_precomputed: bool = True):
+    """
+    Skenario 12 bulan tanam untuk satu wilayah. Seperti get_prediction: pakai store batch_predict
+    jika semua bulan masih valid, selain itu fallback ke predict_scenarios.
+    """
+    region_name, error = resolve_region(region_name, use_csv)
+    if error:
+        return error
+    if allow_precomputed and _precomputed_valid(region_name, start_date, use_csv):
+        stored = prediction_store.get_many(
+            region_name,
+            range(1, 13),
+            model_version=model_registry.artifacts_version(),
+            data_version=prediction_store.data_version()
+        )
+        metrics.cache_lookup('precomputed', hit=stored is not None)
+        if stored is not None:
+            scenarios = [
+                _scenario_entry(prediction_period_for(month), stored[month]['weather_forecast'])
+                for month in range(1, 13)
+            ]
+            return _scenarios_result({**stored[1], 'region': region_name}, scenarios)
+    return predict_scenarios(region_name, start_date=start_date, use_csv=use_csv)
+
+def predict_scenarios(region_name: str, start_date: str = None, use_csv: bool = True):
+    """
+    Risiko dan forecast untuk semua bulan tanam (1-12) suatu wilayah dalam satu panggilan.
+    
+    Data, output model, profil cuaca, dan klimatologi dimuat/dihitung sekali; hanya forecast
+    3 bulan setelah tanam yang berbeda per bulan (probabilitas model tidak bergantung bulan tanam).
+    
+    Returns:
+        dict: Hasil prediksi tanpa forecast/web_summary, ditambah 'scenarios' (12 entri) dan
+        'recommended_planting_months' (3 bulan dengan kejadian cuaca ekstrem paling sedikit)
+    """
+    region_name, error = resolve_region(region_name, use_csv)
+    if error:
+        return error
+    with tracing.trace('predict_scenarios', region=region_name, use_csv=use_csv):
+        scored = _score_region(region_name, start_date, use_csv)
+        if 'error' in scored:
+            return scored
+        
+        import recommendations as rec
+        
+        df_weather, profile = scored['df_weather'], scored['profile']
+        probability, threshold = scored['probability'], scored['threshold']
+        # Jalur Supabase tidak punya tabel tersimpan -> klimatologi wilayah dibangun sekali di sini
+        climatology = scored['climatology']
+        if climatology is None:
+            climatology = clim.build_region_climatology(df_weather)
+        
+        is_failure = probability >= threshold
+        risk_level = _risk_level(probability, threshold)
+        with tracing.span('recommend'):
+            if is_failure:
+                reasons = rec.get_failure_reasons(probability, df_weather, scored['df_harvest'], profile=profile,
+                                                  contributions=scored['contributions'])
+            else:
+                reasons = rec.get_success_reasons(probability, df_weather, scored['df_harvest'], profile=profile,
+                                                  contributions=scored['contributions'])
+            mitigation = rec.get_mitigation_recommendations(probability, risk_level, df_weather, region_name, profile=profile)
+            
+            scenarios = []
+            for month in range(1, 13):
+                period = prediction_period_for(month)
+                forecast = rec.get_weather_forecast_from_planting_month(
+                    df_weather,
+                    planting_month=month,
+                    planting_year=period['planting_year'],
+                    climatology=climatology
+                )
+                scenarios.append(_scenario_entry(period, forecast))
+        
+        base = {
+            'region': region_name,
+            'probability': round(probability, 4),
+            'threshold': threshold,
+            'prediction': 'Gagal Panen' if is_failure else 'Normal',
+            'risk_level': risk_level,
+            'confidence': 'Tinggi' if abs(probability - threshold) > 0.2 else 'Sedang',
+            'reasons': reasons,
+            'mitigation_recommendations': mitigation,
+            'horizon_risks': scored['horizon_risks'],
+            'feature_contributions': scored['contributions'],
+        }
+        return _scenarios_result(base, scenarios)
 
 def build_web_summary(
     prediction_label: str,
@@ -348,15 +643,18 @@ def build_web_summary(
     df_harvest: pd.DataFrame,
     reasons: list,
     mitigation: list,
-    weather_forecast: dict
+    weather_forecast: dict,
+    profile: wp.WeatherProfile = None
 ) -> dict:
     """
     Membentuk ringkasan deskriptif berbasis data aktual untuk ditampilkan di UI.
     """
-    period_label = _get_weather_period_label(df_weather)
-    weather_stats = _build_weather_stats(df_weather)
+    if profile is None:
+        profile = wp.build_weather_profile(df_weather)
+    period_label = _get_weather_period_label(profile)
+    weather_stats = _build_weather_stats(profile)
     analysis_content = _build_analysis_content(reasons, df_harvest)
-    weather_summary = _build_weather_summary(df_weather)
+    weather_summary = _build_weather_summary(profile)
     conclusion_text = (
         f"Prediksi akhir: {prediction_label} dengan probabilitas "
         f"{probability * 100:.1f}% dan level risiko {risk_level}."
@@ -399,80 +697,45 @@ def build_web_summary(
         ]
     }
 
-def _get_weather_period_label(df_weather: pd.DataFrame) -> str:
-    if df_weather.empty or config.DATE_COLUMN not in df_weather.columns:
-        return "Data tidak tersedia"
-    start_date = df_weather[config.DATE_COLUMN].min()
-    end_date = df_weather[config.DATE_COLUMN].max()
-    if pd.isna(start_date) or pd.isna(end_date):
+def _get_weather_period_label(profile: wp.WeatherProfile) -> str:
+    if profile.period_start is None or profile.period_end is None:
         return "Data tidak tersedia"
-    start_label = start_date.strftime("%d %B %Y")
-    end_label = end_date.strftime("%d %B %Y")
+    start_label = profile.period_start.strftime("%d %B %Y")
+    end_label = profile.period_end.strftime("%d %B %Y")
     if start_label == end_label:
         return start_label
     return f"{start_label} - {end_label}"
 
-def _build_weather_stats(df_weather: pd.DataFrame) -> list:
-    stats = []
-    
-    if df_weather.empty:
+def _build_weather_stats(profile: wp.WeatherProfile) -> list:
+    if profile.empty:
         return ["Suhu Rata-rata: Data tidak tersedia", "Kelembapan: Data tidak tersedia", 
                 "Curah Hujan: Data tidak tersedia", "Angin: Data tidak tersedia"]
     
-    # Coba cari kolom numerik (suhu, kelembapan, dll)
-    has_numeric = False
-    stats.append(_format_numeric_metric(df_weather, ["suhu", "temperature"], "Suhu Rata-rata", "°C"))
-    if "Data tidak tersedia" not in stats[-1]:
-        has_numeric = True
-    
-    stats.append(_format_numeric_metric(df_weather, ["lembap", "humidity"], "Kelembapan", "%"))
-    if "Data tidak tersedia" not in stats[-1]:
-        has_numeric = True
-    
-    stats.append(_format_numeric_metric(df_weather, ["hujan", "precip"], "Curah Hujan", "mm"))
-    if "Data tidak tersedia" not in stats[-1]:
-        has_numeric = True
-    
-    stats.append(_format_numeric_metric(df_weather, ["angin", "wind"], "Angin", " km/jam"))
-    if "Data tidak tersedia" not in stats[-1]:
-        has_numeric = True
-    
     # Jika tidak ada data numerik, tampilkan statistik kejadian ekstrem
-    if not has_numeric and config.WEATHER_EVENT_COLUMN in df_weather.columns:
-        event_counts = df_weather[config.WEATHER_EVENT_COLUMN].value_counts()
-        total_events = len(df_weather)
-        unique_dates = df_weather[config.DATE_COLUMN].nunique() if config.DATE_COLUMN in df_weather.columns else 0
-        
+    if not profile.has_numeric and profile.has_events:
+        top_event = profile.top_event or ('N/A', 0)
         stats = [
-            f"Total Kejadian Ekstrem: {total_events} kali",
-            f"Jumlah Hari Terjadi: {unique_dates} hari",
-            f"Jenis Kejadian Terbanyak: {event_counts.index[0] if len(event_counts) > 0 else 'N/A'} ({event_counts.iloc[0] if len(event_counts) > 0 else 0} kali)"
+            f"Total Kejadian Ekstrem: {profile.n_rows} kali",
+            f"Jumlah Hari Terjadi: {profile.n_dates} hari",
+            f"Jenis Kejadian Terbanyak: {top_event[0]} ({top_event[1]} kali)"
         ]
-        
-        if config.WEATHER_IMPACT_COLUMN in df_weather.columns:
-            impact_counts = df_weather[config.WEATHER_IMPACT_COLUMN].value_counts()
-            stats.append(f"Dampak Terbanyak: {impact_counts.index[0] if len(impact_counts) > 0 else 'N/A'} ({impact_counts.iloc[0] if len(impact_counts) > 0 else 0} kali)")
-    
-    return stats
+        if profile.has_impacts:
+            top_impact = profile.top_impact or ('N/A', 0)
+            stats.append(f"Dampak Terbanyak: {top_impact[0]} ({top_impact[1]} kali)")
+        return stats
+    
+    metrics = profile.metrics
+    return [
+        _format_numeric_metric(metrics['avg_temperature'], "Suhu Rata-rata", "°C"),
+        _format_numeric_metric(metrics['avg_humidity'], "Kelembapan", "%"),
+        _format_numeric_metric(metrics['avg_rainfall'], "Curah Hujan", "mm"),
+        _format_numeric_metric(metrics['avg_wind_speed'], "Angin", " km/jam")
+    ]
 
-def _format_numeric_metric(df: pd.DataFrame, keywords: list, label: str, unit: str) -> str:
-    if df.empty:
+def _format_numeric_metric(value, label: str, unit: str) -> str:
+    if value is None or pd.isna(value):
         return f"{label}: Data tidak tersedia"
-    column = _find_column_by_keywords(df.columns, keywords)
-    if column:
-        series = pd.to_numeric(df[column], errors='coerce').dropna()
-        if not series.empty:
-            value = series.mean()
-            return f"{label}: {value:.1f}{unit}".rstrip()
-    return f"{label}: Data tidak tersedia"
-
-def _find_column_by_keywords(columns, keywords):
-    for col in columns:
-        col_lower = col.lower()
-        for key in keywords:
-            if key in col_lower:
-                return col
-    return None
+    return f"{label}: {value:.1f}{unit}".rstrip()
 
 def _build_analysis_content(reasons: list, df_harvest: pd.DataFrame) -> list:
     analysis = reasons.copy() if reasons else []
@@ -484,20 +747,12 @@ def _build_analysis_content(reasons: list, df_harvest: pd.DataFrame) -> list:
         analysis.append("Tidak ada analisis tambahan yang tersedia.")
     return analysis
 
-def _build_weather_summary(df_weather: pd.DataFrame) -> str:
-    if df_weather.empty or config.WEATHER_EVENT_COLUMN not in df_weather.columns:
+def _build_weather_summary(profile: wp.WeatherProfile) -> str:
+    if profile.empty or not profile.has_events:
         return "Data cuaca ekstrem tidak tersedia."
-    events = (
-        df_weather[config.WEATHER_EVENT_COLUMN]
-        .dropna()
-        .str.split(', ', expand=True)
-        .stack()
-    )
-    if events.empty:
+    if not profile.event_counts:
         return "Tidak ada catatan cuaca ekstrem pada periode ini."
-    counts = events.value_counts()
-    top_event = counts.index[0]
-    top_count = counts.iloc[0]
+    top_event, top_count = next(iter(profile.event_counts.items()))
     return f"Kejadian paling sering: {top_event} ({top_count} kali) selama periode historis."
 
 def _build_mitigation_sections(mitigation: list) -> list:
@@ -0,0 +1,174 @@
+"""
+Penyimpanan lokal (SQLite) untuk hasil prediksi yang dihitung di muka oleh batch_predict.py.
+
+Satu baris per (wilayah, bulan tanam); bulan 0 = tanpa bulan tanam (forecast dari bulan
+berjalan). Setiap baris mencatat versi model dan versi data yang menghasilkannya sehingga API
+hanya menyajikan hasil yang masih cocok dengan artefak yang sedang dimuat.
+
+File ditulis ulang secara utuh lalu di-os.replace, jadi pembaca tidak pernah melihat tabel
+setengah jadi saat job malam berjalan.
+"""
+import os
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import config
+import climatology as clim
+
+_SCHEMA = """
+create table if not exists precomputed_predictions (
+    region_key text not null,
+    planting_month integer not null,
+    region text not null,
+    prediction_for_date text not null,
+    probability real not null,
+    risk_level text not null,
+    model_version text not null,
+    data_version text not null,
+    created_at text not null,
+    payload text not null,
+    primary key (region_key, planting_month)
+)
+"""
+
+def data_version() -> str:
+    """Versi gabungan data kesimpulan + cuaca yang menjadi input prediksi."""
+    return f"{clim.data_version(config.KESIMPULAN_PATH)}-{clim.data_version(config.WEATHER_CSV_PATH)}"
+
+def region_key(region_name: str) -> str:
+    # Sama dengan pencocokan wilayah di load_kesimpulan_sequences (strip + lower)
+    return str(region_name).strip().lower()
+
+def write_all(rows: list, path: str = None) -> str:
+    """Menulis seluruh hasil batch (list dict) ke store baru lalu menggantikan yang lama."""
+    path = path or config.PREDICTION_STORE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute(_SCHEMA)
+        with conn:
+            conn.executemany(
+                "insert or replace into precomputed_predictions values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(
+                    region_key(r['region']),
+                    int(r['planting_month']),
+                    r['region'],
+                    r['prediction_for_date'],
+                    float(r['result']['probability']),
+                    r['result']['risk_level'],
+                    r['model_version'],
+                    r['data_version'],
+                    r['created_at'],
+                    json.dumps(r['result'], ensure_ascii=False),
+                ) for r in rows]
+            )
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return path
+
+def get(region_name: str, planting_month: int = None, model_version: str = None, data_version: str = None,
+        max_age_hours: float = None, path: str = None):
+    """Hasil tersimpan untuk (wilayah, bulan tanam), atau None jika tidak ada / kedaluwarsa.
+
+    Baris dianggap basi jika versi model/data berbeda dari yang diberikan, atau umurnya
+    melebihi max_age_hours (forecast bergantung pada bulan berjalan).
+    """
+    path = path or config.PREDICTION_STORE_PATH
+    if not os.path.exists(path):
+        return None
+    max_age_hours = config.PRECOMPUTED_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute(
+            "select model_version, data_version, created_at, payload from precomputed_predictions "
+            "where region_key = ? and planting_month = ?",
+            (region_key(region_name), int(planting_month or 0))
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    stored_model, stored_data, created_at, payload = row
+    if model_version is not None and stored_model != model_version:
+        return None
+    if data_version is not None and stored_data != data_version:
+        return None
+    if max_age_hours and datetime.now() - datetime.fromisoformat(created_at) > timedelta(hours=max_age_hours):
+        return None
+    return json.loads(payload)
+
+def get_many(region_name: str, planting_months, model_version: str = None, data_version: str = None,
+             max_age_hours: float = None, path: str = None):
+    """{bulan: hasil} untuk beberapa bulan tanam sekaligus (satu query), atau None jika ada
+    bulan yang tidak tersedia / basi. Aturan validitas sama dengan get()."""
+    path = path or config.PREDICTION_STORE_PATH
+    if not os.path.exists(path):
+        return None
+    max_age_hours = config.PRECOMPUTED_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    months = [int(m or 0) for m in planting_months]
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "select planting_month, model_version, data_version, created_at, payload from precomputed_predictions "
+            f"where region_key = ? and planting_month in ({','.join('?' * len(months))})",
+            (region_key(region_name), *months)
+        ).fetchall()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+    if len(rows) != len(set(months)):
+        return None
+    results = {}
+    for month, stored_model, stored_data, created_at, payload in rows:
+        if model_version is not None and stored_model != model_version:
+            return None
+        if data_version is not None and stored_data != data_version:
+            return None
+        if max_age_hours and datetime.now() - datetime.fromisoformat(created_at) > timedelta(hours=max_age_hours):
+            return None
+        results[month] = json.loads(payload)
+    return results
+
+def invalidate(region_name: str, path: str = None) -> int:
+    """Menghapus hasil tersimpan satu wilayah (semua bulan tanam); wilayah lain tidak tersentuh."""
+    path = path or config.PREDICTION_STORE_PATH
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            cursor = conn.execute(
+                "delete from precomputed_predictions where region_key = ?", (region_key(region_name),)
+            )
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def summary(path: str = None) -> dict:
+    """Ringkasan isi store (jumlah baris, versi, waktu pembuatan) untuk log/health."""
+    path = path or config.PREDICTION_STORE_PATH
+    if not os.path.exists(path):
+        return {'rows': 0}
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows, regions, model_version, data_version, created_at = conn.execute(
+            "select count(*), count(distinct region_key), max(model_version), max(data_version), max(created_at) "
+            "from precomputed_predictions"
+        ).fetchone()
+    finally:
+        conn.close()
+    return {'rows': rows, 'regions': regions, 'model_version': model_version,
+            'data_version': data_version, 'created_at': created_at}
@@ -0,0 +1,124 @@
+"""
+Cache artefak preprocessing (scaler, jendela X/y, tahun akhir jendela, skema fitur) yang
+dialamatkan oleh isi input.
+
+Kunci = SHA-256 dari isi file input (CSV kesimpulan, dan scaler jika dipakai scaler yang sudah
+ada) + parameter config yang memengaruhi hasil (SEQUENCE_LENGTH, Z_SCORE_THRESHOLD,
+HISTORICAL_YEARS_FOR_PREDICTION) + versi format. Data yang sama selalu menghasilkan kunci yang
+sama, jadi train.py / tune.py yang diulang langsung melompat ke fitting model; data atau
+parameter yang berubah otomatis menghasilkan entri baru.
+
+Entri ditulis ke direktori sementara lalu di-os.replace sehingga pembaca tidak pernah melihat
+entri setengah jadi. Array dibaca dengan mmap_mode='r'.
+
+Usage:
+    python ml/src/preprocess_cache.py            # bangun/isi cache untuk data saat ini
+    python ml/src/preprocess_cache.py --clear
+"""
+import os
+import json
+import shutil
+import hashlib
+import argparse
+
+import joblib
+import numpy as np
+
+import config
+import data_processing as dp
+
+# Naikkan jika isi/semantik artefak berubah (misal, aturan windowing) agar entri lama tidak dipakai
+_FORMAT_VERSION = 1
+_ARRAYS = ('X', 'y', 'end_years')
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def cache_key(kesimpulan_path: str, seq_len: int = None, scaler_path: str = None, horizons=None) -> str:
+    parts = {
+        'format': _FORMAT_VERSION,
+        'kesimpulan': file_digest(kesimpulan_path),
+        'scaler': file_digest(scaler_path) if scaler_path else None,
+        'seq_len': seq_len,
+        'SEQUENCE_LENGTH': config.SEQUENCE_LENGTH,
+        'Z_SCORE_THRESHOLD': config.Z_SCORE_THRESHOLD,
+        'HISTORICAL_YEARS_FOR_PREDICTION': config.HISTORICAL_YEARS_FOR_PREDICTION,
+    }
+    if horizons:
+        # Hanya ditambahkan untuk target multi-horizon agar kunci entri satu-output tidak berubah
+        parts['horizons'] = [int(h) for h in horizons]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:24]
+
+def _load(entry_dir: str) -> dict:
+    with open(os.path.join(entry_dir, 'schema.json'), 'r') as f:
+        schema = json.load(f)
+    arrays = {name: np.load(os.path.join(entry_dir, f'{name}.npy'), mmap_mode='r') for name in _ARRAYS}
+    # mtime = waktu terakhir dipakai, untuk pemangkasan entri lama
+    os.utime(entry_dir)
+    return {**arrays, 'scaler': joblib.load(os.path.join(entry_dir, 'scaler.joblib')),
+            'feature_names': schema['feature_names'], 'key': schema['key']}
+
+def _prune(cache_dir: str, keep: int):
+    entries = [os.path.join(cache_dir, d) for d in os.listdir(cache_dir) if not d.endswith('.tmp')]
+    entries = [d for d in entries if os.path.isdir(d)]
+    for stale in sorted(entries, key=os.path.getmtime, reverse=True)[keep:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+def get_windows(kesimpulan_path: str = None, seq_len: int = None, scaler_path: str = None,
+                cache_dir: str = None, horizons=None) -> dict:
+    """Jendela pelatihan seperti dp.build_kesimpulan_windows, dari cache bila input tidak berubah.
+
+    scaler_path: pakai scaler tersimpan (transform saja, misal fine-tuning) alih-alih fit baru.
+    horizons: target multi-horizon (y [n, n_horizons]), lihat dp.build_kesimpulan_windows.
+    Mengembalikan dict: X, y, end_years (mmap read-only), scaler, feature_names, key.
+    """
+    kesimpulan_path = kesimpulan_path or config.KESIMPULAN_PATH
+    cache_dir = cache_dir or config.PREPROCESS_CACHE_DIR
+    if not os.path.exists(kesimpulan_path):
+        raise FileNotFoundError(f"File data kesimpulan tidak ditemukan: {kesimpulan_path}")
+
+    key = cache_key(kesimpulan_path, seq_len, scaler_path, horizons)
+    entry_dir = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(entry_dir, 'schema.json')):
+        print(f"Cache preprocessing dipakai ({key})")
+        return _load(entry_dir)
+
+    print(f"Cache preprocessing tidak ada ({key}), membangun jendela...")
+    scaler = joblib.load(scaler_path) if scaler_path else None
+    X, y, scaler, feature_names, end_years = dp.build_kesimpulan_windows(
+        kesimpulan_path, seq_len=seq_len, scaler=scaler, with_years=True, horizons=horizons
+    )
+
+    tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name, array in (('X', X), ('y', y), ('end_years', end_years)):
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), array)
+    joblib.dump(scaler, os.path.join(tmp_dir, 'scaler.joblib'))
+    with open(os.path.join(tmp_dir, 'schema.json'), 'w') as f:
+        json.dump({'key': key, 'feature_names': feature_names, 'input_shape': [int(X.shape[1]), int(X.shape[2])],
+                   'n_windows': int(len(X)), 'source': os.path.abspath(kesimpulan_path)}, f, indent=2)
+    try:
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # Proses lain sudah menulis entri yang sama (isi identik karena kuncinya sama)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _prune(cache_dir, config.PREPROCESS_CACHE_MAX_ENTRIES)
+    return _load(entry_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache artefak preprocessing berbasis hash input")
+    parser.add_argument("--clear", action="store_true", help="Hapus seluruh cache")
+    args = parser.parse_args()
+    if args.clear:
+        shutil.rmtree(config.PREPROCESS_CACHE_DIR, ignore_errors=True)
+        print(f"Cache dihapus: {config.PREPROCESS_CACHE_DIR}")
+        return
+    entry = get_windows()
+    print(f"✅ {len(entry['X'])} jendela, shape {tuple(entry['X'].shape[1:])}, kunci {entry['key']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Indeks nama wilayah untuk validasi request sebelum data apa pun dimuat.
+
+Dibangun sekali per versi file kesimpulan (daftar wilayah yang benar-benar bisa diprediksi)
+dan menyediakan tiga tingkat pencocokan:
+  1. exact      : strip + lower (sama dengan filter di load_kesimpulan_sequences)
+  2. normalized : tanpa prefix "Kab."/"Kabupaten", tanpa spasi/tanda baca
+                  ("kab. bandung barat" -> "Bandung Barat"; "Kota Bandung" tetap wilayah kota)
+  3. fuzzy      : n-gram karakter (Dice) via indeks terbalik, HANYA untuk saran; nama yang
+                  tidak cocok di tingkat 1-2 ditolak dengan daftar saran.
+"""
+import re
+import threading
+from collections import defaultdict
+
+import pandas as pd
+
+import config
+import climatology as clim
+
+_NGRAM = 3
+_MIN_SCORE = 0.3
+# Kabupaten di data kesimpulan ditulis tanpa prefix; "Kota X" adalah wilayah berbeda dari "X"
+_KABUPATEN_PREFIX = re.compile(r'^(kabupaten|kab\.?)\s*')
+_KOTAMADYA_PREFIX = re.compile(r'^kotamadya\s*')
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+def normalize_key(name) -> str:
+    """Kunci pencocokan longgar: huruf kecil, tanpa prefix kabupaten, tanpa spasi/tanda baca."""
+    key = str(name).strip().lower()
+    key = _KABUPATEN_PREFIX.sub('', key)
+    key = _KOTAMADYA_PREFIX.sub('kota ', key)
+    return _NON_ALNUM.sub('', key)
+
+def _ngrams(key: str) -> set:
+    padded = f"^{key}$"
+    if len(padded) <= _NGRAM:
+        return {padded}
+    return {padded[i:i + _NGRAM] for i in range(len(padded) - _NGRAM + 1)}
+
+class RegionIndex:
+    def __init__(self, regions):
+        self.regions = sorted({str(r).strip() for r in regions if str(r).strip()}, key=str.lower)
+        self._exact = {r.lower(): r for r in self.regions}
+        self._normalized = {}
+        ambiguous = set()
+        for r in self.regions:
+            key = normalize_key(r)
+            if key in self._normalized and self._normalized[key] != r:
+                ambiguous.add(key)
+            self._normalized[key] = r
+        for key in ambiguous:
+            del self._normalized[key]
+
+        self._keys = [normalize_key(r) for r in self.regions]
+        self._grams = [_ngrams(k) for k in self._keys]
+        self._postings = defaultdict(list)
+        for i, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings[gram].append(i)
+
+    def __len__(self):
+        return len(self.regions)
+
+    def resolve(self, name):
+        """(nama kanonik, 'exact' | 'normalized') atau None jika tidak ada yang cocok pasti."""
+        if name is None:
+            return None
+        exact = self._exact.get(str(name).strip().lower())
+        if exact is not None:
+            return exact, 'exact'
+        normalized = self._normalized.get(normalize_key(name))
+        if normalized is not None:
+            return normalized, 'normalized'
+        return None
+
+    def suggest(self, name, limit: int = 5) -> list:
+        """Wilayah termirip: awalan kunci lebih dulu, lalu skor n-gram (Dice) tertinggi."""
+        key = normalize_key(name)
+        if not key:
+            return []
+        grams = _ngrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                shared[i] += 1
+        scored = []
+        for i, n in shared.items():
+            score = 2.0 * n / (len(grams) + len(self._grams[i]))
+            is_prefix = self._keys[i].startswith(key)
+            if score >= _MIN_SCORE or is_prefix:
+                scored.append((not is_prefix, -score, self.regions[i]))
+        for i, k in enumerate(self._keys):
+            if i not in shared and k.startswith(key):
+                scored.append((False, 0.0, self.regions[i]))
+        return [region for _, _, region in sorted(scored)[:limit]]
+
+    def lookup(self, name, limit: int = 5) -> dict:
+        match = self.resolve(name)
+        return {
+            'query': name,
+            'region': match[0] if match else None,
+            'match': match[1] if match else None,
+            'suggestions': [] if match else self.suggest(name, limit),
+        }
+
+def _is_region_column(column) -> bool:
+    name = str(column).strip().lower()
+    return name in ('kabupaten_kota', 'wilayah') or 'kabupaten' in name or 'kota' in name
+
+def _read_regions(path: str) -> list:
+    df = pd.read_csv(path, usecols=_is_region_column)
+    if not len(df.columns):
+        raise ValueError("Kolom 'kabupaten_kota' tidak ditemukan pada CSV kesimpulan")
+    return df[df.columns[0]].dropna().astype(str).unique().tolist()
+
+_lock = threading.Lock()
+_cached = {'version': None, 'index': None}
+
+def get_index(kesimpulan_path: str = None) -> RegionIndex:
+    """Indeks untuk versi file kesimpulan saat ini (dibangun ulang hanya jika file berubah)."""
+    kesimpulan_path = kesimpulan_path or config.KESIMPULAN_PATH
+    version = (kesimpulan_path, clim.data_version(kesimpulan_path))
+    if _cached['version'] == version:
+        return _cached['index']
+    with _lock:
+        if _cached['version'] != version:
+            regions = _read_regions(kesimpulan_path) if version[1] != "missing" else []
+            _cached.update(version=version, index=RegionIndex(regions))
+    return _cached['index']
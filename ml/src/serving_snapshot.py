@@ -0,0 +1,341 @@
+"""
+Snapshot serving read-only untuk API multi-worker (lihat api/serve.py).
+
+Proses induk memuat model Keras SEKALI lalu menulis ke direktori snapshot:
+  - bobot GRU/Dense sebagai file .npy + manifest arsitektur,
+  - jendela inferensi terbaru semua wilayah (data_processing.build_latest_windows),
+  - tabel klimatologi sebagai array padat wilayah x bulan (x jenis kejadian).
+
+Worker membuka file tersebut dengan np.load(mmap_mode='r'): halaman file dibagi lewat page
+cache OS, jadi N worker tidak berarti N salinan data. Inferensi di worker memakai forward pass
+GRU NumPy (SnapshotModel) atas bobot yang di-mmap, sehingga worker tidak perlu memuat
+TensorFlow sama sekali: modul di jalur serving (config, data_processing, predict, ...) tidak
+mengimpor TensorFlow di level modul, TF hanya diimpor lazy di tempat Keras benar-benar dipakai
+(training, atribusi, fallback model Keras). Kesetaraan dengan model Keras diverifikasi saat build; jika arsitektur
+tidak didukung atau hasilnya berbeda, snapshot tetap dibuat tanpa model dan worker kembali
+memakai Keras.
+
+Snapshot hanya dipakai selama versi artefak model dan versi data masih sama dengan saat build;
+selain itu predict.py otomatis kembali ke jalur baca CSV biasa.
+
+Usage:
+    python ml/src/serving_snapshot.py build
+    python ml/src/serving_snapshot.py info
+"""
+import os
+import json
+import shutil
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+import config
+import data_processing as dp
+import climatology as clim
+import prediction_store
+
+FORMAT_VERSION = 2
+_POINTER = "current.json"
+_KEEP_SNAPSHOTS = 2
+
+# --- Forward pass NumPy ---
+
+def _sigmoid(x):
+    # Bentuk tanh: stabil untuk |x| besar (tanpa overflow exp)
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+_ACTIVATIONS = {
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'linear': lambda x: x,
+}
+
+def _gru(x, kernel, recurrent_kernel, bias, layer: dict):
+    """GRU Keras (urutan gate z, r, h; reset_after sesuai konfigurasi layer)."""
+    units = layer['units']
+    act = _ACTIVATIONS[layer['activation']]
+    rec_act = _ACTIVATIONS[layer['recurrent_activation']]
+    if layer['reset_after']:
+        input_bias, recurrent_bias = bias[0], bias[1]
+    else:
+        input_bias, recurrent_bias = bias, None
+
+    x_proj = x @ kernel + input_bias  # [n, T, 3u], dihitung sekali untuk semua langkah
+    h = np.zeros((x.shape[0], units), dtype=x_proj.dtype)
+    outputs = []
+    for t in range(x.shape[1]):
+        x_z, x_r, x_h = x_proj[:, t, :units], x_proj[:, t, units:2 * units], x_proj[:, t, 2 * units:]
+        if layer['reset_after']:
+            h_proj = h @ recurrent_kernel + recurrent_bias
+            z = rec_act(x_z + h_proj[:, :units])
+            r = rec_act(x_r + h_proj[:, units:2 * units])
+            hh = act(x_h + r * h_proj[:, 2 * units:])
+        else:
+            z = rec_act(x_z + h @ recurrent_kernel[:, :units])
+            r = rec_act(x_r + h @ recurrent_kernel[:, units:2 * units])
+            hh = act(x_h + (r * h) @ recurrent_kernel[:, 2 * units:])
+        h = z * h + (1.0 - z) * hh
+        if layer['return_sequences']:
+            outputs.append(h)
+    return np.stack(outputs, axis=1) if layer['return_sequences'] else h
+
+class SnapshotModel:
+    """Pengganti model Keras untuk inferensi: predict(X) -> [n, n_output] dari bobot di snapshot."""
+
+    def __init__(self, layers: list, weights: dict):
+        self.layers = layers
+        self.weights = weights
+
+    def predict(self, X, verbose=0, batch_size=None):
+        out = np.asarray(X, dtype=np.float32)
+        for i, layer in enumerate(self.layers):
+            w = self.weights[i]
+            if layer['type'] == 'GRU':
+                out = _gru(out, w[0], w[1], w[2], layer)
+            elif layer['type'] == 'Dense':
+                out = _ACTIVATIONS[layer['activation']](out @ w[0] + w[1])
+        return out
+
+def _describe_layers(model):
+    """(layers, bobot per layer) dari model Keras Sequential; None jika ada layer tak didukung."""
+    layers, weights = [], []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        cfg = layer.get_config()
+        if kind == 'Dropout':
+            continue  # tidak aktif saat inferensi
+        if kind == 'GRU':
+            if cfg.get('go_backwards') or cfg.get('stateful') or cfg.get('activation') not in _ACTIVATIONS \
+                    or cfg.get('recurrent_activation') not in _ACTIVATIONS:
+                return None
+            layers.append({'type': 'GRU', 'units': cfg['units'], 'activation': cfg['activation'],
+                           'recurrent_activation': cfg['recurrent_activation'],
+                           'reset_after': bool(cfg.get('reset_after', True)),
+                           'return_sequences': bool(cfg.get('return_sequences', False))})
+        elif kind == 'Dense':
+            if cfg.get('activation') not in _ACTIVATIONS:
+                return None
+            layers.append({'type': 'Dense', 'activation': cfg['activation']})
+        else:
+            return None
+        weights.append([np.asarray(w, dtype=np.float32) for w in layer.get_weights()])
+    return layers, weights
+
+# --- Klimatologi padat ---
+
+def _encode_climatology(table: dict) -> (list, list, dict):
+    """{wilayah: {bulan: entri}} -> (wilayah, jenis kejadian, array [R, 12(, E)])."""
+    regions = sorted(table)
+    events = sorted({event for months in table.values() for entry in months.values() for event, _ in entry['histogram']})
+    event_index = {event: i for i, event in enumerate(events)}
+    arrays = {
+        'clim_present': np.zeros((len(regions), 12), dtype=bool),
+        'clim_n_events': np.zeros((len(regions), 12), dtype=np.int32),
+        'clim_n_years': np.zeros((len(regions), 12), dtype=np.int32),
+        'clim_events_per_year': np.zeros((len(regions), 12), dtype=np.float64),
+        'clim_histogram': np.zeros((len(regions), 12, max(len(events), 1)), dtype=np.int32),
+    }
+    for r, region in enumerate(regions):
+        for month, entry in table[region].items():
+            m = int(month) - 1
+            arrays['clim_present'][r, m] = True
+            arrays['clim_n_events'][r, m] = entry['n_events']
+            arrays['clim_n_years'][r, m] = entry['n_years']
+            arrays['clim_events_per_year'][r, m] = entry['events_per_year']
+            for event, count in entry['histogram']:
+                arrays['clim_histogram'][r, m, event_index[event]] = count
+    return regions, events, arrays
+
+# --- Snapshot ---
+
+class Snapshot:
+    """Snapshot yang sudah dibuka (array di-mmap, read-only)."""
+
+    def __init__(self, path: str, manifest: dict):
+        self.path = path
+        self.manifest = manifest
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+        self._window_index = {prediction_store.region_key(r): i for i, r in enumerate(manifest['window_regions'])}
+        self.windows = load('windows')
+
+        self._clim_index = {r: i for i, r in enumerate(manifest['clim_regions'])}
+        self._events = manifest['clim_events']
+        self._clim = {name: load(name) for name in
+                      ('clim_present', 'clim_n_events', 'clim_n_years', 'clim_events_per_year', 'clim_histogram')}
+
+        self.model = None
+        if manifest.get('layers'):
+            weights = {i: [load(f"w{i}_{j}") for j in range(n)] for i, n in enumerate(manifest['weight_counts'])}
+            self.model = SnapshotModel(manifest['layers'], weights)
+
+    def window(self, region_name: str):
+        """Jendela terbaru [seq_len, n_features] (view mmap) atau None jika wilayah tidak ada."""
+        i = self._window_index.get(prediction_store.region_key(region_name))
+        return None if i is None else self.windows[i]
+
+    def region_climatology(self, region_name: str) -> dict:
+        """Sama dengan climatology.get_region_climatology, didekode dari array untuk satu wilayah."""
+        r = self._clim_index.get(clim.region_key(region_name))
+        if r is None:
+            return {}
+        table = {}
+        for m in np.flatnonzero(self._clim['clim_present'][r]):
+            counts = self._clim['clim_histogram'][r, m]
+            nonzero = np.flatnonzero(counts)
+            # Urutan histogram asli: jumlah menurun, seri diurutkan nama kejadian
+            order = nonzero[np.argsort(-counts[nonzero], kind='stable')]
+            table[int(m) + 1] = {
+                'n_events': int(self._clim['clim_n_events'][r, m]),
+                'n_years': int(self._clim['clim_n_years'][r, m]),
+                'events_per_year': float(self._clim['clim_events_per_year'][r, m]),
+                'histogram': [[self._events[e], int(counts[e])] for e in order],
+            }
+        return table
+
+def _snapshot_dir(root: str = None) -> str:
+    return root or config.SERVING_SNAPSHOT_DIR
+
+def build(root: str = None, verify_tolerance: float = 1e-4) -> str:
+    """Membangun snapshot baru dari artefak & data saat ini; mengembalikan path-nya."""
+    import model_registry
+
+    root = _snapshot_dir(root)
+    # Selalu dari file Keras (bukan snapshot lama) agar bobot & verifikasi bersumber dari artefak asli
+    model, scaler, model_config = model_registry._load(use_snapshot=False)
+    seq_len = int(model_config.get('sequence_length', config.SEQUENCE_LENGTH))
+    manifest = {
+        'format': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'model_version': model_registry.artifacts_version(),
+        'data_version': prediction_store.data_version(),
+        'min_year': clim._min_year(),
+        'sequence_length': seq_len,
+    }
+    snapshot_id = f"{manifest['model_version']}-{manifest['data_version']}-{datetime.now():%Y%m%d%H%M%S}"
+    path = os.path.join(root, snapshot_id)
+    os.makedirs(path, exist_ok=True)
+    save = lambda name, array: np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+
+    regions, X = dp.build_latest_windows(scaler, seq_len)
+    save('windows', X)
+    manifest['window_regions'] = regions
+
+    clim_regions, events, clim_arrays = _encode_climatology(clim.load_climatology())
+    for name, array in clim_arrays.items():
+        save(name, array)
+    manifest['clim_regions'] = clim_regions
+    manifest['clim_events'] = events
+
+    described = _describe_layers(model)
+    if described is None:
+        print("Peringatan: arsitektur model tidak didukung forward pass NumPy; worker akan memuat Keras")
+    else:
+        layers, weights = described
+        for i, layer_weights in enumerate(weights):
+            for j, w in enumerate(layer_weights):
+                save(f"w{i}_{j}", w)
+        candidate = SnapshotModel(layers, {i: w for i, w in enumerate(weights)})
+        if len(X):
+            expected = model.predict(X, batch_size=max(config.BATCH_SIZE, 256), verbose=0)
+            diff = float(np.max(np.abs(candidate.predict(X) - expected)))
+            print(f"Verifikasi forward pass NumPy vs Keras: selisih maks {diff:.2e} ({len(X)} wilayah)")
+            if diff > verify_tolerance:
+                print("Peringatan: selisih melebihi toleransi; worker akan memuat Keras")
+                described = None
+        if described is not None:
+            manifest['layers'] = layers
+            manifest['weight_counts'] = [len(w) for w in weights]
+
+    with open(os.path.join(path, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    # Pointer diganti secara atomik; worker yang sedang berjalan beralih pada pengecekan berikutnya
+    pointer = os.path.join(root, _POINTER)
+    with open(f"{pointer}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'snapshot': snapshot_id}, f)
+    os.replace(f"{pointer}.tmp", pointer)
+
+    # Snapshot lama yang masih di-mmap worker tetap valid di Linux meski direktorinya dihapus
+    old = sorted((d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)) and d != snapshot_id),
+                 key=lambda d: os.path.getmtime(os.path.join(root, d)))
+    for d in old[:max(0, len(old) - (_KEEP_SNAPSHOTS - 1))]:
+        shutil.rmtree(os.path.join(root, d), ignore_errors=True)
+    return path
+
+# Snapshot terbuka per proses: (mtime pointer) -> Snapshot
+_opened = {'key': None, 'snapshot': None}
+
+def _open_pointer(root: str):
+    pointer = os.path.join(root, _POINTER)
+    try:
+        key = os.stat(pointer).st_mtime_ns
+    except OSError:
+        return None
+    if _opened['key'] != key:
+        with open(pointer, 'r', encoding='utf-8') as f:
+            path = os.path.join(root, json.load(f)['snapshot'])
+        with open(os.path.join(path, "manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        _opened.update(key=key, snapshot=Snapshot(path, manifest) if manifest.get('format') == FORMAT_VERSION else None)
+    return _opened['snapshot']
+
+def current(model_version: str = None, require_data: bool = True):
+    """
+    Snapshot aktif jika mode snapshot diaktifkan (ML_SERVING_SNAPSHOT) dan versinya masih cocok
+    dengan artefak model & data saat ini; selain itu None (pemanggil memakai jalur biasa).
+    require_data=False: cukup versi model yang cocok (untuk bobot model saja).
+    """
+    if not config.SERVING_SNAPSHOT_ENABLED:
+        return None
+    snapshot = _open_pointer(_snapshot_dir())
+    if snapshot is None:
+        return None
+    if model_version is None:
+        import model_registry
+        model_version = model_registry.artifacts_version()
+    manifest = snapshot.manifest
+    if manifest['model_version'] != model_version:
+        return None
+    if require_data and (manifest['data_version'] != prediction_store.data_version()
+                         or manifest['min_year'] != clim._min_year()):
+        return None
+    return snapshot
+
+def info(root: str = None) -> dict:
+    root = _snapshot_dir(root)
+    snapshot = _open_pointer(root)
+    if snapshot is None:
+        return {'snapshot': None}
+    size = sum(os.path.getsize(os.path.join(snapshot.path, f)) for f in os.listdir(snapshot.path))
+    m = snapshot.manifest
+    return {
+        'snapshot': os.path.basename(snapshot.path),
+        'created_at': m['created_at'],
+        'model_version': m['model_version'],
+        'data_version': m['data_version'],
+        'regions': len(m['window_regions']),
+        'climatology_regions': len(m['clim_regions']),
+        'numpy_model': snapshot.model is not None,
+        'bytes': size,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot serving read-only (mmap) untuk API multi-worker")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--dir", default=None, help="Direktori snapshot (default: config.SERVING_SNAPSHOT_DIR)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        path = build(args.dir)
+        print(f"✅ Snapshot serving ditulis ke {path}")
+    print(f"Snapshot: {info(args.dir)}")
+
+if __name__ == "__main__":
+    main()
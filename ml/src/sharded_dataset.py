@@ -0,0 +1,250 @@
+"""
+Dataset pelatihan out-of-core: jendela tahunan yang sudah diskalakan ditulis ke shard .npy,
+lalu dibaca kembali dengan tf.data secara streaming.
+
+Tahap preprocessing (write_shards) tidak pernah memuat seluruh CSV kesimpulan sekaligus:
+  1. Pass 1 (chunk CSV): MinMaxScaler.partial_fit, jumlah tahun per wilayah, tahun maksimum.
+  2. Pass 2 (chunk CSV): baris diskalakan lalu dipartisi ke bucket berdasarkan hash nama wilayah
+     (file spill sementara), sehingga semua baris satu wilayah berada di bucket yang sama.
+  3. Per bucket (cukup kecil untuk RAM): sort (Wilayah, Tahun), jendela dibentuk dengan
+     gather NumPy yang sama dengan build_kesimpulan_windows, split train/val deterministik,
+     lalu jendela diacak dan ditulis ke shard berukuran tetap (X_*.npy float32, y_*.npy int8).
+
+Pembaca (make_dataset): urutan shard diacak, beberapa shard dibaca paralel via interleave,
+shuffle buffer, batch, map paralel (cast label), dan prefetch. Memori stabil: paling banyak
+cycle_length shard + shuffle buffer berada di RAM, berapa pun total riwayatnya.
+
+Usage:
+    python ml/src/sharded_dataset.py                # tulis shard ke config.SHARD_DIR
+    python ml/src/sharded_dataset.py --force
+"""
+import os
+import json
+import shutil
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import config
+import climatology as clim
+import data_processing as dp
+
+_RENAME = {'kabupaten_kota': 'Wilayah', 'tahun': 'Tahun', 'label_gagal': 'GagalPanen'}
+_META = 'meta.json'
+
+def _chunks(path: str):
+    for chunk in pd.read_csv(path, chunksize=config.SHARD_CSV_CHUNK_ROWS):
+        yield chunk.rename(columns=_RENAME)
+
+def _feature_names(chunk: pd.DataFrame) -> list:
+    features = chunk.drop(columns=['Wilayah', 'Tahun', 'GagalPanen', 'status_panen'], errors='ignore')
+    return features.select_dtypes(include=[np.number]).columns.tolist()
+
+def _bucket_of(regions: pd.Series, n_buckets: int) -> np.ndarray:
+    # Hash stabil antar chunk (bukan hash() Python yang diacak per proses)
+    return (pd.util.hash_pandas_object(regions.astype(str), index=False).to_numpy() % n_buckets).astype(int)
+
+class _ShardWriter:
+    """Menampung jendela lalu menulis shard berukuran tetap ke satu direktori split."""
+    def __init__(self, directory: str, shard_windows: int):
+        self.directory = directory
+        self.shard_windows = shard_windows
+        self.names = []
+        self.count = 0
+        self._X, self._y, self._n = [], [], 0
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, X: np.ndarray, y: np.ndarray):
+        self._X.append(X)
+        self._y.append(y)
+        self._n += len(X)
+        while self._n >= self.shard_windows:
+            self._flush(self.shard_windows)
+
+    def close(self):
+        if self._n:
+            self._flush(self._n)
+
+    def _flush(self, n: int):
+        X, y = np.concatenate(self._X), np.concatenate(self._y)
+        name = f"{len(self.names):05d}"
+        np.save(os.path.join(self.directory, f"X_{name}.npy"), X[:n])
+        np.save(os.path.join(self.directory, f"y_{name}.npy"), y[:n])
+        self.names.append(name)
+        self.count += n
+        self._X, self._y, self._n = [X[n:]], [y[n:]], len(X) - n
+
+def _resolve_seq_len(kesimpulan_path: str) -> int:
+    """Panjang sekuens default dari deret wilayah terpendek (hanya kolom wilayah yang dibaca)."""
+    counts = pd.Series(dtype=np.int64)
+    for chunk in pd.read_csv(kesimpulan_path, usecols=['kabupaten_kota'], chunksize=config.SHARD_CSV_CHUNK_ROWS):
+        counts = counts.add(chunk['kabupaten_kota'].value_counts(), fill_value=0)
+    # Aturan yang sama dengan load_kesimpulan_sequences / build_kesimpulan_windows
+    return min(config.SEQUENCE_LENGTH, max(2, int(counts.min()) - 1))
+
+def _source_key(kesimpulan_path: str, seq_len: int, seed: int) -> dict:
+    """Semua yang menentukan isi shard: versi data, panjang sekuens ter-resolve, dan konfigurasi shard."""
+    return {'source': os.path.abspath(kesimpulan_path), 'data_version': clim.data_version(kesimpulan_path),
+            'sequence_length': int(seq_len), 'validation_split': config.VALIDATION_SPLIT,
+            'shard_buckets': config.SHARD_BUCKETS, 'shard_windows': config.SHARD_WINDOWS, 'seed': seed}
+
+def load_meta(shard_dir: str = None) -> dict:
+    path = os.path.join(shard_dir or config.SHARD_DIR, _META)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_shards(shard_dir: str = None, kesimpulan_path: str = None, seq_len: int = None,
+                 force: bool = False, seed: int = 42) -> dict:
+    """Menulis jendela train/val sebagai shard .npy. Dilewati jika shard untuk versi data ini sudah ada."""
+    from sklearn.preprocessing import MinMaxScaler
+
+    shard_dir = shard_dir or config.SHARD_DIR
+    kesimpulan_path = kesimpulan_path or config.KESIMPULAN_PATH
+    if not os.path.exists(kesimpulan_path):
+        raise FileNotFoundError(f"File data kesimpulan tidak ditemukan: {kesimpulan_path}")
+
+    if seq_len is None:
+        seq_len = _resolve_seq_len(kesimpulan_path)
+    key = _source_key(kesimpulan_path, seq_len, seed)
+    meta = load_meta(shard_dir)
+    if not force and meta is not None and meta['key'] == key:
+        print(f"Shard sudah sesuai versi data ({meta['n_train']} train / {meta['n_val']} val), dilewati")
+        return meta
+
+    # Pass 1: statistik global tanpa menyimpan baris
+    print(f"[shard 1/3] Statistik & scaler dari {kesimpulan_path}...")
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    feature_names, max_year, n_rows = None, None, 0
+    for chunk in _chunks(kesimpulan_path):
+        feature_names = feature_names or _feature_names(chunk)
+        scaler.partial_fit(chunk[feature_names])
+        year = int(chunk['Tahun'].max())
+        max_year = year if max_year is None else max(max_year, year)
+        n_rows += len(chunk)
+
+    # Pass 2: skala + partisi per bucket wilayah ke file spill
+    print(f"[shard 2/3] Mempartisi {n_rows} baris ke {config.SHARD_BUCKETS} bucket...")
+    tmp_dir = f"{shard_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    spill_dir = os.path.join(tmp_dir, '_spill')
+    os.makedirs(spill_dir)
+    for c, chunk in enumerate(_chunks(kesimpulan_path)):
+        part = pd.DataFrame(scaler.transform(chunk[feature_names]).astype(np.float32), columns=feature_names)
+        part['Wilayah'] = chunk['Wilayah'].to_numpy()
+        part['Tahun'] = chunk['Tahun'].to_numpy()
+        part['GagalPanen'] = chunk['GagalPanen'].to_numpy(dtype=np.int8)
+        buckets = _bucket_of(chunk['Wilayah'], config.SHARD_BUCKETS)
+        for b in np.unique(buckets):
+            part[buckets == b].to_pickle(os.path.join(spill_dir, f"{b:04d}_{c:06d}.pkl"))
+
+    # Pass 3: jendela per bucket -> shard
+    print(f"[shard 3/3] Membentuk jendela (panjang {seq_len}) dan menulis shard...")
+    writers = {split: _ShardWriter(os.path.join(tmp_dir, split), config.SHARD_WINDOWS) for split in ('train', 'val')}
+    spill_files = sorted(os.listdir(spill_dir))
+    for b in range(config.SHARD_BUCKETS):
+        parts = [f for f in spill_files if f.startswith(f"{b:04d}_")]
+        if not parts:
+            continue
+        df = pd.concat([pd.read_pickle(os.path.join(spill_dir, f)) for f in parts], ignore_index=True)
+        df = df.sort_values(['Wilayah', 'Tahun']).reset_index(drop=True)
+        starts = dp._region_window_starts(df['Wilayah'].to_numpy(), seq_len)
+        if not len(starts):
+            continue
+        X = dp.gather_windows(df[feature_names].to_numpy(dtype=np.float32), starts, seq_len)
+        y = df['GagalPanen'].to_numpy(dtype=np.int8)[starts]
+
+        # Split & urutan deterministik per bucket; jendela diacak agar satu shard berisi banyak wilayah
+        rng = np.random.default_rng(seed + b)
+        order = rng.permutation(len(X))
+        is_val = rng.random(len(X)) < config.VALIDATION_SPLIT
+        for split, mask in (('train', ~is_val[order]), ('val', is_val[order])):
+            idx = order[mask]
+            writers[split].add(X[idx], y[idx])
+        for f in parts:
+            os.remove(os.path.join(spill_dir, f))
+    for writer in writers.values():
+        writer.close()
+    shutil.rmtree(spill_dir)
+
+    if writers['train'].count == 0:
+        shutil.rmtree(tmp_dir)
+        raise ValueError("Tidak ada wilayah yang memiliki panjang deret memadai untuk sekuens.")
+
+    joblib.dump(scaler, os.path.join(tmp_dir, 'scaler.joblib'))
+    meta = {
+        'key': key,
+        'input_shape': [int(seq_len), len(feature_names)],
+        'feature_names': feature_names,
+        'high_water_mark': max_year,
+        'n_train': writers['train'].count,
+        'n_val': writers['val'].count,
+        'shards': {split: w.names for split, w in writers.items()},
+    }
+    with open(os.path.join(tmp_dir, _META), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Direktori baru menggantikan yang lama sekaligus (pembaca tidak melihat shard campuran)
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    os.replace(tmp_dir, shard_dir)
+    print(f"✅ {meta['n_train']} jendela train ({len(meta['shards']['train'])} shard), "
+          f"{meta['n_val']} val ({len(meta['shards']['val'])} shard) di {shard_dir}")
+    return meta
+
+def make_dataset(split: str = 'train', shard_dir: str = None, batch_size: int = None,
+                 shuffle: bool = None, seed: int = None):
+    """tf.data streaming dari shard: interleave baca paralel -> shuffle -> batch -> map paralel -> prefetch."""
+    import tensorflow as tf
+
+    shard_dir = shard_dir or config.SHARD_DIR
+    batch_size = batch_size or config.BATCH_SIZE
+    shuffle = (split == 'train') if shuffle is None else shuffle
+    meta = load_meta(shard_dir)
+    if meta is None:
+        raise FileNotFoundError(f"Shard belum ditulis di {shard_dir}; jalankan write_shards terlebih dahulu")
+
+    seq_len, n_features = meta['input_shape']
+    names = meta['shards'][split]
+    directory = os.path.join(shard_dir, split)
+
+    def read_shard(name):
+        name = name.decode() if isinstance(name, bytes) else str(name)
+        return (np.load(os.path.join(directory, f"X_{name}.npy")),
+                np.load(os.path.join(directory, f"y_{name}.npy")))
+
+    def shard_windows(name):
+        X, y = tf.numpy_function(read_shard, [name], [tf.float32, tf.int8])
+        X.set_shape([None, seq_len, n_features])
+        y.set_shape([None])
+        return tf.data.Dataset.from_tensor_slices((X, y))
+
+    files = tf.data.Dataset.from_tensor_slices(names)
+    if shuffle:
+        files = files.shuffle(len(names), seed=seed, reshuffle_each_iteration=True)
+    dataset = files.interleave(
+        shard_windows,
+        cycle_length=max(1, min(len(names), config.SHARD_CYCLE_LENGTH)),
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not shuffle
+    )
+    if shuffle:
+        dataset = dataset.shuffle(config.SHARD_SHUFFLE_BUFFER, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(
+        lambda X, y: (X, tf.cast(y, tf.float32)),
+        num_parallel_calls=tf.data.AUTOTUNE
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+def main():
+    parser = argparse.ArgumentParser(description="Tulis jendela pelatihan ter-skala sebagai shard .npy")
+    parser.add_argument("--out", default=None, help="Direktori shard (default: config.SHARD_DIR)")
+    parser.add_argument("--data", default=None, help="CSV kesimpulan (default: config.KESIMPULAN_PATH)")
+    parser.add_argument("--force", action="store_true", help="Tulis ulang walau versi data sama")
+    args = parser.parse_args()
+    write_shards(args.out, args.data, force=args.force)
+
+if __name__ == "__main__":
+    main()
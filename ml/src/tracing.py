@@ -0,0 +1,130 @@
+"""
+Tracing terstruktur ringan untuk pipeline prediksi.
+
+Satu request = satu trace berisi span per tahap (load, filter, scale, window, infer,
+recommend, summarize) beserta durasinya dalam milidetik. Tracing mati secara default dan
+diaktifkan lewat sampling (config.TRACE_SAMPLE_RATE / env ML_TRACE_SAMPLE_RATE). Trace yang
+tersampel disimpan di ring buffer in-process (recent_traces) dan, jika
+config.TRACE_EXPORT_PATH diatur, ditambahkan ke file JSONL.
+
+Contoh:
+    with tracing.trace('predict', region='Bandung'):
+        with tracing.span('load'):
+            ...
+"""
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('ml_trace', default=None)
+_recent = deque(maxlen=config.TRACE_BUFFER_SIZE)
+_export_lock = threading.Lock()
+
+class Trace:
+    """Kumpulan span untuk satu request."""
+    __slots__ = ('trace_id', 'name', 'attrs', 'spans', '_start', '_stack', 'duration_ms')
+
+    def __init__(self, name: str, attrs: dict):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.spans = []
+        self._start = time.perf_counter()
+        self._stack = []
+        self.duration_ms = None
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'attrs': self.attrs,
+            'duration_ms': self.duration_ms,
+            'spans': self.spans,
+        }
+
+    def stage_totals(self) -> dict:
+        """Total durasi per nama span (ms), berguna untuk melihat ke mana waktu request habis."""
+        totals = {}
+        for s in self.spans:
+            totals[s['name']] = round(totals.get(s['name'], 0.0) + s['duration_ms'], 3)
+        return totals
+
+def _sampled(force: bool) -> bool:
+    if force:
+        return True
+    rate = config.TRACE_SAMPLE_RATE
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+def _export(tr: Trace):
+    record = tr.to_dict()
+    _recent.append(record)
+    if config.TRACE_EXPORT_PATH:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with _export_lock, open(config.TRACE_EXPORT_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    logger.debug("trace %s %s %.1fms %s", tr.name, tr.trace_id, tr.duration_ms, tr.stage_totals())
+
+@contextmanager
+def trace(name: str, force: bool = False, **attrs):
+    """Membuka trace baru (jika tersampel). Trace bersarang ikut ke trace luar."""
+    if _current.get() is not None or not _sampled(force):
+        yield _current.get()
+        return
+    tr = Trace(name, attrs)
+    token = _current.set(tr)
+    try:
+        yield tr
+    finally:
+        tr.duration_ms = round((time.perf_counter() - tr._start) * 1000, 3)
+        _current.reset(token)
+        _export(tr)
+
+@contextmanager
+def span(name: str, **attrs):
+    """Mencatat durasi satu tahap di trace aktif; no-op murah jika tidak ada trace."""
+    tr = _current.get()
+    if tr is None:
+        yield None
+        return
+    start = time.perf_counter()
+    record = {
+        'name': name,
+        'parent': tr._stack[-1] if tr._stack else None,
+        'start_ms': round((start - tr._start) * 1000, 3),
+        'duration_ms': None,
+        'attrs': attrs,
+    }
+    tr._stack.append(name)
+    try:
+        yield record
+    finally:
+        tr._stack.pop()
+        record['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        tr.spans.append(record)
+
+def annotate(**attrs):
+    """Menambahkan atribut ke trace aktif (misal, jumlah baris setelah filter)."""
+    tr = _current.get()
+    if tr is not None:
+        tr.attrs.update(attrs)
+
+def current_trace():
+    return _current.get()
+
+def recent_traces(limit: int = None) -> list:
+    """Trace terakhir (terbaru di akhir) dalam bentuk dict siap-JSON."""
+    items = list(_recent)
+    return items[-limit:] if limit else items
+
+def export_json(limit: int = None) -> str:
+    return json.dumps(recent_traces(limit), ensure_ascii=False, default=str)
@@ -1,13 +1,18 @@
 import os
 import json
+import argparse
 import joblib
+import pandas as pd
 import numpy as np
 import tensorflow as tf
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
-import data_processing as dp
+import evaluate
+import attribution
+import model_registry
+import preprocess_cache
 import config
 
-def build_model(input_shape, learning_rate=0.001, dropout_rate=0.3):
+def build_model(input_shape, learning_rate=0.001, dropout_rate=0.3, n_outputs=1):
     model = tf.keras.Sequential([
         tf.keras.layers.GRU(
             64,
@@ -23,7 +28,8 @@ def build_model(input_shape, learning_rate=0.001, dropout_rate=0.3):
         ),
         tf.keras.layers.Dense(16, activation='relu'),
         tf.keras.layers.Dropout(dropout_rate),
-        tf.keras.layers.Dense(1, activation='sigmoid')
+        # Satu sigmoid per horizon (n_outputs > 1 untuk model multi-horizon)
+        tf.keras.layers.Dense(n_outputs, activation='sigmoid')
     ])
 
     model.compile(
@@ -37,31 +43,134 @@ def build_model(input_shape, learning_rate=0.001, dropout_rate=0.3):
     )
     return model
 
-def train_model():
+def train_model(horizons=None):
+    """Training penuh. horizons (misal, [1, 2, 3]) -> model multi-horizon: satu output sigmoid
+    per horizon dengan threshold terkalibrasi masing-masing; semua horizon dari satu forward pass.
+    """
+    horizons = [int(h) for h in horizons] if horizons else None
     # 1. Muat data
-    print("[1/4] Memuat data...")
-    dataset, scaler, _ = dp.load_kesimpulan_sequences(is_training=True)
+    # Scaler & jendela dari cache berbasis hash input (preprocess_cache.py): jika CSV dan
+    # parameter config tidak berubah, langsung lanjut ke fitting tanpa windowing ulang
+    print("[1/5] Memuat data...")
+    entry = preprocess_cache.get_windows(horizons=horizons)
+    X, y, scaler = entry['X'], entry['y'], entry['scaler']
     
-    # Bagi dataset menjadi train/val
-    dataset = dataset.shuffle(1000)
-    n_samples = len(list(dataset))
-    val_size = int(0.2 * n_samples)
-    train_dataset = dataset.skip(val_size)
-    val_dataset = dataset.take(val_size)
+    # Bagi train/val dengan permutasi deterministik: split yang sama di setiap run, val tidak
+    # bocor ke train antar epoch, dan kalibrasi threshold memakai val yang sama
+    order = np.random.default_rng(42).permutation(len(X))
+    val_size = int(config.VALIDATION_SPLIT * len(X))
+    val_idx, train_idx = np.sort(order[:val_size]), np.sort(order[val_size:])
+    X_val, y_val = X[val_idx], y[val_idx].astype(np.float32)
+    train_dataset = (
+        tf.data.Dataset.from_tensor_slices((X[train_idx], y[train_idx].astype(np.float32)))
+        .shuffle(len(train_idx), seed=42)
+        .batch(config.BATCH_SIZE)
+    )
+    val_dataset = tf.data.Dataset.from_tensor_slices((X_val, y_val)).batch(config.BATCH_SIZE)
     
-    # Dapatkan input shape
-    for batch in train_dataset.take(1):
-        # batch[0].shape adalah (batch_size, sequence_length, n_features)
-        # Kita hanya perlu (sequence_length, n_features)
-        input_shape = batch[0].shape[1:]  # Ambil setelah batch size
-        print(f"Input shape: {input_shape}")
+    # input shape = (sequence_length, n_features)
+    input_shape = X.shape[1:]
+    print(f"Input shape: {input_shape}")
 
     # 2. Bangun model
-    print("\n[2/4] Membangun model...")
-    model = build_model(input_shape)
+    print("\n[2/5] Membangun model...")
+    model = build_model(input_shape, n_outputs=len(horizons) if horizons else 1)
     
     # 3. Callbacks
-    callbacks = [
+    callbacks = _callbacks()
+    
+    # 4. Latih model
+    print("\n[3/5] Melatih model...")
+    history = model.fit(
+        train_dataset,
+        validation_data=val_dataset,
+        epochs=100,
+        callbacks=callbacks,
+        verbose=1
+    )
+    
+    # 5. Kalibrasi threshold pada data validasi
+    print("\n[4/5] Mengkalibrasi threshold...")
+    if horizons:
+        horizon_calibration = evaluate.calibrate_horizons(model, X_val, y_val, horizons)
+        calibration = horizon_calibration[0]
+    else:
+        calibration = evaluate.calibrate_threshold(model, X_val, y_val)
+
+    # 6. Simpan model, scaler, dan konfigurasi (termasuk threshold) secara atomik
+    print("\n[5/5] Menyimpan model dan scaler...")
+    model_config = {
+        'input_shape': list(input_shape),  # Konversi ke list Python
+        'sequence_length': int(input_shape[0]),
+        'n_features': int(input_shape[1]),
+        'optimal_threshold': calibration['threshold'],
+        'calibration': calibration,
+        # Tahun data terbaru yang sudah dilihat model -> titik awal train_incremental berikutnya
+        'high_water_mark': _data_high_water_mark()
+    }
+    if horizons:
+        # Horizon pertama = 'probability'/'optimal_threshold' utama; sisanya dibaca predict.py
+        model_config['horizons'] = horizons
+        model_config['horizon_thresholds'] = [c['threshold'] for c in horizon_calibration]
+        model_config['horizon_calibration'] = horizon_calibration
+    artifacts_dir = evaluate.save_artifacts_atomic(model, scaler, model_config)
+    
+    print(f"\n✅ Training selesai! Model disimpan di {artifacts_dir}")
+    attribution.refresh()
+    return model, history
+
+def train_model_sharded(shard_dir: str = None, rebuild: bool = False):
+    """Training dari shard .npy (sharded_dataset.py) yang di-stream tf.data, bukan array di RAM.
+
+    Memori pelatihan tidak bergantung pada total riwayat: hanya shard yang sedang di-interleave
+    dan shuffle buffer yang dimuat. Kalibrasi threshold memakai skor validasi per batch.
+    """
+    import sharded_dataset as sd
+
+    print("[1/5] Menyiapkan shard dataset...")
+    meta = sd.write_shards(shard_dir, force=rebuild)
+    shard_dir = shard_dir or config.SHARD_DIR
+    train_dataset = sd.make_dataset('train', shard_dir)
+    val_dataset = sd.make_dataset('val', shard_dir)
+    input_shape = tuple(meta['input_shape'])
+    print(f"Input shape: {input_shape} | train={meta['n_train']} val={meta['n_val']} jendela")
+
+    print("\n[2/5] Membangun model...")
+    model = build_model(input_shape)
+
+    print("\n[3/5] Melatih model (streaming)...")
+    history = model.fit(
+        train_dataset,
+        validation_data=val_dataset,
+        epochs=100,
+        callbacks=_callbacks(),
+        verbose=1
+    )
+
+    print("\n[4/5] Mengkalibrasi threshold...")
+    y_val, y_score = evaluate.score_dataset(model, val_dataset)
+    calibration = evaluate.calibrate_scores(y_val, y_score)
+
+    print("\n[5/5] Menyimpan model dan scaler...")
+    model_config = {
+        'input_shape': list(input_shape),
+        'sequence_length': int(input_shape[0]),
+        'n_features': int(input_shape[1]),
+        'optimal_threshold': calibration['threshold'],
+        'calibration': calibration,
+        'high_water_mark': meta['high_water_mark']
+    }
+    scaler = joblib.load(os.path.join(shard_dir, 'scaler.joblib'))
+    artifacts_dir = evaluate.save_artifacts_atomic(model, scaler, model_config)
+
+    print(f"\n✅ Training selesai! Model disimpan di {artifacts_dir}")
+    attribution.refresh()
+    return model, history
+
+def _callbacks() -> list:
+    # Checkpoint ditulis terpisah; model yang dilayani API hanya diganti secara atomik di akhir
+    checkpoint_path = os.path.join(os.path.dirname(config.MODEL_PATH), "checkpoint_best.keras")
+    return [
         tf.keras.callbacks.EarlyStopping(
             monitor='val_loss',
             patience=10,
@@ -69,7 +178,7 @@ def train_model():
             verbose=1
         ),
         tf.keras.callbacks.ModelCheckpoint(
-            config.MODEL_PATH,
+            checkpoint_path,
             monitor='val_recall',
             save_best_only=True,
             mode='max',
@@ -83,33 +192,176 @@ def train_model():
             verbose=1
         )
     ]
-    
-    # 4. Latih model
-    print("\n[3/4] Melatih model...")
-    history = model.fit(
-        train_dataset,
-        validation_data=val_dataset,
-        epochs=100,
-        callbacks=callbacks,
+
+def _data_high_water_mark(kesimpulan_path: str = None) -> int:
+    years = pd.read_csv(kesimpulan_path or config.KESIMPULAN_PATH, usecols=['tahun'])['tahun']
+    return int(years.max())
+
+def _split_holdout(y_val: np.ndarray, rng) -> np.ndarray:
+    """Mask separuh validasi (stratifikasi per kelas) untuk kalibrasi; sisanya untuk perbandingan."""
+    y_val = np.asarray(y_val).astype(int)
+    is_cal = np.zeros(len(y_val), dtype=bool)
+    for label in (0, 1):
+        idx = rng.permutation(np.flatnonzero(y_val == label))
+        is_cal[idx[:(len(idx) + 1) // 2]] = True
+    return is_cal
+
+def _operating_point(model, X_cal, y_cal, X_test, y_test) -> dict:
+    """Threshold dikalibrasi di split kalibrasi (target recall yang sama untuk semua model), lalu
+    recall/presisi pada threshold itu dan ROC-AUC diukur di split perbandingan yang tidak disentuh."""
+    threshold = evaluate.select_recall_threshold(y_cal, evaluate.score_windows(model, X_cal))['threshold']
+    y_test = np.asarray(y_test).astype(int)
+    scores = evaluate.score_windows(model, X_test)
+    if len(np.unique(y_test)) < 2:
+        return {'threshold': threshold, 'recall': None, 'precision': None, 'roc_auc': None}
+    predicted = scores >= threshold
+    return {
+        'threshold': float(threshold),
+        'recall': float(predicted[y_test == 1].mean()),
+        'precision': float(y_test[predicted].mean()) if predicted.any() else 0.0,
+        'roc_auc': float(roc_auc_score(y_test, scores)),
+    }
+
+def train_incremental(since_year: int = None, replay_ratio: float = None, epochs: int = None, seed: int = 42) -> dict:
+    """Fine-tune gru_model.keras yang ada hanya dengan data baru + sampel replay data lama.
+
+    Jendela "baru" adalah jendela yang tahun terakhirnya > high-water mark di model_config.json
+    (atau since_year). Scaler lama dipakai apa adanya agar skala input model tidak bergeser.
+    Validasi memakai split deterministik atas semua jendela (lama + baru), dibagi dua: separuh
+    untuk early stopping & kalibrasi threshold, separuh lagi hanya untuk membandingkan model lama
+    dan baru. Kedua model dikalibrasi ke target recall yang sama (operating point yang sama);
+    model baru hanya dipromosikan jika recall dan ROC-AUC-nya pada split perbandingan tidak turun.
+
+    Mengembalikan laporan dict (termasuk 'promoted'), atau None jika tidak ada data baru.
+    """
+    replay_ratio = config.INCREMENTAL_REPLAY_RATIO if replay_ratio is None else replay_ratio
+    epochs = epochs or config.INCREMENTAL_EPOCHS
+
+    print("[1/5] Memuat model & artefak saat ini...")
+    # Satu resolusi pointer -> model, scaler, dan config dari versi yang sama
+    model_path, scaler_path, config_path = model_registry.artifact_paths()
+    with open(config_path, 'r') as f:
+        current_config = json.load(f)
+    if current_config.get('horizons'):
+        raise ValueError("Fine-tuning inkremental belum mendukung model multi-horizon; "
+                         "jalankan training penuh dengan --horizons")
+    scaler = joblib.load(scaler_path)
+    model = tf.keras.models.load_model(model_path)
+
+    high_water_mark = since_year if since_year is not None else current_config.get('high_water_mark')
+    if high_water_mark is None:
+        raise ValueError("model_config.json tidak memiliki 'high_water_mark'; jalankan training penuh sekali "
+                         "atau berikan --since-year")
+
+    seq_len = int(current_config.get('sequence_length', config.SEQUENCE_LENGTH))
+    entry = preprocess_cache.get_windows(seq_len=seq_len, scaler_path=scaler_path)
+    X, y, end_years = entry['X'], entry['y'], entry['end_years']
+    is_new = end_years > int(high_water_mark)
+    if not is_new.any():
+        print(f"Tidak ada data setelah tahun {high_water_mark}; model tidak diubah.")
+        return None
+
+    # Split validasi deterministik atas semua jendela: menguji data baru sekaligus lupa-tidaknya pola lama
+    rng = np.random.default_rng(seed)
+    is_val = np.zeros(len(X), dtype=bool)
+    is_val[rng.permutation(len(X))[:max(1, int(config.VALIDATION_SPLIT * len(X)))]] = True
+    new_idx = np.flatnonzero(is_new & ~is_val)
+    old_idx = np.flatnonzero(~is_new & ~is_val)
+    if len(new_idx) == 0:
+        print("Jendela baru hanya masuk split validasi; model tidak diubah.")
+        return None
+    n_replay = min(len(old_idx), int(np.ceil(replay_ratio * len(new_idx))))
+    train_idx = np.sort(np.concatenate([new_idx, rng.choice(old_idx, size=n_replay, replace=False)]))
+    X_train, y_train = X[train_idx], y[train_idx].astype(np.float32)
+    X_val, y_val = X[is_val], y[is_val]
+    # Threshold kandidat dipilih di split kalibrasi -> mengukurnya di split yang sama bias ke atas
+    is_cal = _split_holdout(y_val, rng)
+    X_cal, y_cal, X_test, y_test = X_val[is_cal], y_val[is_cal], X_val[~is_cal], y_val[~is_cal]
+    print(f"Jendela baru: {len(new_idx)} | replay: {n_replay} | validasi: {len(X_val)} "
+          f"(kalibrasi {len(X_cal)}, perbandingan {len(X_test)}; dari {len(X)} total)")
+
+    print("\n[2/5] Mengukur model saat ini...")
+    current = _operating_point(model, X_cal, y_cal, X_test, y_test)
+
+    print("\n[3/5] Fine-tuning dari bobot model saat ini...")
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=config.INCREMENTAL_LEARNING_RATE),
+        loss='binary_crossentropy',
+        metrics=[
+            'accuracy',
+            tf.keras.metrics.Recall(name='recall'),
+            tf.keras.metrics.Precision(name='precision')
+        ]
+    )
+    model.fit(
+        X_train, y_train,
+        validation_data=(X_cal, y_cal.astype(np.float32)),
+        batch_size=config.BATCH_SIZE,
+        epochs=epochs,
+        callbacks=[tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)],
         verbose=1
     )
-    
-    # 5. Simpan model dan scaler
-    print("\n[4/4] Menyimpan model dan scaler...")
-    model.save(config.MODEL_PATH)
-    joblib.dump(scaler, config.SCALER_PATH)
-    
-    # Simpan konfigurasi model
+
+    print("\n[4/5] Mengkalibrasi threshold & membandingkan model pada operating point yang sama...")
+    calibration = evaluate.calibrate_threshold(model, X_cal, y_cal)
+    candidate = _operating_point(model, X_cal, y_cal, X_test, y_test)
+    promoted = (
+        current['recall'] is not None and candidate['recall'] is not None
+        and candidate['recall'] >= current['recall'] - config.INCREMENTAL_RECALL_TOLERANCE
+        and candidate['roc_auc'] >= current['roc_auc'] - config.INCREMENTAL_AUC_TOLERANCE
+    )
+    report = {
+        'since_year': int(high_water_mark),
+        'high_water_mark': int(end_years.max()),
+        'n_new': int(len(new_idx)),
+        'n_replay': int(n_replay),
+        'n_val': int(len(X_val)),
+        'n_holdout': int(len(X_test)),
+        'current': current,
+        'candidate': candidate,
+        'promoted': bool(promoted),
+    }
+    for name in ('recall', 'precision', 'roc_auc'):
+        print(f"{name} (split perbandingan): saat ini {current[name]} -> kandidat {candidate[name]}")
+
+    if not promoted:
+        print("\n⚠️  Recall atau ROC-AUC turun (atau split perbandingan tanpa dua kelas); model lama dipertahankan.")
+        return report
+
+    print("\n[5/5] Menyimpan model hasil fine-tuning...")
     model_config = {
-        'input_shape': list(input_shape),  # Konversi ke list Python
-        'sequence_length': int(input_shape[0]),
-        'n_features': int(input_shape[1])
+        **current_config,
+        'optimal_threshold': calibration['threshold'],
+        'calibration': calibration,
+        'high_water_mark': report['high_water_mark'],
+        'incremental': report,
     }
-    with open(config.CONFIG_PATH, 'w') as f:
-        json.dump(model_config, f)
-    
-    print(f"\n✅ Training selesai! Model disimpan di {config.MODEL_PATH}")
-    return model, history
+    artifacts_dir = evaluate.save_artifacts_atomic(model, scaler, model_config)
+    print(f"\n✅ Model diperbarui secara inkremental (data hingga {report['high_water_mark']}) di {artifacts_dir}")
+    attribution.refresh()
+    return report
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Training model GRU (penuh atau inkremental)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Fine-tune model yang ada hanya dengan data setelah high-water mark')
+    parser.add_argument('--since-year', type=int, help='Override high-water mark (tahun terakhir yang sudah dilatih)')
+    parser.add_argument('--replay-ratio', type=float, help='Sampel replay jendela lama per jendela baru')
+    parser.add_argument('--epochs', type=int, help='Epoch maksimum fine-tuning')
+    parser.add_argument('--sharded', action='store_true',
+                        help='Training out-of-core dari shard .npy (config.SHARD_DIR) via tf.data streaming')
+    parser.add_argument('--rebuild-shards', action='store_true', help='Tulis ulang shard walau versi data sama')
+    parser.add_argument('--horizons', type=int, nargs='*',
+                        help=f'Model multi-horizon (tahun ke depan); tanpa nilai = {list(config.FORECAST_HORIZONS)}')
+    args = parser.parse_args()
+    if args.horizons is not None and (args.incremental or args.sharded):
+        parser.error('--horizons hanya untuk training penuh (tanpa --incremental/--sharded)')
+
+    if args.incremental:
+        train_incremental(since_year=args.since_year, replay_ratio=args.replay_ratio, epochs=args.epochs)
+    elif args.sharded:
+        train_model_sharded(rebuild=args.rebuild_shards)
+    elif args.horizons is not None:
+        train_model(horizons=args.horizons or config.FORECAST_HORIZONS)
+    else:
+        train_model()
\ No newline at end of file
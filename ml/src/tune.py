@@ -0,0 +1,333 @@
+"""
+Driver hyperparameter tuning paralel untuk model GRU (ruang pencarian dari model.build_model).
+
+Alur:
+  1. Data kesimpulan di-window SEKALI lalu disimpan ke .npy di config.TUNING_DIR.
+  2. Trial dijalankan di beberapa proses worker (CPU) yang membuka array tersebut
+     via memory-map (np.load(mmap_mode='r')), jadi dataset tidak dibangun ulang per trial.
+  3. Penjadwalan Hyperband (successive halving): trial yang buruk (PR-AUC validasi) dipangkas
+     di setiap ronde, trial yang bertahan dilanjutkan dari bobot terakhirnya. Di dalam trial,
+     EarlyStopping menghentikan epoch yang tidak lagi memperbaiki val_loss.
+  4. Konfigurasi terbaik dilatih ulang, threshold dikalibrasi (evaluate.py), lalu
+     hyperparameter + threshold + laporan waktu trial disimpan ke model_config.json.
+
+Contoh:
+    python ml/src/tune.py --workers 4 --max-epochs 27
+"""
+import os
+import json
+import math
+import time
+import argparse
+import contextlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import tensorflow as tf
+
+import config
+import evaluate
+import attribution
+import preprocess_cache
+import model as model_lib
+
+# Diisi oleh _init_worker di setiap proses worker
+_WORKER_DATA = {}
+
+class _MemmapSequence(tf.keras.utils.Sequence):
+    """Menyajikan batch dari array memory-map; hanya batch aktif yang disalin ke RAM."""
+    def __init__(self, X, y, batch_size, shuffle=False, seed=42):
+        super().__init__()
+        self.X = X
+        self.y = y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._order = np.arange(len(X))
+        if shuffle:
+            self._rng.shuffle(self._order)
+
+    def __len__(self):
+        return max(1, math.ceil(len(self._order) / self.batch_size))
+
+    def __getitem__(self, i):
+        # Indeks diurutkan agar akses ke file memory-map tetap sekuensial
+        idx = np.sort(self._order[i * self.batch_size:(i + 1) * self.batch_size])
+        return np.asarray(self.X[idx]), np.asarray(self.y[idx], dtype=np.float32)
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+
+def prepare_shared_dataset(data_dir: str, seed: int = 42) -> dict:
+    """Membangun jendela pelatihan sekali dan menyimpannya sebagai file .npy untuk di-mmap."""
+    os.makedirs(data_dir, exist_ok=True)
+    # Scaler & jendela dari cache berbasis hash input: data yang sama tidak di-window ulang
+    entry = preprocess_cache.get_windows()
+    X, y, scaler, feature_names = entry['X'], entry['y'], entry['scaler'], entry['feature_names']
+
+    # Split train/val deterministik (sama untuk semua trial)
+    order = np.random.default_rng(seed).permutation(len(X))
+    val_size = max(1, int(config.VALIDATION_SPLIT * len(X)))
+    val_idx, train_idx = np.sort(order[:val_size]), np.sort(order[val_size:])
+
+    np.save(os.path.join(data_dir, 'X_train.npy'), X[train_idx])
+    np.save(os.path.join(data_dir, 'y_train.npy'), y[train_idx])
+    np.save(os.path.join(data_dir, 'X_val.npy'), X[val_idx])
+    np.save(os.path.join(data_dir, 'y_val.npy'), y[val_idx])
+    joblib.dump(scaler, os.path.join(data_dir, 'scaler.joblib'))
+
+    meta = {
+        'input_shape': [int(X.shape[1]), int(X.shape[2])],
+        'n_train': int(len(train_idx)),
+        'n_val': int(len(val_idx)),
+        'feature_names': feature_names
+    }
+    with open(os.path.join(data_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    print(f"Dataset tuning disimpan di {data_dir}: train={meta['n_train']}, val={meta['n_val']}, shape={meta['input_shape']}")
+    return meta
+
+def _load_shared_dataset(data_dir: str) -> dict:
+    return {
+        name: np.load(os.path.join(data_dir, f'{name}.npy'), mmap_mode='r')
+        for name in ('X_train', 'y_train', 'X_val', 'y_val')
+    }
+
+@contextlib.contextmanager
+def _worker_env(threads: int):
+    """Environment untuk worker yang di-spawn selama blok: CPU-only dan jumlah thread TF dibatasi.
+
+    Diatur lewat environment (bukan tf.config di initializer) karena runtime TF di worker sudah
+    berjalan sebelum initializer dipanggil. Nilai lama dikembalikan agar proses induk tidak terpengaruh.
+    """
+    overrides = {
+        'CUDA_VISIBLE_DEVICES': '',
+        'TF_NUM_INTRAOP_THREADS': str(threads),
+        'TF_NUM_INTEROP_THREADS': '1'
+    }
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def _init_worker(data_dir: str):
+    """Initializer proses worker: buka dataset via mmap."""
+    _WORKER_DATA.update(_load_shared_dataset(data_dir))
+
+def _build_from_values(input_shape, values: dict):
+    hp = model_lib.HyperParameters()
+    for name, value in values.items():
+        hp.Fixed(name, value)
+    return model_lib.build_model(tuple(input_shape), hp)
+
+def _ranking_metrics(model, X_val, y_val) -> dict:
+    """PR-AUC & ROC-AUC validasi dari bobot akhir ronde (bobot yang dilanjutkan ronde berikutnya).
+
+    Recall mentah tidak dipakai: model yang memprediksi semua jendela positif mendapat recall 1.0.
+    """
+    from sklearn.metrics import average_precision_score, roc_auc_score
+
+    y_true = np.asarray(y_val).astype(int)
+    if len(np.unique(y_true)) < 2:
+        return {'pr_auc': 0.0, 'roc_auc': 0.0}
+    y_score = evaluate.score_windows(model, np.asarray(X_val))
+    return {'pr_auc': float(average_precision_score(y_true, y_score)),
+            'roc_auc': float(roc_auc_score(y_true, y_score))}
+
+def _run_trial(task: dict) -> dict:
+    """Menjalankan satu ronde trial di worker: lanjutkan dari bobot sebelumnya hingga task['epochs']."""
+    start = time.perf_counter()
+    tf.keras.backend.clear_session()
+    model = _build_from_values(task['input_shape'], task['values'])
+    if task['initial_epoch'] > 0 and os.path.exists(task['weights_path']):
+        model.load_weights(task['weights_path'])
+
+    train_seq = _MemmapSequence(_WORKER_DATA['X_train'], _WORKER_DATA['y_train'], config.BATCH_SIZE, shuffle=True, seed=task['seed'])
+    val_seq = _MemmapSequence(_WORKER_DATA['X_val'], _WORKER_DATA['y_val'], config.BATCH_SIZE)
+
+    history = model.fit(
+        train_seq,
+        validation_data=val_seq,
+        initial_epoch=task['initial_epoch'],
+        epochs=task['epochs'],
+        callbacks=[tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=3)],
+        verbose=0
+    )
+    model.save_weights(task['weights_path'])
+    ranking = _ranking_metrics(model, _WORKER_DATA['X_val'], _WORKER_DATA['y_val'])
+    val_losses = history.history.get('val_loss') or [float('inf')]
+
+    return {
+        'trial_id': task['trial_id'],
+        'score': ranking['pr_auc'],
+        'roc_auc': ranking['roc_auc'],
+        'val_loss': float(val_losses[-1]),
+        'epochs': task['epochs'],
+        'epochs_run': len(history.history.get('loss', [])),
+        'seconds': round(time.perf_counter() - start, 3),
+        'pid': os.getpid()
+    }
+
+def _hyperband_brackets(max_epochs: int, factor: int) -> list:
+    """Jadwal Hyperband: daftar bracket, masing-masing berisi ronde (n_trial, epoch)."""
+    s_max = int(math.floor(math.log(max_epochs, factor) + 1e-9))
+    brackets = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * factor ** s))
+        r = max_epochs * factor ** (-s)
+        rounds = []
+        for i in range(s + 1):
+            n_i = max(1, int(math.floor(n * factor ** (-i))))
+            r_i = max(1, int(round(r * factor ** i)))
+            rounds.append((n_i, r_i))
+        brackets.append(rounds)
+    return brackets
+
+def _sample_values(space, rng) -> dict:
+    return {
+        hp_obj.name: hp_obj.random_sample(int(rng.integers(0, 2 ** 31 - 1)))
+        for hp_obj in space
+    }
+
+def _rank_key(result: dict) -> tuple:
+    # Objektif utama PR-AUC validasi (tidak bergantung threshold), lalu ROC-AUC dan val_loss
+    return (-result['score'], -result['roc_auc'], result['val_loss'])
+
+def run_search(workers: int = None, max_epochs: int = 27, factor: int = 3, seed: int = 42, data_dir: str = None) -> dict:
+    """Menjalankan pencarian Hyperband paralel dan mengembalikan laporan trial."""
+    data_dir = data_dir or config.TUNING_DIR
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    meta = prepare_shared_dataset(data_dir, seed=seed)
+    weights_dir = os.path.join(data_dir, 'trials')
+    os.makedirs(weights_dir, exist_ok=True)
+
+    space = model_lib.search_space().space
+    rng = np.random.default_rng(seed)
+    trials = {}
+    search_start = time.perf_counter()
+
+    ctx = mp.get_context('spawn')  # TensorFlow tidak aman di-fork
+    with _worker_env(threads), ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(data_dir,)) as pool:
+        for b, rounds in enumerate(_hyperband_brackets(max_epochs, factor)):
+            n_start = rounds[0][0]
+            active = []
+            for _ in range(n_start):
+                trial_id = f"{len(trials):04d}"
+                trials[trial_id] = {'trial_id': trial_id, 'bracket': b, 'values': _sample_values(space, rng), 'rounds': []}
+                active.append(trial_id)
+
+            prev_epochs = 0
+            for n_keep, epochs in rounds:
+                active = active[:n_keep]
+                tasks = [{
+                    'trial_id': t,
+                    'values': trials[t]['values'],
+                    'input_shape': meta['input_shape'],
+                    'initial_epoch': prev_epochs,
+                    'epochs': epochs,
+                    'weights_path': os.path.join(weights_dir, f'{t}.weights.h5'),
+                    'seed': seed + int(t)
+                } for t in active]
+                results = list(pool.map(_run_trial, tasks))
+                for res in results:
+                    trials[res['trial_id']]['rounds'].append(res)
+                # Pangkas: hanya trial terbaik yang lanjut ke ronde berikutnya
+                active = [res['trial_id'] for res in sorted(results, key=_rank_key)]
+                prev_epochs = epochs
+                print(f"Bracket {b}: {len(results)} trial x {epochs} epoch selesai, terbaik PR-AUC {max(r['score'] for r in results):.4f}")
+
+    wall_seconds = time.perf_counter() - search_start
+    for t in trials.values():
+        t['final'] = t['rounds'][-1]
+        t['seconds'] = round(sum(r['seconds'] for r in t['rounds']), 3)
+
+    # Hanya trial yang mencapai anggaran epoch penuh (ronde terakhir bracket) yang dibandingkan;
+    # skor setelah 1 epoch dan setelah max_epochs tidak setara
+    full_budget = max(t['final']['epochs'] for t in trials.values())
+    finalists = [t for t in trials.values() if t['final']['epochs'] == full_budget]
+    best = min(finalists, key=lambda t: _rank_key(t['final']))
+    trial_seconds = sum(t['seconds'] for t in trials.values())
+    return {
+        'meta': meta,
+        'best_trial': best['trial_id'],
+        'best_values': best['values'],
+        'trials': list(trials.values()),
+        'timing': {
+            'workers': workers,
+            'threads_per_worker': threads,
+            'n_trials': len(trials),
+            'n_rounds': sum(len(t['rounds']) for t in trials.values()),
+            'wall_seconds': round(wall_seconds, 3),
+            'trial_seconds_total': round(trial_seconds, 3),
+            'trial_seconds_mean': round(trial_seconds / max(1, len(trials)), 3),
+            'parallel_speedup': round(trial_seconds / wall_seconds, 2) if wall_seconds > 0 else None
+        }
+    }
+
+def train_best_and_save(report: dict, data_dir: str = None) -> dict:
+    """Melatih ulang konfigurasi terbaik, menghitung threshold, dan menyimpan artefak."""
+    data_dir = data_dir or config.TUNING_DIR
+    data = _load_shared_dataset(data_dir)
+    input_shape = report['meta']['input_shape']
+
+    tf.keras.backend.clear_session()
+    model = _build_from_values(input_shape, report['best_values'])
+    model.fit(
+        _MemmapSequence(data['X_train'], data['y_train'], config.BATCH_SIZE, shuffle=True),
+        validation_data=_MemmapSequence(data['X_val'], data['y_val'], config.BATCH_SIZE),
+        epochs=config.EPOCHS,
+        callbacks=[tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)],
+        verbose=1
+    )
+
+    calibration = evaluate.calibrate_threshold(model, np.asarray(data['X_val']), np.asarray(data['y_val']))
+    threshold = calibration['threshold']
+
+    model_config = {
+        'input_shape': list(input_shape),
+        'sequence_length': int(input_shape[0]),
+        'n_features': int(input_shape[1]),
+        'optimal_threshold': threshold,
+        'calibration': calibration,
+        'hyperparameters': report['best_values'],
+        'tuning': {
+            'best_trial': report['best_trial'],
+            'best_val_pr_auc': report['trials'][int(report['best_trial'])]['final']['score'],
+            **report['timing'],
+            'trials': [
+                {'trial_id': t['trial_id'], 'bracket': t['bracket'], 'epochs': t['final']['epochs'],
+                 'val_pr_auc': t['final']['score'], 'val_roc_auc': t['final']['roc_auc'], 'seconds': t['seconds']}
+                for t in report['trials']
+            ]
+        }
+    }
+    scaler = joblib.load(os.path.join(data_dir, 'scaler.joblib'))
+    evaluate.save_artifacts_atomic(model, scaler, model_config)
+
+    print(f"\n✅ Tuning selesai! Trial terbaik {report['best_trial']}: {report['best_values']}")
+    print(f"Threshold optimal: {threshold:.4f} | Waktu: {report['timing']['wall_seconds']}s "
+          f"({report['timing']['n_trials']} trial, speedup {report['timing']['parallel_speedup']}x)")
+    attribution.refresh()
+    return model_config
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hyperparameter tuning paralel (Hyperband) untuk model GRU')
+    parser.add_argument('--workers', type=int, help='Jumlah proses worker (default: setengah jumlah CPU)')
+    parser.add_argument('--max-epochs', type=int, default=27, help='Epoch maksimum per trial (R Hyperband)')
+    parser.add_argument('--factor', type=int, default=3, help='Faktor reduksi Hyperband (eta)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    search_report = run_search(workers=args.workers, max_epochs=args.max_epochs, factor=args.factor, seed=args.seed)
+    train_best_and_save(search_report)
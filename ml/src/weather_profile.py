@@ -0,0 +1,164 @@
+"""
+Profil cuaca satu wilayah: hitungan kejadian/dampak, statistik numerik, dan batas periode,
+dihitung dalam SATU lintasan atas df_weather.
+
+Dipakai bersama oleh recommendations.py (alasan & mitigasi) dan ringkasan web di predict.py,
+sehingga satu request tidak lagi memindai, memecah string, dan meng-coerce kolom yang sama
+berkali-kali. Profil di-cache per (versi data, wilayah, jendela tahun) oleh pemanggil.
+"""
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import pandas as pd
+
+import config
+import metrics
+
+# Kata kunci pencarian kolom numerik (kolom pertama yang cocok dipakai)
+METRIC_KEYWORDS = {
+    'temperature': ['suhu', 'temperature', 'temp'],
+    'humidity': ['lembap', 'humidity', 'kelembaban'],
+    'rainfall': ['hujan', 'rain', 'precip', 'curah'],
+    'wind': ['angin', 'wind', 'kecepatan'],
+}
+
+# Kolom kategori yang tidak boleh dianggap metrik numerik walau namanya cocok kata kunci
+_NON_METRIC_COLUMNS = {config.DATE_COLUMN, config.REGION_COLUMN, config.WEATHER_EVENT_COLUMN, config.WEATHER_IMPACT_COLUMN}
+
+# Batas maksimum profil yang di-cache in-process
+_CACHE_LIMIT = 256
+_CACHE = {}
+
+def _empty_metrics() -> dict:
+    return {
+        'avg_temperature': None,
+        'min_temperature': None,
+        'max_temperature': None,
+        'avg_humidity': None,
+        'avg_rainfall': None,
+        'total_rainfall': None,
+        'avg_wind_speed': None,
+        'max_wind_speed': None,
+        'high_humidity_days': 0,
+        'extreme_rain_days': 0
+    }
+
+@dataclass
+class WeatherProfile:
+    """Ringkasan df_weather yang dibutuhkan alasan, mitigasi, dan ringkasan web."""
+    n_rows: int = 0
+    n_dates: int = 0
+    period_start: Optional[pd.Timestamp] = None
+    period_end: Optional[pd.Timestamp] = None
+    has_events: bool = False
+    has_impacts: bool = False
+    # Hitungan per token (string gabungan dipecah), urut menurun
+    event_counts: dict = field(default_factory=dict)
+    impact_counts: dict = field(default_factory=dict)
+    # (nilai, jumlah) untuk string kejadian/dampak mentah paling sering
+    top_event: Optional[Tuple[str, int]] = None
+    top_impact: Optional[Tuple[str, int]] = None
+    metrics: dict = field(default_factory=_empty_metrics)
+
+    @property
+    def empty(self) -> bool:
+        return self.n_rows == 0
+
+    @property
+    def has_numeric(self) -> bool:
+        return any(self.metrics[k] is not None for k in ('avg_temperature', 'avg_humidity', 'avg_rainfall', 'avg_wind_speed'))
+
+def _find_column(columns, keywords) -> Optional[str]:
+    for col in columns:
+        if col in _NON_METRIC_COLUMNS:
+            continue
+        col_lower = str(col).lower()
+        if any(kw in col_lower for kw in keywords):
+            return col
+    return None
+
+def _token_counts(series: pd.Series, sep: str) -> dict:
+    tokens = series.dropna().astype(str).str.split(sep).explode()
+    return {k: int(v) for k, v in tokens.value_counts().items()}
+
+def _top_value(series: pd.Series) -> Optional[Tuple[str, int]]:
+    counts = series.value_counts()
+    if counts.empty:
+        return None
+    return counts.index[0], int(counts.iloc[0])
+
+def _numeric_metrics(df_weather: pd.DataFrame) -> dict:
+    metrics = _empty_metrics()
+    columns = df_weather.columns
+
+    def numeric(kind):
+        col = _find_column(columns, METRIC_KEYWORDS[kind])
+        if col is None:
+            return None
+        series = pd.to_numeric(df_weather[col], errors='coerce').dropna()
+        return series if not series.empty else None
+
+    temp = numeric('temperature')
+    if temp is not None:
+        metrics['avg_temperature'] = temp.mean()
+        metrics['min_temperature'] = temp.min()
+        metrics['max_temperature'] = temp.max()
+
+    humidity = numeric('humidity')
+    if humidity is not None:
+        metrics['avg_humidity'] = humidity.mean()
+        metrics['high_humidity_days'] = int((humidity > 80).sum())
+
+    rain = numeric('rainfall')
+    if rain is not None:
+        metrics['avg_rainfall'] = rain.mean()
+        metrics['total_rainfall'] = rain.sum()
+        metrics['extreme_rain_days'] = int((rain > 50).sum())  # >50mm per hari
+
+    wind = numeric('wind')
+    if wind is not None:
+        metrics['avg_wind_speed'] = wind.mean()
+        metrics['max_wind_speed'] = wind.max()
+
+    return metrics
+
+def build_weather_profile(df_weather: pd.DataFrame) -> WeatherProfile:
+    """Menghitung WeatherProfile dari df_weather (satu lintasan per kolom yang relevan)."""
+    if df_weather is None or df_weather.empty:
+        return WeatherProfile()
+
+    profile = WeatherProfile(n_rows=len(df_weather))
+
+    if config.DATE_COLUMN in df_weather.columns:
+        dates = pd.to_datetime(df_weather[config.DATE_COLUMN], errors='coerce')
+        profile.n_dates = int(dates.nunique())
+        start, end = dates.min(), dates.max()
+        if pd.notna(start) and pd.notna(end):
+            profile.period_start, profile.period_end = start, end
+
+    if config.WEATHER_EVENT_COLUMN in df_weather.columns:
+        events = df_weather[config.WEATHER_EVENT_COLUMN]
+        profile.has_events = True
+        profile.event_counts = _token_counts(events, ', ')
+        profile.top_event = _top_value(events)
+
+    if config.WEATHER_IMPACT_COLUMN in df_weather.columns:
+        impacts = df_weather[config.WEATHER_IMPACT_COLUMN]
+        profile.has_impacts = True
+        profile.impact_counts = _token_counts(impacts, ' / ')
+        profile.top_impact = _top_value(impacts)
+
+    profile.metrics = _numeric_metrics(df_weather)
+    return profile
+
+def get_weather_profile(df_weather: pd.DataFrame, cache_key: tuple = None) -> WeatherProfile:
+    """Profil dari cache jika cache_key (misal, (versi data, wilayah, tahun minimum)) sudah ada."""
+    if cache_key is None:
+        return build_weather_profile(df_weather)
+    profile = _CACHE.get(cache_key)
+    metrics.cache_lookup('weather_profile', hit=profile is not None)
+    if profile is None:
+        if len(_CACHE) >= _CACHE_LIMIT:
+            _CACHE.clear()
+        profile = _CACHE[cache_key] = build_weather_profile(df_weather)
+    return profile